@@ -0,0 +1,142 @@
+"""
+Benchmarks of the MupeTalk pipeline hot paths on a synthetic corpus.
+
+Generates (or reuses) a corpus with `my_masters_degree.synthetic_corpus`,
+times each benchmark `--repeat` times and compares the best time with the
+baseline stored in ``benchmarks/baselines.json`` for the same scale.
+
+    python -m benchmarks.bench_pipeline --scale 1
+    python -m benchmarks.bench_pipeline --scale 10 --data-dir /tmp/mupe_10x
+    python -m benchmarks.bench_pipeline --scale 1 --update-baselines
+
+Baselines are machine-specific; refresh them when changing machines.
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from my_masters_degree.process_dataset import (
+    aggregate_sample_dialogues,
+    get_group_mapping,
+    get_missing_ids,
+)
+from my_masters_degree.sampling_mupetalks import (
+    extract_audio_from_parquets,
+    get_speaker_dialogues,
+    join_audio_segments,
+)
+from my_masters_degree.synthetic_corpus import SyntheticCorpusConfig, SyntheticCorpusPaths, generate_corpus
+
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+REGRESSION_TOLERANCE = 1.25
+
+
+def build_benchmarks(paths: SyntheticCorpusPaths) -> Dict[str, Callable[[], object]]:
+    """Load the corpus once and return one zero-argument callable per benchmark."""
+    train_df = pd.read_csv(paths.train_csv)
+    audio_ids = train_df["audio_id"].unique().tolist()
+
+    aggregated = [aggregate_sample_dialogues(train_df, audio_id)[0] for audio_id in audio_ids]
+
+    # Roughly one interview's worth of clips, spread over every shard so the
+    # scan cannot stop early.
+    sampled_paths = train_df["file_path"].iloc[::len(audio_ids)].tolist()
+    audio_map = extract_audio_from_parquets(sampled_paths, str(paths.parquet_dir))
+    audio_bytes = [audio_map[p] for p in sampled_paths]
+
+    mupetalk_df = pd.read_csv(paths.mupetalk_csv)
+    speakers = mupetalk_df.groupby("speaker_code")["interview_id"].nunique()
+    speakers = speakers[speakers >= 2].index[:10].tolist()
+
+    return {
+        "aggregate_sample_dialogues": lambda: [
+            aggregate_sample_dialogues(train_df, audio_id) for audio_id in audio_ids
+        ],
+        "get_group_mapping": lambda: [get_group_mapping(df) for df in aggregated],
+        "get_missing_ids": lambda: [get_missing_ids(df) for df in aggregated],
+        "extract_audio_from_parquets": lambda: extract_audio_from_parquets(
+            sampled_paths, str(paths.parquet_dir)
+        ),
+        "join_audio_segments": lambda: join_audio_segments(audio_bytes),
+        "get_speaker_dialogues": lambda: [
+            get_speaker_dialogues(str(paths.mupetalk_csv), speaker, num_dialogues=2)
+            for speaker in speakers
+        ],
+    }
+
+
+def run_benchmarks(benchmarks: Dict[str, Callable[[], object]], repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, func in benchmarks.items():
+        timings: List[float] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        results[name] = {"best_s": round(min(timings), 6), "median_s": round(statistics.median(timings), 6)}
+    return results
+
+
+def compare_with_baselines(results: Dict[str, Dict[str, float]], baselines: Dict[str, Dict[str, float]]) -> List[str]:
+    """Print a comparison table and return the names of regressed benchmarks."""
+    regressions = []
+    print(f"{'benchmark':<30} {'best (s)':>10} {'baseline':>10} {'ratio':>7}")
+    for name, stats in results.items():
+        baseline = baselines.get(name, {}).get("best_s")
+        if baseline:
+            ratio = stats["best_s"] / baseline
+            flag = "  REGRESSION" if ratio > REGRESSION_TOLERANCE else ""
+            print(f"{name:<30} {stats['best_s']:>10.4f} {baseline:>10.4f} {ratio:>7.2f}{flag}")
+            if flag:
+                regressions.append(name)
+        else:
+            print(f"{name:<30} {stats['best_s']:>10.4f} {'-':>10} {'-':>7}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=float, default=1.0, help="Corpus scale (1, 10, 100...)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", type=Path, help="Reuse or create the corpus here instead of a temp dir")
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    config = SyntheticCorpusConfig(scale=args.scale, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = args.data_dir or Path(tmp_dir)
+        if (data_dir / "train.csv").exists():
+            paths = SyntheticCorpusPaths(
+                root=data_dir,
+                train_csv=data_dir / "train.csv",
+                mupetalk_csv=data_dir / "mupetalk_train.csv",
+                parquet_dir=data_dir / "CORAA-MUPE",
+                segmentations_dir=data_dir / "interview_segmentations",
+            )
+        else:
+            print(f"Generating {config.num_interviews} synthetic interviews in {data_dir}...")
+            paths = generate_corpus(data_dir, config)
+
+        results = run_benchmarks(build_benchmarks(paths), args.repeat)
+
+    all_baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    scale_key = f"{args.scale:g}x"
+    regressions = compare_with_baselines(results, all_baselines.get(scale_key, {}))
+
+    if args.update_baselines:
+        all_baselines[scale_key] = results
+        BASELINES_PATH.write_text(json.dumps(all_baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baselines for {scale_key} written to {BASELINES_PATH}")
+    elif regressions:
+        raise SystemExit(f"Regressions over {REGRESSION_TOLERANCE:.2f}x baseline: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
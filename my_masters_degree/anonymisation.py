@@ -0,0 +1,281 @@
+"""
+Find the names of interviewees and interviewers in utterance text.
+
+Patterns are the names in the metadata (`interviewee_name`,
+`interviewer1..3`) and their variants: first name, compound first name,
+last name, first + last name and nicknames in parentheses. Text and
+patterns are accent-folded and lowercased character by character, so
+offsets in the folded text are offsets in the original.
+
+All patterns go into one Aho-Corasick automaton, compiled into a dense
+transition table over a small alphabet (letters, digits, space and a
+segment separator). The whole corpus is joined into a single string and
+scanned in one linear pass, whatever the number of patterns. Patterns are
+padded with spaces, and so is every segment, so that only whole words
+match.
+
+Each pattern remembers the interviews whose metadata it came from. With
+`scope="interview"` a match only counts in those interviews, so a common
+first name is flagged where it is the name of a participant and not
+everywhere in the corpus.
+"""
+import argparse
+import unicodedata
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Literal, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from my_masters_degree.dialogue_chunker import DIALOGUE_KEYS
+from my_masters_degree.instrumentation import increment, timed
+from my_masters_degree.process_metadata import NAME_PARTICLES, NAME_TITLES, PARENTHESES_RE, normalize_name
+
+NAME_COLUMNS = ["interviewee_name", "interviewer1", "interviewer2", "interviewer3"]
+UNKNOWN_NAMES = {"unknown", ""}
+MIN_PATTERN_LENGTH = 3
+SEGMENT_SEPARATOR = "\x00"
+ALPHABET = " " + SEGMENT_SEPARATOR + "abcdefghijklmnopqrstuvwxyz0123456789"
+SYMBOLS = {c: i for i, c in enumerate(ALPHABET)}
+
+
+class _FoldTable(dict):
+    """`str.translate` table mapping each character to one of ALPHABET."""
+
+    def __missing__(self, codepoint: int) -> str:
+        char = chr(codepoint)
+        decomposed = unicodedata.normalize("NFKD", char)
+        base = "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+        folded = base if len(base) == 1 and base in SYMBOLS else " "
+        self[codepoint] = folded
+        return folded
+
+
+FOLD_TABLE = _FoldTable()
+
+
+def fold_text(text: str) -> str:
+    """Lowercase, accent-free text of the same length, with every other character as a space."""
+    return text.translate(FOLD_TABLE)
+
+
+def name_variants(name: str) -> Set[str]:
+    """
+    Folded forms of a name a speaker might use: the full name, the first
+    and compound first name, the last name, first + last name and any
+    nickname in parentheses.
+    """
+    if not isinstance(name, str) or name.strip().casefold() in UNKNOWN_NAMES:
+        return set()
+    tokens = normalize_name(name)
+    while tokens and tokens[0] in NAME_TITLES:
+        tokens = tokens[1:]
+    variants = set()
+    for nickname in PARENTHESES_RE.findall(name):
+        variants.add(" ".join(normalize_name(nickname.strip("()"))))
+    names = [t for t in tokens if t not in NAME_PARTICLES]
+    # A name of particles only ("De Da") would match common words.
+    if names:
+        variants.update({" ".join(tokens), names[0], names[-1]})
+        if len(names) >= 2:
+            variants.add(f"{names[0]} {names[-1]}")
+        if len(tokens) > 2 and tokens[1] not in NAME_PARTICLES:
+            variants.add(f"{tokens[0]} {tokens[1]}")
+    return {v for v in variants if len(v) >= MIN_PATTERN_LENGTH}
+
+
+def metadata_patterns(metadata_df: pd.DataFrame, name_columns: Iterable[str] = NAME_COLUMNS) -> Dict[str, Set[str]]:
+    """
+    Name variants of each interview's participants, mapped to the
+    interviews (``mupe_code.lower()``, as in `interview_id`) they belong to.
+    """
+    patterns: Dict[str, Set[str]] = {}
+    columns = [c for c in name_columns if c in metadata_df.columns]
+    for row in metadata_df[["mupe_code", *columns]].itertuples(index=False):
+        interview_id = str(row[0]).lower()
+        for name in row[1:]:
+            for variant in name_variants(name):
+                patterns.setdefault(variant, set()).add(interview_id)
+    return patterns
+
+
+class NameScanner:
+    """
+    Aho-Corasick automaton over a set of folded patterns.
+
+    The goto function is completed with failure transitions into a dense
+    (states, len(ALPHABET)) table, so scanning costs one lookup per
+    character.
+    """
+
+    def __init__(self, patterns: Dict[str, Set[str]]):
+        self.patterns = sorted(patterns)
+        self.owners = [frozenset(patterns[p]) for p in self.patterns]
+
+        goto: List[Dict[int, int]] = [{}]
+        own_outputs: List[List[int]] = [[]]
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in f" {pattern} ":
+                symbol = SYMBOLS[char]
+                if symbol not in goto[state]:
+                    goto.append({})
+                    own_outputs.append([])
+                    goto[state][symbol] = len(goto) - 1
+                state = goto[state][symbol]
+            own_outputs[state].append(pattern_id)
+
+        n_states, n_symbols = len(goto), len(ALPHABET)
+        table = np.zeros((n_states, n_symbols), dtype=np.int32)
+        fail = np.zeros(n_states, dtype=np.int32)
+        outputs: List[Tuple[int, ...]] = [()] * n_states
+        # Breadth-first, so a state's failure target is complete before it.
+        queue = deque()
+        for symbol, child in goto[0].items():
+            table[0, symbol] = child
+            queue.append(child)
+        while queue:
+            state = queue.popleft()
+            outputs[state] = tuple(own_outputs[state]) + outputs[fail[state]]
+            table[state] = table[fail[state]]
+            for symbol, child in goto[state].items():
+                fail[child] = table[fail[state], symbol]
+                table[state, symbol] = child
+                queue.append(child)
+
+        self._table = table.tolist()
+        self._outputs = outputs
+        increment("anonymisation.patterns", len(self.patterns))
+        increment("anonymisation.states", n_states)
+
+    def scan(self, text: str) -> List[Tuple[int, int, int]]:
+        """(start, end, pattern_id) of every whole-word match in `text`."""
+        folded = f" {fold_text(text)} "
+        table, outputs = self._table, self._outputs
+        matches = []
+        state = 0
+        for position, char in enumerate(folded):
+            state = table[state][SYMBOLS[char]]
+            if outputs[state]:
+                for pattern_id in outputs[state]:
+                    # Offsets exclude the padding spaces of the pattern and the text.
+                    matches.append((position - len(self.patterns[pattern_id]) - 1, position - 1, pattern_id))
+        return matches
+
+
+@timed()
+def find_names(
+    df: pd.DataFrame,
+    scanner: NameScanner,
+    text_column: str = "original_text",
+    interview_column: str = "interview_id",
+    scope: Literal["interview", "corpus"] = "interview",
+) -> pd.DataFrame:
+    """
+    Scan every row of `df` in a single pass. Returns one row per match with
+    the position of the row in `df`, the original text matched, the
+    pattern and its [start, end) offsets in the row text.
+    """
+    texts = df[text_column].fillna("").astype(str).tolist()
+    lengths = np.array([len(t) for t in texts], dtype=np.int64)
+    # Each row is padded with a space on both sides, between separators.
+    row_starts = np.concatenate([[0], np.cumsum(lengths + 3)[:-1]]) + 1
+    corpus = SEGMENT_SEPARATOR.join(f" {t} " for t in texts)
+    increment("anonymisation.chars_scanned", len(corpus))
+
+    matches = scanner.scan(corpus)
+    if not matches:
+        return pd.DataFrame(columns=["row", "match", "pattern", "start", "end"])
+    starts, ends, pattern_ids = (np.array(column) for column in zip(*matches))
+    rows = np.searchsorted(row_starts, starts, side="right") - 1
+    starts, ends = starts - row_starts[rows], ends - row_starts[rows]
+
+    found = pd.DataFrame({
+        "row": rows,
+        "match": [texts[r][s:e] for r, s, e in zip(rows, starts, ends)],
+        "pattern": [scanner.patterns[p] for p in pattern_ids],
+        "start": starts,
+        "end": ends,
+    })
+    if scope == "interview":
+        interviews = df[interview_column].astype(str).str.lower().to_numpy()
+        own = [interviews[r] in scanner.owners[p] for r, p in zip(rows, pattern_ids)]
+        found = found.loc[own]
+    increment("anonymisation.matches", len(found))
+    return found.reset_index(drop=True)
+
+
+def split_at_gaps(df: pd.DataFrame, keep: np.ndarray, interview_column: str = "interview_id") -> pd.DataFrame:
+    """
+    The rows of a chunked table (see `dialogue_chunker`) where `keep` is
+    True, with `chunk_id` renumbered so that a dropped turn ends its chunk:
+    the turns before and after it become separate dialogues instead of one
+    with a turn missing. Chunks are numbered from 1 within each group again.
+    """
+    keys = df[[interview_column, *DIALOGUE_KEYS[1:]]]
+    starts = (keys != keys.shift()).any(axis=1).to_numpy().copy()
+    starts[1:] |= ~keep[:-1]
+    kept = df.loc[keep]
+    starts = starts[keep]
+
+    groups = kept[[interview_column, DIALOGUE_KEYS[1]]]
+    group_starts = np.flatnonzero((groups != groups.shift()).any(axis=1).to_numpy())
+    starts[group_starts] = True
+    chunk_number = np.cumsum(starts)
+    group_first_chunk = np.repeat(chunk_number[group_starts], np.diff(np.append(group_starts, len(kept))))
+    return kept.assign(chunk_id=(chunk_number - group_first_chunk + 1).astype(df["chunk_id"].dtype))
+
+
+def anonymise(
+    df: pd.DataFrame,
+    scanner: NameScanner,
+    action: Literal["flag", "drop"] = "flag",
+    text_column: str = "original_text",
+    interview_column: str = "interview_id",
+    scope: Literal["interview", "corpus"] = "interview",
+) -> pd.DataFrame:
+    """
+    With `action="flag"`, add a `names_found` column listing the names
+    matched in each row (empty when none); with `action="drop"`, remove the
+    rows with any match. Dropping from a chunked table splits the chunk at
+    each removed turn (see `split_at_gaps`), so no dialogue has a gap.
+    """
+    found = find_names(df, scanner, text_column, interview_column, scope)
+    if action == "drop":
+        keep = np.ones(len(df), dtype=bool)
+        keep[found["row"].to_numpy(dtype=np.int64)] = False
+        increment("anonymisation.rows_dropped", int((~keep).sum()))
+        if {interview_column, *DIALOGUE_KEYS[1:]} <= set(df.columns):
+            return split_at_gaps(df, keep, interview_column)
+        return df.loc[keep]
+
+    names_found: List[List[str]] = [[] for _ in range(len(df))]
+    for row, match in zip(found["row"], found["match"]):
+        names_found[row].append(match)
+    return df.assign(names_found=names_found)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Flag or drop MupeTalk turns mentioning interview participants")
+    parser.add_argument("input_csv", type=Path)
+    parser.add_argument("metadata_csv", type=Path)
+    parser.add_argument("output_csv", type=Path)
+    parser.add_argument("--action", choices=["flag", "drop"], default="flag")
+    parser.add_argument("--scope", choices=["interview", "corpus"], default="interview",
+                        help="Match a participant's names only in their own interviews, or anywhere")
+    args = parser.parse_args()
+
+    scanner = NameScanner(metadata_patterns(pd.read_csv(args.metadata_csv)))
+    mupetalk_df = pd.read_csv(args.input_csv)
+    result = anonymise(mupetalk_df, scanner, action=args.action, scope=args.scope)
+    result.to_csv(args.output_csv, index=False)
+    if args.action == "drop":
+        print(f"{len(scanner.patterns)} patterns, dropped {len(mupetalk_df) - len(result)} of {len(mupetalk_df)} rows")
+    else:
+        flagged = int(result["names_found"].str.len().gt(0).sum())
+        print(f"{len(scanner.patterns)} patterns, flagged {flagged} of {len(mupetalk_df)} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Find duplicated and overlapping audio in the CORAA-MUPE corpus.
+
+Each clip is reduced to a set of spectral-peak pair hashes (anchor
+frequency, target frequency, time delta), computed shard by shard in a
+process pool. A clip x hash incidence matrix serves as the inverted index:
+its product with its transpose counts the hashes shared by every pair of
+clips that have any in common, so clusters are found without comparing all
+pairs. Hashes shared by too many clips carry no information and are
+dropped first.
+
+Byte-identical clips are caught by a sha256 of the encoded audio, and
+overlapping segments by comparing the start/end times in the metadata.
+"""
+import hashlib
+import io
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import soundfile as sf
+from pydantic import BaseModel
+from scipy import sparse
+from scipy.ndimage import maximum_filter
+
+from my_masters_degree.dailytalk_export import resample_audio, to_mono
+from my_masters_degree.instrumentation import increment, timed
+from my_masters_degree.sampling_mupetalks import parquet_shards
+
+
+class FingerprintConfig(BaseModel):
+    sample_rate: int = 8000
+    n_fft: int = 512
+    hop_length: int = 128
+    # Peak picking neighbourhood, in (frequency bins, frames).
+    neighborhood: Tuple[int, int] = (15, 11)
+    peaks_per_second: int = 30
+    fan_out: int = 5
+    max_dt: int = 63
+    # Hashes found in more clips than this are ignored.
+    max_postings: int = 50
+    min_shared: int = 10
+    min_similarity: float = 0.3
+
+
+class DuplicateReport(BaseModel):
+    exact: List[List[str]]
+    near: List[List[str]]
+
+
+def spectral_peaks(audio: np.ndarray, config: FingerprintConfig) -> Tuple[np.ndarray, np.ndarray]:
+    """(frame, frequency bin) of the strongest local maxima of the log spectrogram."""
+    n_fft, hop = config.n_fft, config.hop_length
+    if len(audio) < n_fft:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    frames = np.lib.stride_tricks.sliding_window_view(audio, n_fft)[::hop]
+    spectrum = np.log1p(np.abs(np.fft.rfft(frames * np.hanning(n_fft), axis=1)).T)
+
+    is_peak = (spectrum == maximum_filter(spectrum, size=config.neighborhood)) & (spectrum > spectrum.mean() + spectrum.std())
+    freqs, times = np.nonzero(is_peak)
+    seconds = len(audio) / config.sample_rate
+    keep = max(1, int(seconds * config.peaks_per_second))
+    if len(times) > keep:
+        strongest = np.argsort(spectrum[freqs, times])[::-1][:keep]
+        freqs, times = freqs[strongest], times[strongest]
+
+    order = np.lexsort((freqs, times))
+    return times[order], freqs[order]
+
+
+def peak_hashes(times: np.ndarray, freqs: np.ndarray, config: FingerprintConfig) -> np.ndarray:
+    """
+    Unique 24-bit hashes of each peak paired with the next `fan_out` peaks
+    within `max_dt` frames: 9 bits per frequency bin and 6 for the delta.
+    """
+    hashes = []
+    for k in range(1, config.fan_out + 1):
+        dt = times[k:] - times[:-k]
+        valid = (dt > 0) & (dt <= config.max_dt)
+        f1, f2 = freqs[:-k][valid], freqs[k:][valid]
+        hashes.append(((f1 & 0x1FF) << 15) | ((f2 & 0x1FF) << 6) | (dt[valid] & 0x3F))
+    return np.unique(np.concatenate(hashes).astype(np.uint32)) if hashes else np.zeros(0, dtype=np.uint32)
+
+
+def fingerprint_clip(audio_bytes: bytes, config: FingerprintConfig) -> np.ndarray:
+    data, sr = sf.read(io.BytesIO(audio_bytes), dtype="float32", always_2d=False)
+    audio = resample_audio(to_mono(data), sr, config.sample_rate)
+    return peak_hashes(*spectral_peaks(audio, config), config)
+
+
+def _fingerprint_shard(task: Tuple[str, Dict]) -> Tuple[List[str], List[np.ndarray], List[str]]:
+    """Worker: paths, hashes and sha256 digests of every clip in a shard."""
+    shard, config_dump = task
+    config = FingerprintConfig.model_validate(config_dump)
+    paths, hashes, digests = [], [], []
+    parquet_file = pq.ParquetFile(shard)
+    for rg in range(parquet_file.num_row_groups):
+        table = parquet_file.read_row_group(rg, columns=["file_path", "audio"])
+        for path, audio in zip(table["file_path"].to_pylist(), table["audio"].to_pylist()):
+            paths.append(path)
+            hashes.append(fingerprint_clip(audio["bytes"], config))
+            digests.append(hashlib.sha256(audio["bytes"]).hexdigest())
+    return paths, hashes, digests
+
+
+def _clusters(n: int, pairs: np.ndarray) -> List[List[int]]:
+    """Connected components (size > 1) of `pairs`, by union-find."""
+    parent = np.arange(n)
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in pairs:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    components: Dict[int, List[int]] = {}
+    for i in np.unique(pairs) if len(pairs) else []:
+        components.setdefault(find(int(i)), []).append(int(i))
+    return [sorted(c) for c in components.values() if len(c) > 1]
+
+
+def near_duplicate_pairs(hashes: List[np.ndarray], config: FingerprintConfig) -> np.ndarray:
+    """
+    (i, j) clip pairs, i < j, sharing at least `min_shared` hashes and at
+    least `min_similarity` of the smaller clip's hashes.
+    """
+    sizes = np.array([len(h) for h in hashes], dtype=np.int64)
+    rows = np.repeat(np.arange(len(hashes)), sizes)
+    cols = np.concatenate(hashes) if len(hashes) else np.zeros(0, dtype=np.uint32)
+
+    # Inverted index: drop hashes posted by too many clips.
+    unique_hashes, col_idx, postings = np.unique(cols, return_inverse=True, return_counts=True)
+    keep = (postings[col_idx] >= 2) & (postings[col_idx] <= config.max_postings)
+    incidence = sparse.csr_matrix(
+        (np.ones(keep.sum(), dtype=np.int32), (rows[keep], col_idx[keep])),
+        shape=(len(hashes), len(unique_hashes)),
+    )
+    shared = sparse.triu(incidence @ incidence.T, k=1).tocoo()
+
+    smaller = np.minimum(sizes[shared.row], sizes[shared.col])
+    similar = (shared.data >= config.min_shared) & (shared.data >= config.min_similarity * smaller)
+    return np.stack([shared.row[similar], shared.col[similar]], axis=1)
+
+
+@timed()
+def find_duplicates(
+    parquet_dir: str,
+    config: FingerprintConfig | None = None,
+    max_workers: int | None = None,
+) -> DuplicateReport:
+    """Exact and near-duplicate clusters of clip paths across all shards."""
+    config = config or FingerprintConfig()
+    shards = parquet_shards(parquet_dir)
+    tasks = [(shard, config.model_dump()) for shard in shards]
+    if max_workers == 1:
+        results = list(map(_fingerprint_shard, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_fingerprint_shard, tasks))
+
+    paths = [p for r in results for p in r[0]]
+    hashes = [h for r in results for h in r[1]]
+    digests = pd.Series([d for r in results for d in r[2]])
+    increment("fingerprint.clips", len(paths))
+
+    exact_groups = digests.groupby(digests).indices
+    exact = [sorted(paths[i] for i in idx) for idx in exact_groups.values() if len(idx) > 1]
+    near = [[paths[i] for i in cluster] for cluster in _clusters(len(paths), near_duplicate_pairs(hashes, config))]
+    return DuplicateReport(exact=sorted(exact), near=sorted(sorted(c) for c in near))
+
+
+def find_overlaps(mupe_df: pd.DataFrame, tolerance: float = 0.0) -> pd.DataFrame:
+    """
+    Segments of the same audio_id that start more than `tolerance` seconds
+    before an earlier segment of that interview has ended, with the
+    `overlap` in seconds.
+    """
+    df = mupe_df.sort_values(["audio_id", "start_time"], kind="stable")
+    previous_end = df.groupby("audio_id")["end_time"].transform(lambda s: s.cummax().shift())
+    overlap = previous_end - df["start_time"]
+    return df.loc[overlap > tolerance].assign(overlap=overlap[overlap > tolerance])
@@ -0,0 +1,305 @@
+"""
+Standardise MupeTalk groups to the DailyTalk layout.
+
+Every chunk of a group (see `dialogue_chunker`) becomes one dialogue
+directory with one WAV/TXT pair per turn, named
+``{turn}_{speaker}_d{dialog}`` as in DailyTalk, plus a single
+``metadata.json`` for the whole export. Audio is converted to a common
+target spec (sample rate, mono, PCM subtype) and loudness-normalised per
+utterance, so groups whose clips come at different sample rates can be
+exported together.
+
+Only the `file_path` column of the parquet shards is read up front; each
+worker reads the audio of its own dialogue from the shards, so memory is
+bounded by a dialogue and not by the corpus. Dialogues with a clip missing
+from the shards are skipped and counted in the report, rather than written
+with turns whose audio does not match their text.
+"""
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from math import gcd
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import soundfile as sf
+from pydantic import BaseModel, Field
+from scipy.signal import resample_poly
+
+from my_masters_degree.dialogue_chunker import DIALOGUE_KEYS, with_chunk_ids
+from my_masters_degree.instrumentation import increment, span, write_report
+from my_masters_degree.sampling_mupetalks import locate_clips, parse_paths, read_located_clips
+
+
+class DailyTalkSpec(BaseModel):
+    sample_rate: int = Field(22050, description="Target sample rate in Hz")
+    subtype: str = Field("PCM_16", description="soundfile subtype of the WAVs")
+    target_dbfs: float = Field(-23.0, description="Per-utterance RMS level")
+    peak_dbfs: float = Field(-1.0, description="Peak ceiling after gain")
+
+
+class ExportReport(BaseModel):
+    num_dialogues: int
+    num_turns: int
+    audio_seconds: float
+    wall_seconds: float
+    skipped_dialogues: int = Field(0, description="Dialogues left out for clips missing from the shards")
+    missing_clips: int = 0
+
+    @property
+    def audio_hours_per_wall_minute(self) -> float:
+        if self.wall_seconds <= 0:
+            return 0.0
+        return (self.audio_seconds / 3600) / (self.wall_seconds / 60)
+
+
+def to_mono(data: np.ndarray) -> np.ndarray:
+    """Average the channels of a (frames, channels) array."""
+    if data.ndim == 1:
+        return data
+    return data.mean(axis=1)
+
+
+def resample_audio(data: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """Polyphase resampling of a mono signal from `orig_sr` to `target_sr`."""
+    if orig_sr == target_sr or data.size == 0:
+        return data.astype(np.float32, copy=False)
+    g = gcd(orig_sr, target_sr)
+    resampled = resample_poly(data, target_sr // g, orig_sr // g)
+    return resampled.astype(np.float32, copy=False)
+
+
+def normalise_loudness(data: np.ndarray, target_dbfs: float, peak_dbfs: float = -1.0) -> np.ndarray:
+    """
+    Scale a signal to a target RMS level without pushing its peak above
+    `peak_dbfs`. Silent signals are returned unchanged.
+    """
+    if data.size == 0:
+        return data
+    rms = float(np.sqrt(np.mean(np.square(data, dtype=np.float64))))
+    peak = float(np.max(np.abs(data)))
+    if rms <= 0.0 or peak <= 0.0:
+        return data
+    gain = 10 ** (target_dbfs / 20) / rms
+    gain = min(gain, 10 ** (peak_dbfs / 20) / peak)
+    return (data * gain).astype(np.float32, copy=False)
+
+
+def decode_turn(audio_bytes_list: List[bytes], target_sr: int) -> np.ndarray:
+    """
+    Decode the clips of one turn into a single mono signal at `target_sr`.
+
+    Consecutive clips sharing a sample rate are concatenated before
+    resampling, so a turn is resampled in as few calls as possible.
+    """
+    runs: List[Tuple[int, List[np.ndarray]]] = []
+    for b in audio_bytes_list:
+        data, sr = sf.read(io.BytesIO(b), dtype="float32", always_2d=False)
+        data = to_mono(data)
+        if runs and runs[-1][0] == sr:
+            runs[-1][1].append(data)
+        else:
+            runs.append((sr, [data]))
+
+    if not runs:
+        return np.zeros(0, dtype=np.float32)
+
+    return np.concatenate([
+        resample_audio(np.concatenate(chunks), sr, target_sr) for sr, chunks in runs
+    ])
+
+
+def _export_dialogue(task: Dict[str, Any]) -> Tuple[str, Dict[str, Dict[str, Any]], float]:
+    """Worker: convert and write every turn of one dialogue."""
+    spec = DailyTalkSpec.model_validate(task["spec"])
+    dialog_id = task["dialog_id"]
+    dialog_dir = os.path.join(task["output_dir"], "data", dialog_id)
+    os.makedirs(dialog_dir, exist_ok=True)
+
+    clips = read_located_clips(task["locations"])
+    metadata: Dict[str, Dict[str, Any]] = {}
+    audio_seconds = 0.0
+    for turn_idx, turn in enumerate(task["turns"]):
+        audio = decode_turn([clips[p] for p in turn["paths"]], spec.sample_rate)
+        audio = normalise_loudness(audio, spec.target_dbfs, spec.peak_dbfs)
+
+        base_name = f"{turn_idx}_{turn['speaker']}_d{dialog_id}"
+        sf.write(
+            os.path.join(dialog_dir, f"{base_name}.wav"),
+            audio, spec.sample_rate, subtype=spec.subtype,
+        )
+        with open(os.path.join(dialog_dir, f"{base_name}.txt"), "w", encoding="utf-8") as f:
+            f.write(turn["text"])
+
+        duration = len(audio) / spec.sample_rate
+        audio_seconds += duration
+        metadata[str(turn_idx)] = {
+            "speaker": turn["speaker"],
+            "text": turn["text"],
+            "speaker_code": turn["speaker_code"],
+            "subsection": turn["subsection"],
+            "duration": round(duration, 3),
+        }
+
+    return dialog_id, metadata, audio_seconds
+
+
+def build_dialogue_tasks(
+    mupetalk_df: pd.DataFrame,
+    locations: Dict[str, Tuple[str, int, int]],
+    speaker_ids: Dict[str, int],
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Turn a MupeTalk frame into one task per (interview_id, group_id,
+    chunk_id); a table without `chunk_id` has one chunk per group.
+
+    Dialogue ids are assigned in (interview_id, group_id, chunk_id) order
+    so that repeated exports of the same table produce the same layout. A
+    chunk with any clip missing from `locations` gets no task.
+
+    Returns
+    -------
+    tuple[list[dict], dict[str, dict], list[dict]]
+        - Worker tasks, without the output directory and spec.
+        - Source (interview_id, group_id, chunk_id) of each dialogue id.
+        - Skipped chunks, with their source and missing clip paths.
+    """
+    ordered = with_chunk_ids(mupetalk_df).sort_values([*DIALOGUE_KEYS, "start_time"], kind="stable")
+
+    tasks = []
+    sources = {}
+    skipped = []
+    for (interview_id, group_id, chunk_id), group_df in ordered.groupby(DIALOGUE_KEYS, sort=False):
+        source = {"interview_id": interview_id, "group_id": int(group_id), "chunk_id": int(chunk_id)}
+        turns = []
+        for row in group_df.itertuples(index=False):
+            turns.append({
+                "speaker": speaker_ids[row.speaker_code],
+                "speaker_code": row.speaker_code,
+                "text": row.original_text,
+                "subsection": getattr(row, "subsection", None),
+                "paths": parse_paths(row.file_path),
+            })
+        paths = [p for turn in turns for p in turn["paths"]]
+        missing = [p for p in paths if p not in locations]
+        if missing:
+            skipped.append({**source, "missing": missing})
+            continue
+        dialog_id = str(len(tasks))
+        tasks.append({"dialog_id": dialog_id, "turns": turns, "locations": {p: locations[p] for p in paths}})
+        sources[dialog_id] = source
+
+    return tasks, sources, skipped
+
+
+def export_dailytalk(
+    mupetalk_df: pd.DataFrame,
+    parquet_dir: str,
+    output_dir: str,
+    spec: DailyTalkSpec | None = None,
+    max_workers: int | None = None,
+) -> ExportReport:
+    """
+    Export every chunk of a MupeTalk group as a DailyTalk-style dialogue.
+
+    Decoding, resampling and loudness normalisation run per dialogue in a
+    process pool. Writes ``data/{dialog}/{turn}_{speaker}_d{dialog}.wav|.txt``,
+    ``metadata.json`` (DailyTalk turn metadata plus the MupeTalk source of
+    each dialogue) and ``speakers.json`` (speaker_code -> speaker id).
+
+    Parameters
+    ----------
+    mupetalk_df : pd.DataFrame
+        MupeTalk table with `interview_id`, `group_id`, `file_path`,
+        `speaker_code`, `start_time` and `original_text` columns, and
+        optionally `chunk_id`.
+    parquet_dir : str
+        CORAA-MUPE directory with the `data/*train*.parquet` shards.
+    output_dir : str
+        Root directory of the export.
+    spec : DailyTalkSpec | None
+        Target audio spec. Defaults to 22.05 kHz mono PCM_16.
+    max_workers : int | None
+        Size of the process pool. ``1`` runs in the calling process.
+
+    Returns
+    -------
+    ExportReport
+        Counts, exported audio duration, skipped dialogues and wall time
+        of the run.
+    """
+    spec = spec or DailyTalkSpec()
+    start = time.perf_counter()
+
+    speaker_ids = {code: i for i, code in enumerate(sorted(mupetalk_df["speaker_code"].unique()))}
+    unique_files = {p for fp in mupetalk_df["file_path"] for p in parse_paths(fp)}
+    with span("locate_clips"):
+        locations = locate_clips(unique_files, parquet_dir)
+    tasks, sources, skipped = build_dialogue_tasks(mupetalk_df, locations, speaker_ids)
+    missing_clips = sum(len(s["missing"]) for s in skipped)
+    increment("export.dialogues_skipped", len(skipped))
+    increment("export.missing_clips", missing_clips)
+    for task in tasks:
+        task["output_dir"] = output_dir
+        task["spec"] = spec.model_dump()
+
+    os.makedirs(output_dir, exist_ok=True)
+    with span("export_dialogues"):
+        if max_workers == 1:
+            results = list(map(_export_dialogue, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(_export_dialogue, tasks))
+
+    metadata = {}
+    audio_seconds = 0.0
+    num_turns = 0
+    for dialog_id, turns_meta, seconds in results:
+        metadata[dialog_id] = {**turns_meta, "source": sources[dialog_id]}
+        audio_seconds += seconds
+        num_turns += len(turns_meta)
+    increment("export.dialogues", len(results))
+    increment("export.audio_seconds", audio_seconds)
+
+    with open(os.path.join(output_dir, "metadata.json"), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    with open(os.path.join(output_dir, "speakers.json"), "w", encoding="utf-8") as f:
+        json.dump(speaker_ids, f, indent=2, ensure_ascii=False)
+
+    return ExportReport(
+        num_dialogues=len(results),
+        num_turns=num_turns,
+        audio_seconds=audio_seconds,
+        wall_seconds=time.perf_counter() - start,
+        skipped_dialogues=len(skipped),
+        missing_clips=missing_clips,
+    )
+
+
+def main() -> None:
+    csv_path = 'notebooks/mupetalk_train_v2.csv'
+    parquet_dir = 'notebooks/datasets/CORAA-MUPE'
+    output_dir = 'notebooks/datasets/MupeTalk-DailyTalk'
+
+    mupetalk_df = pd.read_csv(csv_path)
+
+    report = export_dailytalk(mupetalk_df, parquet_dir, output_dir)
+    if report.skipped_dialogues:
+        print(f"Warning: skipped {report.skipped_dialogues} dialogues with "
+              f"{report.missing_clips} clips not found in parquets")
+    print(
+        f"Exported {report.num_dialogues} dialogues / {report.num_turns} turns "
+        f"({report.audio_seconds / 3600:.2f} h) in {report.wall_seconds / 60:.2f} min "
+        f"-> {report.audio_hours_per_wall_minute:.2f} audio-hours per wall-minute"
+    )
+
+    report_path = write_report(run_name="dailytalk_export")
+    if report_path is not None:
+        print(f"Profile report saved to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Split long MupeTalk groups into chunks bounded by duration and turn count.
+
+Chunking is greedy within a group, but runs for every group at once: each
+round, every unfinished group closes its next chunk at the furthest row
+that fits both limits, moved back to the last speaker change when there is
+one. The number of rounds is the largest number of chunks in a group, and
+each round is a handful of numpy operations over the whole corpus.
+
+Downstream, a dialogue is one chunk: consumers key on `DIALOGUE_KEYS`
+and read tables written before chunking through `with_chunk_ids`.
+"""
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from my_masters_degree.instrumentation import increment, timed
+
+MAX_CHUNK_SECONDS = 60.0
+MAX_CHUNK_TURNS = 16
+DIALOGUE_KEYS = ["interview_id", "group_id", "chunk_id"]
+
+
+def with_chunk_ids(df: pd.DataFrame) -> pd.DataFrame:
+    """`df`, or a copy with every row in chunk 1 if it has no `chunk_id` column."""
+    return df if "chunk_id" in df.columns else df.assign(chunk_id=1)
+
+
+def chunk_bounds(
+    group_starts: np.ndarray,
+    group_ends: np.ndarray,
+    durations: np.ndarray,
+    speaker_change: np.ndarray,
+    max_duration: float = MAX_CHUNK_SECONDS,
+    max_turns: int = MAX_CHUNK_TURNS,
+) -> np.ndarray:
+    """
+    Row positions where a chunk starts.
+
+    Parameters
+    ----------
+    group_starts, group_ends : np.ndarray
+        [start, end) row range of each group.
+    durations : np.ndarray
+        Duration of each row.
+    speaker_change : np.ndarray
+        True where a row's speaker differs from the previous row's.
+    max_duration : float
+        Longest chunk in seconds. A single longer turn is its own chunk.
+    max_turns : int
+        Most turns in a chunk.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean mask over rows, True at the first row of each chunk.
+    """
+    n = len(durations)
+    cum = np.concatenate([[0.0], np.cumsum(durations, dtype=np.float64)])
+    positions = np.arange(n)
+    # Last row at or before each position that starts a new speaker.
+    last_change = np.maximum.accumulate(np.where(speaker_change, positions, 0)) if n else positions
+
+    starts = np.zeros(n, dtype=bool)
+    pos = group_starts.astype(np.int64).copy()
+    ends = group_ends.astype(np.int64)
+    active = pos < ends
+    while active.any():
+        p, e = pos[active], ends[active]
+        starts[p] = True
+
+        by_duration = np.searchsorted(cum, cum[p] + max_duration, side="right") - 1
+        stop = np.minimum(np.minimum(by_duration, p + max_turns), e)
+        stop = np.maximum(stop, p + 1)
+
+        # Within a group, end the chunk before the last speaker change.
+        split = stop < e
+        change = last_change[np.minimum(stop, n - 1)]
+        prefer = split & (change > p)
+        stop = np.where(prefer, change, stop)
+
+        pos[active] = stop
+        active = pos < ends
+    return starts
+
+
+@timed()
+def chunk_groups(
+    df: pd.DataFrame,
+    max_duration: float = MAX_CHUNK_SECONDS,
+    max_turns: int = MAX_CHUNK_TURNS,
+    group_keys: Sequence[str] = ("interview_id", "group_id"),
+) -> pd.DataFrame:
+    """
+    Add a `chunk_id` column (numbered from 1 within each group) to a
+    MupeTalk table, splitting each group into windows of at most
+    `max_duration` seconds and `max_turns` turns.
+
+    Returns a copy sorted by `group_keys` and start_time.
+    """
+    df = df.sort_values([*group_keys, "start_time"], kind="stable").copy()
+    keys = df[list(group_keys)]
+    new_group = (keys != keys.shift()).any(axis=1).to_numpy()
+    speaker = df["speaker_code"].to_numpy()
+    speaker_change = new_group.copy()
+    speaker_change[1:] |= speaker[1:] != speaker[:-1]
+
+    group_starts = np.flatnonzero(new_group)
+    group_ends = np.append(group_starts[1:], len(df))
+    starts = chunk_bounds(
+        group_starts, group_ends, df["duration"].to_numpy(dtype=np.float64), speaker_change,
+        max_duration=max_duration, max_turns=max_turns,
+    )
+
+    chunk_number = np.cumsum(starts)
+    group_first_chunk = np.repeat(chunk_number[group_starts], group_ends - group_starts)
+    df["chunk_id"] = chunk_number - group_first_chunk + 1
+
+    increment("chunker.groups", len(group_starts))
+    increment("chunker.chunks", int(starts.sum()))
+    return df
@@ -0,0 +1,154 @@
+"""
+In-memory index over a MupeTalk table for speaker -> interview -> group
+lookups.
+
+The table is sorted once by (interview_id, group_id, start_time) and the
+index only keeps row offsets into that sorted frame, so queries never scan
+or re-read the CSV and group records are materialised only when asked for.
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, Hashable, List
+
+import numpy as np
+import pandas as pd
+
+INDEX_FILE_NAME = "index.json"
+TURNS_FILE_NAME = "turns.parquet"
+
+
+class DialogueIndex:
+    """
+    Precomputed groupby offsets of a MupeTalk table.
+
+    Rows of each (interview_id, group_id) group are contiguous in the sorted
+    frame; `_group_bounds[i]` holds the [start, stop) row offsets of the
+    i-th group and `_interview_groups` the [first, last) group positions of
+    each interview. Rows without a `group_id` are kept out of the index.
+    """
+
+    def __init__(self, frame: pd.DataFrame, speaker_interviews: Dict[str, List[Hashable]]):
+        self._frame = frame.reset_index(drop=True)
+        self._speaker_interviews = speaker_interviews
+
+        interview_ids = self._frame["interview_id"].to_numpy()
+        group_ids = self._frame["group_id"].to_numpy()
+        n_rows = len(self._frame)
+
+        if n_rows:
+            changed = (interview_ids[1:] != interview_ids[:-1]) | (group_ids[1:] != group_ids[:-1])
+            starts = np.concatenate([[0], np.flatnonzero(changed) + 1])
+        else:
+            starts = np.zeros(0, dtype=np.int64)
+        stops = np.append(starts[1:], n_rows)
+        self._group_bounds = np.stack([starts, stops], axis=1).astype(np.int64)
+        self._group_ids = [int(g) for g in group_ids[starts]]
+
+        self._interview_groups: Dict[Hashable, tuple[int, int]] = {}
+        for pos, interview_id in enumerate(interview_ids[starts]):
+            first, _ = self._interview_groups.get(interview_id, (pos, pos))
+            self._interview_groups[interview_id] = (first, pos + 1)
+
+        self._group_positions: Dict[tuple[Hashable, int], int] = {
+            (interview_ids[start], group_id): pos
+            for pos, (start, group_id) in enumerate(zip(starts, self._group_ids))
+        }
+
+    @classmethod
+    def from_frame(cls, mupetalk_df: pd.DataFrame) -> "DialogueIndex":
+        """Build the index from a MupeTalk DataFrame."""
+        # Interviews are listed in order of first appearance in the table,
+        # as `Series.unique` would return them.
+        first_seen = mupetalk_df.drop_duplicates(["speaker_code", "interview_id"])
+        speaker_interviews = {
+            speaker: list(interviews)
+            for speaker, interviews in first_seen.groupby("speaker_code", sort=False)["interview_id"]
+        }
+
+        frame = (
+            mupetalk_df.dropna(subset=["group_id"])
+            .sort_values(["interview_id", "group_id", "start_time"], kind="stable")
+        )
+        return cls(frame, speaker_interviews)
+
+    @classmethod
+    def from_csv(cls, csv_path: str | Path) -> "DialogueIndex":
+        """Parse a MupeTalk CSV once and build the index from it."""
+        return cls.from_frame(pd.read_csv(csv_path))
+
+    def save(self, index_dir: str | Path) -> None:
+        """Write the sorted table and the speaker map to `index_dir`."""
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        self._frame.to_parquet(index_dir / TURNS_FILE_NAME, index=False)
+        with open(index_dir / INDEX_FILE_NAME, "w", encoding="utf-8") as f:
+            json.dump(
+                {"speaker_interviews": self._speaker_interviews},
+                f, ensure_ascii=False, default=_to_builtin,
+            )
+
+    @classmethod
+    def load(cls, index_dir: str | Path) -> "DialogueIndex":
+        """Load an index previously written with `save`."""
+        index_dir = Path(index_dir)
+        frame = pd.read_parquet(index_dir / TURNS_FILE_NAME)
+        with open(index_dir / INDEX_FILE_NAME, encoding="utf-8") as f:
+            speaker_interviews = json.load(f)["speaker_interviews"]
+        return cls(frame, speaker_interviews)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The sorted MupeTalk rows backing the index."""
+        return self._frame
+
+    def speakers(self) -> List[str]:
+        return list(self._speaker_interviews)
+
+    def interviews(self, speaker_code: str) -> List[Hashable]:
+        """Interviews a speaker takes part in, in order of first appearance."""
+        return self._speaker_interviews.get(speaker_code, [])
+
+    def groups(self, interview_id: Hashable) -> List[int]:
+        """Sorted group ids of an interview."""
+        first, last = self._interview_groups.get(interview_id, (0, 0))
+        return self._group_ids[first:last]
+
+    def group_frame(self, interview_id: Hashable, group_id: int) -> pd.DataFrame:
+        """Rows of one group, sorted by start_time, as a frame view."""
+        start, stop = self._group_bounds[self._group_positions[(interview_id, group_id)]]
+        return self._frame.iloc[start:stop]
+
+    def group_records(self, interview_id: Hashable, group_id: int) -> List[Dict[str, Any]]:
+        """Materialise the turns of one group as a list of records."""
+        return self.group_frame(interview_id, group_id).to_dict(orient="records")
+
+    def dialogue(self, interview_id: Hashable) -> Dict[str, Any]:
+        """All groups of an interview in the `get_speaker_dialogues` layout."""
+        return {
+            'interview_id': interview_id,
+            'groups': [
+                {'group_id': group_id, 'turns': self.group_records(interview_id, group_id)}
+                for group_id in self.groups(interview_id)
+            ],
+        }
+
+    def speaker_dialogues(self, speaker_code: str, num_dialogues: int = 5) -> List[Dict[str, Any]]:
+        """
+        First `num_dialogues` interviews of a speaker with their groups.
+
+        Raises
+        ------
+        ValueError
+            If the speaker takes part in fewer than `num_dialogues` interviews.
+        """
+        speaker_interviews = self.interviews(speaker_code)
+        if len(speaker_interviews) < num_dialogues:
+            raise ValueError(f"Speaker {speaker_code} participates in only {len(speaker_interviews)} interviews, but {num_dialogues} were requested.")
+        return [self.dialogue(interview_id) for interview_id in speaker_interviews[:num_dialogues]]
+
+
+def _to_builtin(value: Any) -> Any:
+    """JSON fallback for numpy scalars used as interview ids."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
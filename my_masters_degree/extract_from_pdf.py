@@ -1,114 +1,195 @@
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterable, Iterator, Literal
 
 import pdfplumber
 import pandas as pd
-from typing import Literal
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
-def parse_interview_pdf(pdf_path: Path):
-    """
-    Parses a Museu da Pessoa style PDF to extract Questions (P) and Answers (R).
-    Returns a Pandas DataFrame.
-    """
-    
-    # 1. Extract raw text from all pages
-    full_text_lines: list[str] = []
+# Header/footer noise, as one alternation:
+# dates like "1/29/26, 8:18 PM Museu da Pessoa", footer URLs, page numbers
+# (e.g. 1/21) and the authorship metadata line.
+NOISE_RE = re.compile(
+    r"^\d{1,2}/\d{1,2}/\d{2,4}.*Museu da Pessoa"  # Header date
+    r"|^https?://"                                 # Footer URL
+    r"|^\d+/\d+$"                                  # Page numbers (e.g., 1/21)
+    r"|^autoria: Museu da Pessoa"                  # Metadata
+)
+MUPE_CODE_RE = re.compile(r"(?:pc_ma_)?hv(\d{3})", re.IGNORECASE)
+
+TRANSCRIPT_SCHEMA = pa.schema([
+    ("mupe_code", pa.string()),
+    ("identifier", pa.string()),
+    ("position", pa.int32()),
+    ("text", pa.string()),
+    ("source_file", pa.string()),
+])
+
+
+def iter_pdf_lines(pdf_path: Path) -> Iterator[str]:
+    """Yield the text lines of a PDF one page at a time."""
     with pdfplumber.open(pdf_path) as pdf:
         for page in pdf.pages:
             text = page.extract_text()
+            page.close()
             if text:
-                lines = text.split('\n')
-                full_text_lines.extend(lines)
+                yield from text.split('\n')
+
 
-    # 2. Logic to parse lines into Questions and Answers
-    data = []
-    
+def parse_interview_lines(lines: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """
+    Parse transcript lines into (identifier, text) blocks of Questions (P)
+    and Answers (R), e.g. ("p1", ...), ("r1", ...).
+
+    The interview title is detected per document as the first non-noise
+    line before the first block, and its repetitions are skipped.
+    """
     # Counters for identifiers (p1, r1, p2, r2...)
     p_counter = 0
     r_counter = 0
-    
+
     current_type: Literal['p', 'r'] | None = None # 'p' or 'r'
     current_buffer = [] # Holds the lines of text for the current block
-    
-    # Patterns to identify headers/footers to ignore
-    # Matches dates like "1/29/26, 8:18 PM" or URLs or "Page X/Y"
-    ignore_patterns = [
-        r"^\d{1,2}/\d{1,2}/\d{2,4}.*Museu da Pessoa", # Header date
-        r"^https?://",                                 # Footer URL
-        r"^\d+/\d+$",                                  # Page numbers (e.g., 1/21)
-        r"^Adilson Show$",                             # Title repetition
-        r"^autoria: Museu da Pessoa",                  # Metadata
-    ]
+    title: str | None = None
 
-    for line in full_text_lines:
+    for line in lines:
         line = line.strip()
         if not line:
             continue
-            
+
         # Skip header/footer noise
-        if any(re.search(pat, line) for pat in ignore_patterns):
+        if line == title or NOISE_RE.match(line):
             continue
 
-        # Check if line starts with Question (P -)
-        if line.startswith("P -"):
-            # Save previous block if exists
-            if current_type:
-                joined_text = " ".join(current_buffer).strip()
-                # Create identifier based on type (p or r) and its counter
-                ident = f"{current_type}{p_counter if current_type == 'p' else r_counter}"
-                data.append({"Identifier": ident, "Text": joined_text})
-
-            # Start new Question block
-            p_counter += 1
-            current_type = 'p'
-            current_buffer = [line[3:].strip()] # Remove "P - "
+        is_question = line.startswith("P -")
+        is_answer = line.startswith("R -")
 
-        # Check if line starts with Answer (R -)
-        elif line.startswith("R -"):
+        if is_question or is_answer:
             # Save previous block if exists
             if current_type:
-                joined_text = " ".join(current_buffer).strip()
+                # Create identifier based on type (p or r) and its counter
                 ident = f"{current_type}{p_counter if current_type == 'p' else r_counter}"
-                data.append({"Identifier": ident, "Text": joined_text})
+                yield ident, " ".join(current_buffer).strip()
 
-            # Start new Answer block
-            r_counter += 1
-            current_type = 'r'
-            current_buffer = [line[3:].strip()] # Remove "R - "
+            # Start new block
+            if is_question:
+                p_counter += 1
+                current_type = 'p'
+            else:
+                r_counter += 1
+                current_type = 'r'
+            current_buffer = [line[3:].strip()] # Remove "P - " / "R - "
 
-        else:
+        elif current_type:
             # It's a continuation of the previous block
-            if current_type:
-                current_buffer.append(line)
+            current_buffer.append(line)
+
+        elif title is None:
+            title = line
 
-    # 3. Save the very last block
+    # Save the very last block
     if current_type and current_buffer:
-        joined_text = " ".join(current_buffer).strip()
         ident = f"{current_type}{p_counter if current_type == 'p' else r_counter}"
-        data.append({"Identifier": ident, "Text": joined_text})
+        yield ident, " ".join(current_buffer).strip()
 
-    # 4. Create DataFrame
-    df = pd.DataFrame(data)
-    return df
+
+def parse_interview_pdf(pdf_path: Path):
+    """
+    Parses a Museu da Pessoa style PDF to extract Questions (P) and Answers (R).
+    Returns a Pandas DataFrame.
+    """
+    data = [
+        {"Identifier": ident, "Text": text}
+        for ident, text in parse_interview_lines(iter_pdf_lines(pdf_path))
+    ]
+    return pd.DataFrame(data)
+
+
+def get_mupe_code(pdf_path: Path) -> str:
+    """
+    MUPE code of a transcript, taken from a ``hvNNN``/``pc_ma_hvNNN`` token
+    in its file name and formatted as in the metadata (``PC_MA_HV064``).
+    Falls back to the file stem.
+    """
+    match = MUPE_CODE_RE.search(pdf_path.stem)
+    if match is None:
+        return pdf_path.stem
+    return f"PC_MA_HV{match.group(1)}"
+
+
+def _parse_pdf_records(pdf_path: Path) -> pa.Table:
+    """Worker: parse one PDF into a table of TRANSCRIPT_SCHEMA."""
+    identifiers, texts = [], []
+    for ident, text in parse_interview_lines(iter_pdf_lines(pdf_path)):
+        identifiers.append(ident)
+        texts.append(text)
+    n = len(identifiers)
+    return pa.Table.from_pydict({
+        "mupe_code": [get_mupe_code(pdf_path)] * n,
+        "identifier": identifiers,
+        "position": list(range(n)),
+        "text": texts,
+        "source_file": [pdf_path.name] * n,
+    }, schema=TRANSCRIPT_SCHEMA)
+
+
+def extract_interview_pdfs(
+    pdf_dir: Path,
+    output_path: Path,
+    max_workers: int | None = None,
+) -> list[tuple[Path, str]]:
+    """
+    Parse every PDF in `pdf_dir` in a process pool and write one Parquet
+    table keyed by (mupe_code, identifier), sorted by mupe_code and block
+    position.
+
+    Returns
+    -------
+    list[tuple[Path, str]]
+        PDFs that failed to parse, with the error message.
+
+    Raises
+    ------
+    ValueError
+        If two PDFs resolve to the same mupe_code.
+    """
+    pdf_paths = sorted(pdf_dir.glob("*.pdf"))
+    tables: list[pa.Table] = []
+    failures: list[tuple[Path, str]] = []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_parse_pdf_records, p) for p in pdf_paths]
+        for pdf_path, future in zip(pdf_paths, futures):
+            try:
+                tables.append(future.result())
+            except Exception as e:
+                failures.append((pdf_path, str(e)))
+
+    transcripts = pa.concat_tables(tables) if tables else TRANSCRIPT_SCHEMA.empty_table()
+    codes_per_file = transcripts.group_by("mupe_code").aggregate([("source_file", "count_distinct")])
+    duplicated = pc.filter(codes_per_file, pc.greater(codes_per_file["source_file_count_distinct"], 1))
+    if duplicated.num_rows:
+        raise ValueError(f"Several PDFs share a mupe_code: {duplicated['mupe_code'].to_pylist()}")
+
+    transcripts = transcripts.sort_by([("mupe_code", "ascending"), ("position", "ascending")])
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(transcripts, output_path)
+    return failures
 
 
 if __name__ == "__main__":
     # --- Usage Example ---
-    # Assuming you have a list of files or a single file
-    pdf_filename = Path("/home/antonio-moreira/Documents/my-masters-degree/notebooks/mupe-adilson.pdf")  # Replace with your actual file path
-    assert pdf_filename.exists(), f"File {pdf_filename} does not exist."
-
-    try:
-        df_result = parse_interview_pdf(pdf_filename)
-        
-        # Display the first few rows
-        print(df_result.head())
-        
-        # Export to CSV if needed
-        output_folder = Path("/home/antonio-moreira/Documents/my-masters-degree/notebooks/datasets/mupe-from-pdf")
-        assert output_folder.exists(), f"Output folder {output_folder} does not exist."
-        output_file = output_folder / "interview_output.csv"
-        df_result.to_csv(output_file, index=False)
-        
-    except Exception as e:
-        print(f"Error processing file: {e}")
\ No newline at end of file
+    pdf_dir = Path("/home/antonio-moreira/Documents/my-masters-degree/notebooks/datasets/mupe-pdfs")
+    assert pdf_dir.exists(), f"Folder {pdf_dir} does not exist."
+
+    output_folder = Path("/home/antonio-moreira/Documents/my-masters-degree/notebooks/datasets/mupe-from-pdf")
+    assert output_folder.exists(), f"Output folder {output_folder} does not exist."
+    output_file = output_folder / "interview_transcripts.parquet"
+
+    failed = extract_interview_pdfs(pdf_dir, output_file)
+    print(f"Transcripts saved to {output_file}")
+    for pdf_path, error in failed:
+        print(f"Error processing file {pdf_path}: {error}")
@@ -0,0 +1,378 @@
+"""
+Mel spectrogram, F0 and energy features of the CORAA-MUPE clips for TTS.
+
+Features are computed on CPU with torch, a batch of clips at a time (one
+padded STFT per batch), in a process pool with one task per parquet row
+group. They are kept in a `FeatureStore`: one directory per feature config
+hash holding a raw float32 data file, read through a memory map, and a
+parquet index with the row offset and frame count of each `file_path`.
+Every clip is a contiguous (frames, n_mels [+ f0] [+ energy]) block.
+
+Extraction is incremental: clips already in the store for the current
+config are skipped, and a config change writes to a new directory.
+
+    store = extract_features(parquet_dir, "features", FeatureConfig(pitch=True))
+    feats = store.get("train/pc_ma_hv229/pc_ma_hv229_5_43.86_46.30.wav")
+    feats["mel"].shape  # (frames, 80)
+"""
+import argparse
+import hashlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import soundfile as sf
+import torch
+from pydantic import BaseModel, Field
+
+from my_masters_degree.dailytalk_export import resample_audio, to_mono
+from my_masters_degree.instrumentation import increment, span, write_report
+from my_masters_degree.sampling_mupetalks import parquet_shards, parse_paths
+from my_masters_degree.utils import atomic_write_bytes
+
+INDEX_FILE_NAME = "index.parquet"
+DATA_FILE_NAME = "features.f32"
+CONFIG_FILE_NAME = "config.json"
+
+
+class FeatureConfig(BaseModel):
+    sample_rate: int = Field(22050, description="Rate clips are resampled to, in Hz")
+    n_fft: int = 1024
+    hop_length: int = 256
+    win_length: int = 1024
+    n_mels: int = 80
+    f_min: float = 0.0
+    f_max: float = 8000.0
+    pitch: bool = Field(False, description="Add an F0 column (Hz, 0 when unvoiced)")
+    energy: bool = Field(False, description="Add a frame energy column (L2 norm of the magnitude spectrum)")
+    f0_min: float = 60.0
+    f0_max: float = 500.0
+    voicing_threshold: float = Field(0.3, description="Normalised autocorrelation needed to call a frame voiced")
+
+    @property
+    def width(self) -> int:
+        return self.n_mels + int(self.pitch) + int(self.energy)
+
+    def config_hash(self) -> str:
+        return hashlib.sha256(self.model_dump_json().encode("utf-8")).hexdigest()[:16]
+
+
+class FeatureReport(BaseModel):
+    computed: int
+    cached: int
+    missing: int
+    audio_seconds: float
+    wall_seconds: float
+
+
+def mel_filterbank(config: FeatureConfig) -> torch.Tensor:
+    """(n_mels, n_fft // 2 + 1) triangular filters on the HTK mel scale, area-normalised."""
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + np.asarray(hz) / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (np.asarray(mel) / 2595.0) - 1.0)
+
+    fft_freqs = np.linspace(0, config.sample_rate / 2, config.n_fft // 2 + 1)
+    edges = mel_to_hz(np.linspace(hz_to_mel(config.f_min), hz_to_mel(config.f_max), config.n_mels + 2))
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (fft_freqs - lower) / (center - lower)
+    falling = (upper - fft_freqs) / (upper - center)
+    filters = np.maximum(0.0, np.minimum(rising, falling))
+    filters *= (2.0 / (upper - lower))
+    return torch.from_numpy(filters.astype(np.float32))
+
+
+def _frame_pitch(frames: torch.Tensor, config: FeatureConfig) -> torch.Tensor:
+    """F0 of (batch, n_frames, win) frames by normalised autocorrelation; 0 where unvoiced."""
+    frames = frames - frames.mean(dim=-1, keepdim=True)
+    n = frames.shape[-1]
+    spectrum = torch.fft.rfft(frames, n=2 * n)
+    autocorr = torch.fft.irfft(spectrum.abs() ** 2, n=2 * n)[..., :n]
+    energy = autocorr[..., :1].clamp_min(1e-10)
+
+    min_lag = max(1, int(config.sample_rate / config.f0_max))
+    max_lag = min(n - 1, int(config.sample_rate / config.f0_min))
+    peak, lag = (autocorr[..., min_lag:max_lag + 1] / energy).max(dim=-1)
+    f0 = config.sample_rate / (lag + min_lag).to(torch.float32)
+    return torch.where(peak >= config.voicing_threshold, f0, torch.zeros_like(f0))
+
+
+def compute_features(audios: List[np.ndarray], config: FeatureConfig) -> List[np.ndarray]:
+    """
+    Features of a batch of mono clips at `config.sample_rate`, one
+    (frames, config.width) float32 array per clip, in input order.
+
+    Each clip is reflect-padded by n_fft // 2 on its own, as a centred STFT
+    would, and the padded clips are then zero-padded into one tensor. The
+    STFT, the mel projection and the pitch tracker run once per batch, and
+    a clip gets the same features in any batch.
+    """
+    if not audios:
+        return []
+    lengths = torch.tensor([len(a) for a in audios])
+    pad = config.n_fft // 2
+    batch = torch.zeros(len(audios), int(lengths.max()) + 2 * pad)
+    for row, audio in enumerate(audios):
+        padded = np.pad(np.asarray(audio, dtype=np.float32), pad, mode="reflect" if len(audio) > 1 else "constant")
+        batch[row, :len(padded)] = torch.from_numpy(padded)
+
+    window = torch.hann_window(config.win_length)
+    stft = torch.stft(
+        batch, n_fft=config.n_fft, hop_length=config.hop_length, win_length=config.win_length,
+        window=window, center=False, return_complex=True,
+    )
+    magnitude = stft.abs()  # (batch, freq, frames)
+    mel = torch.log(torch.clamp(mel_filterbank(config) @ magnitude, min=1e-5)).transpose(1, 2)
+    columns = [mel]
+
+    if config.pitch:
+        # The same frames as the STFT, with the window centred in n_fft.
+        offset = (config.n_fft - config.win_length) // 2
+        frames = batch.unfold(-1, config.n_fft, config.hop_length)[..., offset:offset + config.win_length]
+        columns.append(_frame_pitch(frames, config).unsqueeze(-1))
+    if config.energy:
+        columns.append(torch.linalg.vector_norm(magnitude, dim=1).unsqueeze(-1))
+
+    features = torch.cat(columns, dim=-1).numpy()
+    n_frames = (lengths // config.hop_length + 1).tolist()
+    return [np.ascontiguousarray(features[row, :frames]) for row, frames in enumerate(n_frames)]
+
+
+class FeatureStore:
+    """
+    Append-only features of one config, under `store_dir/<config hash>/`.
+
+    The data file only grows; the index is rewritten atomically after each
+    append, so it never points past data on disk. Bytes written after the
+    last index update (an interrupted append) are dropped when the store is
+    opened again.
+    """
+
+    def __init__(self, store_dir: str | Path, config: FeatureConfig):
+        self.config = config
+        self.root = Path(store_dir) / config.config_hash()
+        self.root.mkdir(parents=True, exist_ok=True)
+        config_path = self.root / CONFIG_FILE_NAME
+        if not config_path.exists():
+            atomic_write_bytes(str(config_path), config.model_dump_json(indent=2).encode("utf-8"))
+
+        index_path = self.root / INDEX_FILE_NAME
+        if index_path.exists():
+            index = pd.read_parquet(index_path)
+        else:
+            index = pd.DataFrame({"file_path": pd.Series(dtype=str), "offset": pd.Series(dtype=np.int64),
+                                  "n_frames": pd.Series(dtype=np.int64)})
+        self._offsets: Dict[str, Tuple[int, int]] = {
+            path: (int(offset), int(n)) for path, offset, n in index.itertuples(index=False)
+        }
+        self._rows = int((index["offset"] + index["n_frames"]).max()) if len(index) else 0
+
+        data_path = self.root / DATA_FILE_NAME
+        with open(data_path, "ab") as f:
+            f.truncate(self._rows * config.width * 4)
+        self._data: np.memmap | None = None
+
+    def __contains__(self, file_path: str) -> bool:
+        return file_path in self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @property
+    def paths(self) -> List[str]:
+        return list(self._offsets)
+
+    def _memmap(self) -> np.ndarray:
+        if self._data is None or len(self._data) != self._rows:
+            if self._rows == 0:
+                return np.zeros((0, self.config.width), dtype=np.float32)
+            self._data = np.memmap(self.root / DATA_FILE_NAME, dtype=np.float32, mode="r",
+                                   shape=(self._rows, self.config.width))
+        return self._data
+
+    def get(self, file_path: str) -> Dict[str, np.ndarray]:
+        """`mel` (frames, n_mels), and `f0`/`energy` (frames,) when configured, as memory-mapped views."""
+        offset, n = self._offsets[file_path]
+        block = self._memmap()[offset:offset + n]
+        features = {"mel": block[:, :self.config.n_mels]}
+        column = self.config.n_mels
+        for name in ("pitch", "energy"):
+            if getattr(self.config, name):
+                features["f0" if name == "pitch" else name] = block[:, column]
+                column += 1
+        return features
+
+    def add(self, items: Iterable[Tuple[str, np.ndarray]]) -> int:
+        """Append (file_path, features) pairs and commit them to the index. Returns the number added."""
+        added = 0
+        with open(self.root / DATA_FILE_NAME, "ab") as f:
+            for file_path, block in items:
+                if file_path in self._offsets:
+                    continue
+                if block.ndim != 2 or block.shape[1] != self.config.width:
+                    raise ValueError(f"Features of {file_path} have shape {block.shape}, expected (*, {self.config.width})")
+                f.write(np.ascontiguousarray(block, dtype=np.float32).tobytes())
+                self._offsets[file_path] = (self._rows, len(block))
+                self._rows += len(block)
+                added += 1
+            f.flush()
+            os.fsync(f.fileno())
+        if added:
+            self._save_index()
+        return added
+
+    def _save_index(self) -> None:
+        paths = list(self._offsets)
+        offsets = np.array([self._offsets[p] for p in paths], dtype=np.int64).reshape(-1, 2)
+        table = pa.table({"file_path": paths, "offset": offsets[:, 0], "n_frames": offsets[:, 1]})
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer)
+        atomic_write_bytes(str(self.root / INDEX_FILE_NAME), buffer.getvalue())
+
+
+def _init_feature_worker() -> None:
+    # One intra-op thread per process; the pool provides the parallelism.
+    torch.set_num_threads(1)
+
+
+def _extract_row_group(task: Tuple[str, int, List[int], Dict, int]) -> Tuple[List[Tuple[str, np.ndarray]], float]:
+    """Worker: features of the selected rows of one parquet row group."""
+    shard, rg, rows, config_dump, batch_size = task
+    config = FeatureConfig.model_validate(config_dump)
+    table = pq.ParquetFile(shard).read_row_group(rg, columns=["file_path", "audio"])
+    paths = table["file_path"].to_pylist()
+    audio_column = table["audio"]
+
+    clips = []
+    for row in rows:
+        data, sr = sf.read(io.BytesIO(audio_column[row]["bytes"].as_py()), dtype="float32", always_2d=False)
+        clips.append((paths[row], resample_audio(to_mono(data), sr, config.sample_rate)))
+
+    # Batching clips of similar length keeps the padding small.
+    clips.sort(key=lambda clip: len(clip[1]))
+    results = []
+    for start in range(0, len(clips), batch_size):
+        batch = clips[start:start + batch_size]
+        results.extend(zip([p for p, _ in batch], compute_features([a for _, a in batch], config)))
+    return results, sum(len(a) for _, a in clips) / config.sample_rate
+
+
+def extract_features(
+    parquet_dir: str,
+    store_dir: str | Path,
+    config: FeatureConfig | None = None,
+    file_paths: Iterable[str] | None = None,
+    max_workers: int | None = None,
+    batch_size: int = 16,
+) -> Tuple[FeatureStore, FeatureReport]:
+    """
+    Compute the features of every clip in the parquet shards (or only
+    `file_paths`) that the store does not hold yet for `config`.
+
+    Parameters
+    ----------
+    parquet_dir : str
+        CORAA-MUPE directory with the `data/*train*.parquet` shards.
+    store_dir : str | Path
+        Root of the feature store; features go to `store_dir/<config hash>/`.
+    config : FeatureConfig | None
+        Feature settings. Defaults to 80-bin mels at 22.05 kHz.
+    file_paths : Iterable[str] | None
+        Clips to extract. ``None`` extracts every clip.
+    max_workers : int | None
+        Size of the process pool. ``1`` runs in the calling process.
+    batch_size : int
+        Clips per STFT batch.
+
+    Returns
+    -------
+    tuple[FeatureStore, FeatureReport]
+        The store, and counts of computed, already stored and requested
+        but absent clips.
+    """
+    config = config or FeatureConfig()
+    start = time.perf_counter()
+    store = FeatureStore(store_dir, config)
+    wanted = None if file_paths is None else set(file_paths)
+
+    tasks = []
+    found = set()
+    cached = 0
+    with span("scan_shards"):
+        for shard in parquet_shards(parquet_dir):
+            parquet_file = pq.ParquetFile(shard)
+            for rg in range(parquet_file.num_row_groups):
+                paths = parquet_file.read_row_group(rg, columns=["file_path"])["file_path"].to_pylist()
+                rows = []
+                for row, path in enumerate(paths):
+                    if wanted is not None and path not in wanted:
+                        continue
+                    found.add(path)
+                    if path in store:
+                        cached += 1
+                    else:
+                        rows.append(row)
+                if rows:
+                    tasks.append((shard, rg, rows, config.model_dump(), batch_size))
+
+    computed = 0
+    audio_seconds = 0.0
+    with span("extract_features"):
+        if max_workers == 1:
+            results = map(_extract_row_group, tasks)
+            for items, seconds in results:
+                computed += store.add(items)
+                audio_seconds += seconds
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_feature_worker) as executor:
+                for items, seconds in executor.map(_extract_row_group, tasks):
+                    computed += store.add(items)
+                    audio_seconds += seconds
+
+    missing = len(wanted - found) if wanted is not None else 0
+    increment("features.computed", computed)
+    increment("features.cached", cached)
+    return store, FeatureReport(
+        computed=computed,
+        cached=cached,
+        missing=missing,
+        audio_seconds=audio_seconds,
+        wall_seconds=time.perf_counter() - start,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Extract mel/F0/energy features of the MupeTalk clips")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes; 1 extracts inline")
+    parser.add_argument("--pitch", action="store_true", help="Also store F0")
+    parser.add_argument("--energy", action="store_true", help="Also store frame energy")
+    args = parser.parse_args()
+
+    csv_path = 'notebooks/mupetalk_train_v2.csv'
+    parquet_dir = 'notebooks/datasets/CORAA-MUPE'
+    store_dir = 'notebooks/datasets/MupeTalk-features'
+
+    mupetalk_df = pd.read_csv(csv_path)
+    file_paths = sorted({p for fp in mupetalk_df["file_path"] for p in parse_paths(fp)})
+    config = FeatureConfig(pitch=args.pitch, energy=args.energy)
+    store, report = extract_features(parquet_dir, store_dir, config, file_paths, max_workers=args.workers)
+    print(
+        f"{report.computed} clips computed ({report.audio_seconds / 3600:.2f} h) and {report.cached} cached "
+        f"in {report.wall_seconds / 60:.2f} min; {report.missing} not found. Store: {store.root}"
+    )
+
+    report_path = write_report(run_name="feature_store")
+    if report_path is not None:
+        print(f"Profile report saved to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Opt-in timing spans and counters for the MupeTalk pipeline.
+
+Everything here is a no-op unless profiling is enabled, either by calling
+`enable()` or by setting ``MUPE_PROFILE=1`` in the environment. When enabled,
+nested `span`s are aggregated by their call path and `increment` accumulates
+named counters (rows, bytes, cache hits, LLM latency and tokens...).
+
+`write_report` dumps one run as JSON plus a ``.folded`` file of self times
+in the collapsed-stack format read by flamegraph.pl and speedscope.
+
+Only the calling process is recorded: work done inside process-pool workers
+shows up as the parent span that waits for it.
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, TypeVar
+
+PROFILE_ENV_VAR = "MUPE_PROFILE"
+PROFILE_DIR_ENV_VAR = "MUPE_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = "profiles"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.enabled = os.environ.get(PROFILE_ENV_VAR, "") not in ("", "0")
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = datetime.now()
+            self.start = time.perf_counter()
+            self.spans: Dict[str, Dict[str, float]] = {}
+            self.counters: Dict[str, float] = {}
+
+    def stack(self) -> list[str]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def add_span(self, path: str, elapsed: float) -> None:
+        with self._lock:
+            stats = self.spans.get(path)
+            if stats is None:
+                self.spans[path] = {"count": 1, "total_s": elapsed, "min_s": elapsed, "max_s": elapsed}
+            else:
+                stats["count"] += 1
+                stats["total_s"] += elapsed
+                stats["min_s"] = min(stats["min_s"], elapsed)
+                stats["max_s"] = max(stats["max_s"], elapsed)
+
+    def add_count(self, name: str, value: float) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+
+_recorder = _Recorder()
+
+
+def enable() -> None:
+    _recorder.enabled = True
+
+
+def disable() -> None:
+    _recorder.enabled = False
+
+
+def is_enabled() -> bool:
+    return _recorder.enabled
+
+
+def reset() -> None:
+    """Drop every recorded span and counter and restart the run clock."""
+    _recorder.reset()
+
+
+@contextlib.contextmanager
+def _span(name: str) -> Iterator[None]:
+    stack = _recorder.stack()
+    stack.append(name)
+    path = ";".join(stack)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _recorder.add_span(path, time.perf_counter() - start)
+        stack.pop()
+
+
+def span(name: str) -> contextlib.AbstractContextManager:
+    """Time the enclosed block under `name`, nested in any enclosing span."""
+    if not _recorder.enabled:
+        return contextlib.nullcontext()
+    return _span(name)
+
+
+def timed(name: str | None = None) -> Callable[[F], F]:
+    """Decorator form of `span`; defaults to the function's qualified name."""
+    def decorator(func: F) -> F:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _recorder.enabled:
+                return func(*args, **kwargs)
+            with _span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def increment(name: str, value: float = 1) -> None:
+    """Add `value` to the counter `name`."""
+    if _recorder.enabled:
+        _recorder.add_count(name, value)
+
+
+def record_llm_call(prefix: str, latency_s: float, usage_metadata: Any = None) -> None:
+    """
+    Count one LLM round trip with its latency and, when the response carries
+    `usage_metadata`, its prompt/output/total token counts.
+    """
+    if not _recorder.enabled:
+        return
+    _recorder.add_count(f"{prefix}.calls", 1)
+    _recorder.add_count(f"{prefix}.latency_s", latency_s)
+    if usage_metadata is None:
+        return
+    for attr, counter in (
+        ("prompt_token_count", "prompt_tokens"),
+        ("candidates_token_count", "output_tokens"),
+        ("total_token_count", "total_tokens"),
+    ):
+        value = getattr(usage_metadata, attr, None)
+        if value:
+            _recorder.add_count(f"{prefix}.{counter}", value)
+
+
+def report() -> Dict[str, Any]:
+    """Snapshot of the current run: span stats by call path and counters."""
+    with _recorder._lock:
+        spans = {path: dict(stats) for path, stats in _recorder.spans.items()}
+        counters = dict(_recorder.counters)
+    return {
+        "started_at": _recorder.started_at.isoformat(timespec="seconds"),
+        "wall_s": time.perf_counter() - _recorder.start,
+        "spans": dict(sorted(spans.items())),
+        "counters": dict(sorted(counters.items())),
+    }
+
+
+def folded_stacks(spans: Dict[str, Dict[str, float]]) -> list[str]:
+    """
+    Collapsed-stack lines (``a;b;c <self microseconds>``) of a span report.
+
+    Self time is a path's total minus the totals of its direct children.
+    """
+    child_totals: Dict[str, float] = {}
+    for path, stats in spans.items():
+        if ";" in path:
+            parent = path.rsplit(";", 1)[0]
+            child_totals[parent] = child_totals.get(parent, 0.0) + stats["total_s"]
+
+    lines = []
+    for path, stats in sorted(spans.items()):
+        self_us = int(max(stats["total_s"] - child_totals.get(path, 0.0), 0.0) * 1e6)
+        lines.append(f"{path} {self_us}")
+    return lines
+
+
+def write_report(output_dir: str | Path | None = None, run_name: str = "run") -> Path | None:
+    """
+    Write ``{run_name}_{timestamp}.json`` and ``.folded`` for the current run.
+
+    Returns the JSON path, or None when profiling is disabled.
+    """
+    if not _recorder.enabled:
+        return None
+    output_dir = Path(output_dir or os.environ.get(PROFILE_DIR_ENV_VAR, DEFAULT_PROFILE_DIR))
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    run_report = report()
+    stem = f"{run_name}_{_recorder.started_at:%Y%m%d_%H%M%S}"
+    json_path = output_dir / f"{stem}.json"
+    json_path.write_text(json.dumps(run_report, indent=2), encoding="utf-8")
+    (output_dir / f"{stem}.folded").write_text(
+        "\n".join(folded_stacks(run_report["spans"])) + "\n", encoding="utf-8"
+    )
+    return json_path
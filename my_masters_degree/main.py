@@ -1,23 +1,24 @@
 import re
 import os
+import argparse
 import difflib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
 from pathlib import Path
-from typing import List, Tuple, cast, Literal
+from typing import Dict, Iterable, Iterator, List, Tuple, cast, Literal
 
 import rich
 import datasets
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
 from google import genai 
 # from dotenv import load_dotenv
 from google.genai import types
 from datasets import Audio
-import matplotlib
-import matplotlib.pyplot as plt
-from matplotlib.colors import to_hex
 from pydantic import BaseModel, Field
-from matplotlib.colors import ListedColormap
 from IPython.display import Audio as ipyAudio
 
 DATASETS_PATH = Path("/home/antonio-moreira/Documents/my-masters-degree/notebooks/datasets/")
@@ -25,24 +26,21 @@ MUPE_GIT_PATH = DATASETS_PATH / "coling-mupe-asr"
 PROCESSED_METADATA_PATH = Path("/home/antonio-moreira/Documents/my-masters-degree/notebooks/mupe_metadata_sp_gender_slice_reviewed.csv")
 INTERVIEW_SEGMENTATIONS_PATH = Path("/home/antonio-moreira/Documents/my-masters-degree/notebooks/interview_segmentations")
 EXCEL_FILES_PATH = Path("/home/antonio-moreira/Documents/my-masters-degree/notebooks/excel_files/")
+MUPETALK_TRAIN_PATH = DATASETS_PATH.parent / "mupetalk_train.csv"
+PARTIALS_PATH = DATASETS_PATH.parent / "mupetalk_train_partials"
 
-assert DATASETS_PATH.exists(), f"DATASETS_PATH does not exist: {DATASETS_PATH}"
-assert MUPE_GIT_PATH.exists(), f"MUPE_GIT_PATH does not exist: {MUPE_GIT_PATH}"
-assert PROCESSED_METADATA_PATH.exists(), f"PROCESSED_METADATA_PATH does not exist: {PROCESSED_METADATA_PATH}"
-assert INTERVIEW_SEGMENTATIONS_PATH.exists(), f"INTERVIEW_SEGMENTATIONS_PATH does not exist: {INTERVIEW_SEGMENTATIONS_PATH}"
-assert EXCEL_FILES_PATH.exists(), f"EXCEL_FILES_PATH does not exist: {EXCEL_FILES_PATH}"
-
-custom_colors = [
-    "#e41a1c", "#377eb8", "#4daf4a", "#984ea3", "#ff7f00",
-    "#ffff33", "#a65628", "#f781bf", "#999999", "#66c2a5",
-    "#fc8d62", "#8da0cb", "#e78ac3", "#a6d854", "#ffd92f",
-    "#e5c494", "#b3b3b3", "#1b9e77", "#d95f02", "#7570b3",
-    "#e7298a", "#66a61e", "#e6ab02", "#a6761d", "#666666"
-]
-
-mupe_cmap = ListedColormap(custom_colors, name="MupeExcelColorMap")
-matplotlib.colormaps.register(name="MupeExcelColorMap", cmap=mupe_cmap, force=True)
+SEGMENTATION_FILE_RE = re.compile(r"interview_segmentation_(?P<audio_id>\d+)\.json")
+# Outcomes a resumed run keeps; failed interviews are processed again.
+FINISHED_STATUSES = ("ok", "skipped")
 
+from my_masters_degree.anonymisation import NameScanner, anonymise, metadata_patterns
+from my_masters_degree.dialogue_chunker import MAX_CHUNK_SECONDS, MAX_CHUNK_TURNS, chunk_groups
+from my_masters_degree.instrumentation import increment, span, write_report
+from my_masters_degree.review_export import export_review_workbooks
+from my_masters_degree.mupe_store import build_store, is_store_complete, list_audio_ids, load_interview
+from my_masters_degree.partitioning import in_partition, merge_partials, partial_stem, write_partial_manifest
+from my_masters_degree.streaming_output import InterviewCsvWriter
+from my_masters_degree.utils import bounded_map, default_in_flight
 from my_masters_degree.process_dataset import (
     aggregate_sample_dialogues,
     classify_questions,
@@ -55,13 +53,23 @@ from my_masters_degree.process_dataset import (
 )
 
 
-def get_well_behaved_samples(mupe_train: pd.DataFrame, audio_ids: List[int]):
+def get_well_behaved_samples(mupe_train: pd.DataFrame | None, audio_ids: List[int], store_dir: Path | None = None):
+    """
+    Interviews with a single interviewer. Samples are read from the
+    partitioned store when `store_dir` is given, instead of `mupe_train`.
+    """
     itvw_codes_list = []
+    stored_ids = set(list_audio_ids(store_dir)) if store_dir is not None else set()
 
     for audio_id in audio_ids:
-        sample = cast(
-            pd.DataFrame, mupe_train.loc[mupe_train["audio_id"] == int(audio_id)].copy()
-        )
+        if store_dir is not None:
+            if int(audio_id) not in stored_ids:
+                continue
+            sample = load_interview(store_dir, int(audio_id), columns=["speaker_code"])
+        else:
+            sample = cast(
+                pd.DataFrame, mupe_train.loc[mupe_train["audio_id"] == int(audio_id)].copy()
+            )
         join_code, interviewer_codes = get_interviewer_code(sample)
         itvw_codes_list.append([audio_id, join_code, interviewer_codes])
 
@@ -70,12 +78,285 @@ def get_well_behaved_samples(mupe_train: pd.DataFrame, audio_ids: List[int]):
 
     return itvw_codes_df
 
-def highlight_group(row:pd.Series, group_to_color: dict):
-    color = group_to_color.get(row["group_id"], "#FFFFFF")
-    return [f"background-color: {color}"] * len(row)
+def check_paths() -> None:
+    assert DATASETS_PATH.exists(), f"DATASETS_PATH does not exist: {DATASETS_PATH}"
+    assert MUPE_GIT_PATH.exists(), f"MUPE_GIT_PATH does not exist: {MUPE_GIT_PATH}"
+    assert PROCESSED_METADATA_PATH.exists(), f"PROCESSED_METADATA_PATH does not exist: {PROCESSED_METADATA_PATH}"
+    assert INTERVIEW_SEGMENTATIONS_PATH.exists(), f"INTERVIEW_SEGMENTATIONS_PATH does not exist: {INTERVIEW_SEGMENTATIONS_PATH}"
+    assert EXCEL_FILES_PATH.exists(), f"EXCEL_FILES_PATH does not exist: {EXCEL_FILES_PATH}"
 
-if __name__ == "__main__":
-    mupe_train_df = pd.read_csv(MUPE_GIT_PATH / "train.csv")
+
+class InterviewResult(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+
+    audio_id: int
+    status: Literal["ok", "skipped", "failed"]
+    reason: str = ""
+    sample: pd.DataFrame | None = None
+
+
+def process_interview(mupe_sample_df: pd.DataFrame, audio_id: int, segmentation_path: Path) -> pd.DataFrame:
+    """
+    Aggregate, classify, post-process and group one interview using its
+    cached LLM segmentation. Returns the grouped rows of the interview.
+    """
+    mupe_train_sample, missing_ids_sample, itvw_code = aggregate_sample_dialogues(mupe_sample_df, audio_id=audio_id)
+
+    # Segmentations are cached LLM results; reading one saves a Vertex round trip.
+    interview_segmentation_sample = InterviewSegmentation.model_validate_json(
+        segmentation_path.read_text(encoding="utf-8")
+    )
+    increment("segmentation_cache.hits")
+    questions_df_sample = get_questions_df(mupe_train_sample, itvw_code)
+
+    questions_parsed_classified = classify_questions(
+        questions_parsed=interview_segmentation_sample,
+        inter_questions=questions_df_sample,
+        level="subsection"
+    )
+
+    mupe_train_sample_clsfd = mupe_train_sample.merge(
+        questions_parsed_classified["subsection"], left_index=True, right_index=True, how="left"
+    ).ffill().copy()
+
+    mupe_train_sample_final = post_process_mupe_sample(mupe_train_sample_clsfd)
+
+    mapping = get_group_mapping(mupe_train_sample_final)
+    mupe_train_sample_final["group_id"] = (
+        mupe_train_sample_final.index.map(mapping.get).astype("Int8")
+    )
+
+    mupe_train_sample_final.dropna(subset=['group_id'], inplace=True)
+    return mupe_train_sample_final
+
+
+def write_interview_table(mupe_train: pd.DataFrame, arrow_path: Path) -> dict[int, tuple[int, int]]:
+    """
+    Write `mupe_train` sorted by audio_id as an Arrow IPC file and return the
+    (offset, length) row range of each audio_id in it.
+    """
+    table = pa.Table.from_pandas(mupe_train.sort_values("audio_id", kind="stable"), preserve_index=False)
+    with ipc.new_file(arrow_path, table.schema) as writer:
+        writer.write_table(table)
+
+    audio_ids = table["audio_id"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, audio_ids[1:] != audio_ids[:-1]])
+    lengths = np.diff(np.r_[starts, len(audio_ids)])
+    return {int(audio_ids[s]): (int(s), int(n)) for s, n in zip(starts, lengths)}
+
+
+_WORKER_TABLE: pa.Table | None = None
+_WORKER_STORE: Path | None = None
+
+
+def _init_worker(arrow_path: Path | None, store_dir: Path | None = None) -> None:
+    """Memory-map the shared interview table, or remember the store, once per worker process."""
+    global _WORKER_TABLE, _WORKER_STORE
+    _WORKER_STORE = store_dir
+    _WORKER_TABLE = None if arrow_path is None else ipc.open_file(pa.memory_map(str(arrow_path))).read_all()
+
+
+def _process_interview_task(task: tuple[int, Path, int | None, int | None]) -> InterviewResult:
+    audio_id, segmentation_path, offset, length = task
+    try:
+        if _WORKER_STORE is not None:
+            sample = load_interview(_WORKER_STORE, audio_id)
+        else:
+            sample = _WORKER_TABLE.slice(offset, length).to_pandas()
+        return InterviewResult(audio_id=audio_id, status="ok", sample=process_interview(sample, audio_id, segmentation_path))
+    except Exception as e:
+        return InterviewResult(audio_id=audio_id, status="failed", reason=f"{type(e).__name__}: {e}")
+
+
+def iter_process_interviews(
+    mupe_train: pd.DataFrame | None,
+    segmentation_paths: dict[int, Path],
+    allowed_audio_ids: set[int],
+    max_workers: int | None = None,
+    store_dir: Path | None = None,
+) -> Iterator[InterviewResult]:
+    """
+    Process every interview with a cached segmentation, yielding results in
+    audio_id order as they are ready. At most two interviews per worker are
+    submitted ahead of the one being yielded, so a slow interview holds
+    back a bounded number of finished ones.
+
+    Interviews not in `allowed_audio_ids` or without rows are skipped, and
+    an exception in one interview marks it as failed without stopping the
+    others. With more than one worker, the train rows are shared through a
+    memory-mapped Arrow IPC file and each worker only converts the slice of
+    its own interview. With `store_dir`, `mupe_train` is not needed: each
+    interview is read from its own partition of the store.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if store_dir is not None:
+            arrow_path = None
+            ranges = {audio_id: (None, None) for audio_id in list_audio_ids(store_dir)}
+        else:
+            arrow_path = Path(tmp_dir) / "mupe_train.arrow"
+            ranges = write_interview_table(mupe_train, arrow_path)
+
+        # Skipped interviews are known up front; None marks a processed one.
+        plan: list[InterviewResult | None] = []
+        tasks = []
+        for audio_id, segmentation_path in sorted(segmentation_paths.items()):
+            if audio_id not in allowed_audio_ids:
+                plan.append(InterviewResult(audio_id=audio_id, status="skipped", reason="not a well-behaved interview"))
+            elif audio_id not in ranges:
+                plan.append(InterviewResult(audio_id=audio_id, status="skipped", reason="no rows in train.csv"))
+            else:
+                tasks.append((audio_id, segmentation_path, *ranges[audio_id]))
+                plan.append(None)
+
+        def in_order(processed: Iterator[InterviewResult]) -> Iterator[InterviewResult]:
+            for result in plan:
+                yield result if result is not None else next(processed)
+
+        if max_workers == 1:
+            _init_worker(arrow_path, store_dir)
+            yield from in_order(map(_process_interview_task, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(arrow_path, store_dir)) as executor:
+                yield from in_order(bounded_map(executor, _process_interview_task, tasks, default_in_flight(max_workers)))
+
+
+def process_interviews(
+    mupe_train: pd.DataFrame | None,
+    segmentation_paths: dict[int, Path],
+    allowed_audio_ids: set[int],
+    max_workers: int | None = None,
+    store_dir: Path | None = None,
+) -> list[InterviewResult]:
+    """All the results of `iter_process_interviews`, in audio_id order."""
+    return list(iter_process_interviews(mupe_train, segmentation_paths, allowed_audio_ids, max_workers, store_dir))
+
+
+def find_segmentations(segmentations_dir: Path) -> dict[int, Path]:
+    segmentation_paths = {}
+    for json_segmentation in segmentations_dir.glob("interview_segmentation_*.json"):
+        file_name_result = SEGMENTATION_FILE_RE.match(json_segmentation.name)
+        if file_name_result is not None:
+            segmentation_paths[int(file_name_result.group("audio_id"))] = json_segmentation
+    return segmentation_paths
+
+
+def chunk_interview(
+    result: InterviewResult,
+    max_duration: float = MAX_CHUNK_SECONDS,
+    max_turns: int = MAX_CHUNK_TURNS,
+) -> pd.DataFrame:
+    """The rows of a processed interview, with its `audio_id`, split into chunks."""
+    return chunk_groups(
+        result.sample.assign(audio_id=result.audio_id),
+        max_duration=max_duration,
+        max_turns=max_turns,
+        group_keys=["audio_id", "group_id"],
+    )
+
+
+def anonymise_interview(
+    samples: pd.DataFrame,
+    scanner: NameScanner,
+    interview_id: str,
+    action: Literal["flag", "drop"] = "flag",
+) -> pd.DataFrame:
+    """
+    `anonymise` the chunked rows of one interview. The rows carry no
+    `interview_id`, so the interview's ``mupe_code.lower()`` is given, to
+    match only the names of its own participants.
+    """
+    labelled = samples.assign(interview_id=interview_id)
+    return anonymise(labelled, scanner, action=action).drop(columns="interview_id")
+
+
+def _write_chunked(
+    results: Iterable[InterviewResult],
+    writer: InterviewCsvWriter,
+    max_duration: float,
+    max_turns: int,
+    keep_audio_id: bool,
+    scanner: NameScanner | None,
+    anonymise_action: Literal["flag", "drop"],
+    interview_ids: Dict[int, str] | None,
+) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """Write each result as `write_interviews` does, yielding the rows written."""
+    for result in results:
+        if result.status != "ok":
+            rich.print(f"[yellow]{result.status.capitalize()}[/yellow] audio_id={result.audio_id}: {result.reason}")
+            writer.record(result.audio_id, result.status)
+            continue
+
+        rich.print(f"Processed audio_id={result.audio_id}")
+        samples = chunk_interview(result, max_duration, max_turns)
+        if scanner is not None:
+            samples = anonymise_interview(samples, scanner, interview_ids[result.audio_id], anonymise_action)
+        writer.write(result.audio_id, samples if keep_audio_id else samples.drop(columns="audio_id"))
+        yield result.audio_id, samples
+
+
+def write_interviews(
+    results: Iterable[InterviewResult],
+    writer: InterviewCsvWriter,
+    max_duration: float = MAX_CHUNK_SECONDS,
+    max_turns: int = MAX_CHUNK_TURNS,
+    keep_audio_id: bool = False,
+    scanner: NameScanner | None = None,
+    anonymise_action: Literal["flag", "drop"] = "flag",
+    interview_ids: Dict[int, str] | None = None,
+    review_dir: Path | None = None,
+    review_workers: int | None = None,
+) -> None:
+    """
+    Chunk each processed interview and append it to `writer` as soon as it
+    arrives, recording the skipped and failed ones. Partial outputs keep
+    the `audio_id` column for merging. With `scanner`, `interview_ids`
+    maps each audio_id to its ``mupe_code.lower()`` (see
+    `anonymise_interview`). With `review_dir`, a review workbook per
+    interview is written by a pool of `review_workers` processes while the
+    next interviews are written.
+    """
+    written = _write_chunked(
+        results, writer, max_duration, max_turns, keep_audio_id, scanner, anonymise_action, interview_ids,
+    )
+    if review_dir is None:
+        for _ in written:
+            pass
+    else:
+        export_review_workbooks(written, review_dir, max_workers=review_workers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the MupeTalk train CSV from CORAA-MUPE")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes; 1 processes interviews inline")
+    parser.add_argument("--max-chunk-seconds", type=float, default=MAX_CHUNK_SECONDS, help="Longest chunk of a group")
+    parser.add_argument("--max-chunk-turns", type=int, default=MAX_CHUNK_TURNS, help="Most turns in a chunk of a group")
+    parser.add_argument("--excel", action="store_true", help="Write one colour-coded review workbook per interview")
+    parser.add_argument("--store", type=Path, help="Read interviews from this audio_id-partitioned Parquet store, building it from train.csv if missing or incomplete")
+    parser.add_argument("--num-partitions", type=int, default=1, help="Split the interviews across this many independent runs")
+    parser.add_argument("--partition", type=int, default=0, help="Partition processed by this run, from 0 to num-partitions - 1")
+    parser.add_argument("--merge", action="store_true", help="Merge the partial outputs of a partitioned run into mupetalk_train.csv")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run, skipping the interviews already written or skipped and retrying failed ones")
+    parser.add_argument("--anonymise", choices=["flag", "drop"],
+                        help="Flag (names_found column) or drop turns mentioning an interview participant by name; "
+                             "a dropped turn splits its chunk in two")
+    args = parser.parse_args()
+
+    if args.merge:
+        with span("merge_partials"):
+            summary = merge_partials(PARTIALS_PATH, args.num_partitions, MUPETALK_TRAIN_PATH)
+        rich.print(f"Merged {args.num_partitions} partitions, {summary['rows']} rows, into {MUPETALK_TRAIN_PATH}")
+        return
+
+    check_paths()
+    if args.store is not None:
+        if not is_store_complete(args.store):
+            with span("build_store"):
+                build_store({"train": MUPE_GIT_PATH / "train.csv"}, args.store)
+        mupe_train_df = None
+    else:
+        with span("load_csv"):
+            mupe_train_df = pd.read_csv(MUPE_GIT_PATH / "train.csv")
+        increment("load_csv.rows", len(mupe_train_df))
     
     mupe_metadata_sp_df = (
         pd.read_csv(PROCESSED_METADATA_PATH)
@@ -83,61 +364,81 @@ if __name__ == "__main__":
     )
 
     mupe_metadata_sp_df = mupe_metadata_sp_df[mupe_metadata_sp_df["split"] == "train"]
+    audio_ids = mupe_metadata_sp_df['audio_id'].astype(int).tolist()
+    segmentation_paths = find_segmentations(INTERVIEW_SEGMENTATIONS_PATH)
+    partitioned = args.num_partitions > 1
+    if partitioned:
+        audio_ids = in_partition(audio_ids, args.num_partitions, args.partition)
+        partition_ids = set(in_partition(segmentation_paths, args.num_partitions, args.partition))
+        segmentation_paths = {a: p for a, p in segmentation_paths.items() if a in partition_ids}
+        rich.print(f"Partition {args.partition} of {args.num_partitions}: {len(segmentation_paths)} interviews")
+
     itvw_codes_df = get_well_behaved_samples(
         mupe_train=mupe_train_df,
-        audio_ids=mupe_metadata_sp_df['audio_id'].tolist()
+        audio_ids=audio_ids,
+        store_dir=args.store,
     )
 
-    mupe_samples = []
-
-    file_name_re = re.compile(r"interview_segmentation_(?P<audio_id>\d+)\.json")
-    for json_segmentation in INTERVIEW_SEGMENTATIONS_PATH.glob("interview_segmentation_*.json"):
-        file_name_result = file_name_re.match(json_segmentation.name)
-        if file_name_result is None:
-            continue
-        file_id = int(file_name_result.group("audio_id"))
-        mupe_train_sample, missing_ids_sample, itvw_code = aggregate_sample_dialogues(mupe_train_df, audio_id=file_id)
-        
-        if file_id in itvw_codes_df["audio_id"].values:
-            rich.print(f"Processing file for audio_id={file_id} with interview_code={itvw_code}")
-            interview_segmentation_sample = InterviewSegmentation.model_validate_json(
-                json_segmentation.read_text(encoding="utf-8")
-            )
-            questions_df_sample = get_questions_df(mupe_train_sample, itvw_code)
-        else:
-            rich.print(f"Skipping file for audio_id={file_id} not in itvw_codes_df")
-            continue
+    scanner = NameScanner(metadata_patterns(mupe_metadata_sp_df)) if args.anonymise else None
+    interview_ids = dict(zip(mupe_metadata_sp_df["audio_id"].astype(int), mupe_metadata_sp_df["mupe_code"].str.lower()))
+    run_info = {
+        "max_chunk_seconds": args.max_chunk_seconds,
+        "max_chunk_turns": args.max_chunk_turns,
+        "anonymise": args.anonymise,
+    }
+    if partitioned:
+        output_path = PARTIALS_PATH / f"{partial_stem(args.partition, args.num_partitions)}.csv"
+    else:
+        output_path = MUPETALK_TRAIN_PATH
 
-        questions_parsed_classified = classify_questions(
-            questions_parsed=interview_segmentation_sample,
-            inter_questions=questions_df_sample,
-            level="subsection"
+    # Each interview is chunked and appended as soon as it is processed, so
+    # only the few interviews in flight in the pools are held in memory and
+    # a crash keeps the ones done.
+    with span("process_interviews"), InterviewCsvWriter(output_path, resume=args.resume, run_info=run_info) as writer:
+        finished = {a for a, status in writer.done.items() if status in FINISHED_STATUSES}
+        if writer.done:
+            rich.print(f"Resuming {output_path}: {len(finished)} interviews done, "
+                       f"{len(writer.done) - len(finished)} failed ones to retry")
+        pending = {a: p for a, p in segmentation_paths.items() if a not in finished}
+        results = iter_process_interviews(
+            mupe_train_df,
+            pending,
+            allowed_audio_ids=set(itvw_codes_df["audio_id"].astype(int)),
+            max_workers=args.workers,
+            store_dir=args.store,
+        )
+        write_interviews(
+            results, writer, args.max_chunk_seconds, args.max_chunk_turns,
+            keep_audio_id=partitioned,
+            scanner=scanner,
+            anonymise_action=args.anonymise or "flag",
+            interview_ids=interview_ids,
+            review_dir=EXCEL_FILES_PATH if args.excel else None,
+            review_workers=args.workers,
         )
 
-        mupe_train_sample_clsfd = mupe_train_sample.merge(
-            questions_parsed_classified["subsection"], left_index=True, right_index=True, how="left"
-        ).ffill().copy()
+    statuses = writer.done
+    counts = {status: sum(s == status for s in statuses.values()) for status in ("ok", "skipped", "failed")}
+    rich.print(f"Interviews: {counts['ok']} processed, {counts['skipped']} skipped, {counts['failed']} failed")
+    for status, n in counts.items():
+        increment(f"interviews.{status}", n)
+    increment("write_output.rows", writer.manifest["rows"])
 
-        mupe_train_sample_final = post_process_mupe_sample(mupe_train_sample_clsfd)
-        
-        mapping = get_group_mapping(mupe_train_sample_final)
-        mupe_train_sample_final["group_id"] = (
-            mupe_train_sample_final.index.map(mapping.get).astype("Int8")
+    if partitioned:
+        manifest_path = write_partial_manifest(
+            PARTIALS_PATH, args.partition, args.num_partitions, statuses,
+            rows=writer.manifest["rows"], checksum=writer.manifest["sha256"], run_info=run_info,
         )
+        rich.print(f"Saved partition {args.partition} to {manifest_path}")
+    elif counts["ok"] == 0:
+        rich.print("[red]No interview was processed[/red]")
+    else:
+        rich.print(f"Saved {writer.manifest['rows']} rows to {output_path}")
 
-        mupe_train_sample_final.dropna(subset=['group_id'], inplace=True)
-        mupe_samples.append(mupe_train_sample_final)
-
-        # unique_groups = sorted(mupe_train_sample_final["group_id"].unique())
-        # group_to_color = {g: to_hex(mupe_cmap(i)) for i, g in enumerate(unique_groups)}
+    report_path = write_report(run_name="main")
+    if report_path is not None:
+        rich.print(f"Profile report saved to {report_path}")
 
-        # excel_base_name = "mupe_train_sample_{}.xlsx".format(file_id)
-        # excel_path = EXCEL_FILES_PATH / excel_base_name
 
-        # mupe_train_sample_final.style.apply(
-        #     lambda row: highlight_group(row, group_to_color), axis=1
-        # ).to_excel(excel_path, index=False)
-        # rich.print(f"Saved processed sample to {excel_path}")
-    
-    mupe_samples_df = pd.concat(mupe_samples)
-    mupe_samples_df.to_csv(DATASETS_PATH.parent / "mupetalk_train.csv", index=False)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
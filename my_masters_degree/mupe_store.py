@@ -0,0 +1,119 @@
+"""
+Parquet store of the CORAA-MUPE segment metadata, hive-partitioned by split
+and audio_id:
+
+    store_dir/split=train/audio_id=1000/part-0.parquet
+
+Rows of each partition are sorted by start_time, so loading one interview
+reads a single small file, already in the order `aggregate_sample_dialogues`
+needs, instead of scanning the whole train.csv.
+
+`build_store` writes a `_SUCCESS` marker last; a store without it was
+interrupted mid-write and is rebuilt rather than read.
+"""
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from my_masters_degree.instrumentation import increment, timed
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("split", pa.string()), ("audio_id", pa.int64())]),
+    flavor="hive",
+)
+ROWS_PER_GROUP = 2048
+COMPLETE_MARKER = "_SUCCESS"
+
+
+@timed()
+def build_store(csv_paths: Dict[str, Path], store_dir: Path, rows_per_group: int = ROWS_PER_GROUP) -> int:
+    """
+    Convert the split CSVs (e.g. {"train": .../train.csv}) into the store,
+    replacing the partitions they cover, and mark it complete. Returns the
+    number of rows written.
+    """
+    marker = Path(store_dir) / COMPLETE_MARKER
+    marker.unlink(missing_ok=True)
+    tables = []
+    for split, csv_path in csv_paths.items():
+        table = pacsv.read_csv(csv_path)
+        tables.append(table.append_column("split", pa.array([split] * table.num_rows, pa.string())))
+    table = pa.concat_tables(tables, promote_options="permissive")
+    table = table.sort_by([("split", "ascending"), ("audio_id", "ascending"), ("start_time", "ascending")])
+
+    ds.write_dataset(
+        table,
+        store_dir,
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=rows_per_group,
+        preserve_order=True,
+    )
+    marker.touch()
+    increment("store.rows_written", table.num_rows)
+    return table.num_rows
+
+
+def is_store_complete(store_dir: Path) -> bool:
+    """True if the last `build_store` into `store_dir` finished."""
+    return (Path(store_dir) / COMPLETE_MARKER).exists()
+
+
+def partition_dir(store_dir: Path, audio_id: int, split: str = "train") -> Path:
+    return Path(store_dir) / f"split={split}" / f"audio_id={int(audio_id)}"
+
+
+def list_audio_ids(store_dir: Path, split: str = "train") -> List[int]:
+    """audio_ids stored for a split, in ascending order."""
+    split_dir = Path(store_dir) / f"split={split}"
+    if not split_dir.exists():
+        return []
+    return sorted(int(d.name.split("=", 1)[1]) for d in split_dir.iterdir() if d.name.startswith("audio_id="))
+
+
+def load_interview(store_dir: Path, audio_id: int, split: str = "train", columns: List[str] | None = None) -> pd.DataFrame:
+    """
+    Rows of one interview, sorted by start_time, with `audio_id` restored as
+    a column. Only that interview's partition is read.
+
+    Raises
+    ------
+    KeyError
+        If the interview is not in the store.
+    """
+    directory = partition_dir(store_dir, audio_id, split)
+    if not directory.exists():
+        raise KeyError(f"audio_id={audio_id} not found in {store_dir} (split={split})")
+    file_columns = None if columns is None else [c for c in columns if c != "audio_id"]
+    files = sorted(p for p in os.listdir(directory) if p.endswith(".parquet"))
+    table = pa.concat_tables(pq.read_table(directory / f, columns=file_columns) for f in files)
+    increment("store.partitions_read")
+    increment("store.rows_read", table.num_rows)
+
+    df = table.to_pandas()
+    if columns is None or "audio_id" in columns:
+        df["audio_id"] = int(audio_id)
+    return df
+
+
+def iter_interviews(store_dir: Path, split: str = "train", columns: List[str] | None = None) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """Yield (audio_id, rows) one interview at a time."""
+    for audio_id in list_audio_ids(store_dir, split):
+        yield audio_id, load_interview(store_dir, audio_id, split, columns)
+
+
+def load_split(store_dir: Path, split: str = "train", audio_ids: List[int] | None = None, columns: List[str] | None = None) -> pd.DataFrame:
+    """Rows of several interviews at once, pruned to the matching partitions."""
+    dataset = ds.dataset(store_dir, format="parquet", partitioning=PARTITIONING)
+    expression = ds.field("split") == split
+    if audio_ids is not None:
+        expression &= ds.field("audio_id").isin([int(a) for a in audio_ids])
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
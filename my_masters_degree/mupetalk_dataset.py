@@ -0,0 +1,306 @@
+"""
+PyTorch datasets over MupeTalk groups for training.
+
+Each sample is one (interview_id, group_id, chunk_id) dialogue, a chunk of
+a group as cut by `dialogue_chunker`: its turns with
+speaker ids, text and `subsection` context, and their audio decoded on
+demand from either the CORAA-MUPE parquet shards or a DailyTalk-style
+export (see `dailytalk_export`). Audio sources open their files lazily in
+each process, so the datasets can be used with DataLoader workers.
+
+`DurationBucketSampler` batches dialogues of similar duration, and
+`measure_throughput` reports samples/sec and the padding ratio of a loader.
+"""
+import glob
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import soundfile as sf
+import torch
+from pydantic import BaseModel
+from torch.utils.data import Dataset, IterableDataset, Sampler, get_worker_info
+
+from my_masters_degree.dailytalk_export import decode_turn, to_mono
+from my_masters_degree.dialogue_chunker import DIALOGUE_KEYS, with_chunk_ids
+from my_masters_degree.sampling_mupetalks import locate_clips, parse_paths
+
+SAMPLE_RATE = 16000
+
+
+class ParquetAudioSource:
+    """
+    Clips read lazily from the CORAA-MUPE parquet shards.
+
+    Only the `file_path` column is scanned up front, to locate each clip's
+    (shard, row group, row). Audio row groups are read on demand and the
+    most recent ones kept in a small cache, as the clips of a group are
+    usually stored next to each other. Loading a group with a clip missing
+    from the shards raises KeyError.
+    """
+
+    def __init__(
+        self,
+        parquet_dir: str,
+        sample_rate: int = SAMPLE_RATE,
+        file_paths: Iterable[str] | None = None,
+        cached_row_groups: int = 4,
+    ):
+        self.sample_rate = sample_rate
+        self.cached_row_groups = cached_row_groups
+        self._locations = locate_clips(file_paths, parquet_dir)
+
+        self._pid: int | None = None
+        self._files: Dict[str, pq.ParquetFile] = {}
+        self._cache: "OrderedDict[Tuple[str, int], List[Dict[str, Any]]]" = OrderedDict()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.update(_pid=None, _files={}, _cache=OrderedDict())
+        return state
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._locations
+
+    def _row_group(self, shard: str, rg: int) -> List[Dict[str, Any]]:
+        # File handles are never shared with a forked DataLoader worker.
+        if self._pid != os.getpid():
+            self._pid, self._files, self._cache = os.getpid(), {}, OrderedDict()
+
+        key = (shard, rg)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        if shard not in self._files:
+            self._files[shard] = pq.ParquetFile(shard)
+        audio = self._files[shard].read_row_group(rg, columns=["audio"])["audio"].to_pylist()
+        self._cache[key] = audio
+        if len(self._cache) > self.cached_row_groups:
+            self._cache.popitem(last=False)
+        return audio
+
+    def clip_bytes(self, path: str) -> bytes:
+        shard, rg, row = self._locations[path]
+        return self._row_group(shard, rg)[row]["bytes"]
+
+    def load_group(self, interview_id: Any, group_id: int, turns: List[Dict[str, Any]], chunk_id: int = 1) -> List[np.ndarray]:
+        """Decoded audio of each turn, at `sample_rate`."""
+        paths = [parse_paths(turn["file_path"]) for turn in turns]
+        missing = [p for turn_paths in paths for p in turn_paths if p not in self]
+        if missing:
+            raise KeyError(f"Group {group_id} of {interview_id} has {len(missing)} clips not in the shards: {missing[:5]}")
+        return [decode_turn([self.clip_bytes(p) for p in turn_paths], self.sample_rate) for turn_paths in paths]
+
+
+class DailyTalkAudioSource:
+    """Turn audio read from a directory written by `export_dailytalk`."""
+
+    def __init__(self, export_dir: str):
+        self.export_dir = export_dir
+        with open(os.path.join(export_dir, "metadata.json"), encoding="utf-8") as f:
+            self._metadata = json.load(f)
+        self._dialogs = {
+            (meta["source"]["interview_id"], int(meta["source"]["group_id"]), int(meta["source"].get("chunk_id", 1))): dialog_id
+            for dialog_id, meta in self._metadata.items()
+        }
+        first = next(iter(glob.glob(os.path.join(export_dir, "data", "*", "*.wav"))), None)
+        self.sample_rate = sf.info(first).samplerate if first else SAMPLE_RATE
+
+    def load_group(self, interview_id: Any, group_id: int, turns: List[Dict[str, Any]], chunk_id: int = 1) -> List[np.ndarray]:
+        dialog_id = self._dialogs[(interview_id, int(group_id), int(chunk_id))]
+        audio = []
+        for turn_idx in range(len(turns)):
+            speaker = self._metadata[dialog_id][str(turn_idx)]["speaker"]
+            path = os.path.join(self.export_dir, "data", dialog_id, f"{turn_idx}_{speaker}_d{dialog_id}.wav")
+            data, _ = sf.read(path, dtype="float32", always_2d=False)
+            audio.append(to_mono(data))
+        return audio
+
+
+class MupeTalkDataset(Dataset):
+    """
+    Map-style dataset with one chunk of a MupeTalk group per item, in
+    (interview_id, group_id, chunk_id) order. A table without `chunk_id`
+    has one chunk per group.
+
+    Items are dicts with `interview_id`, `group_id`, `chunk_id`,
+    `sample_rate`, `audio` (the turns concatenated, float32 tensor),
+    `turn_bounds` ([start, stop) sample offsets of each turn) and per-turn
+    `speaker_ids`, `speaker_codes`, `texts` and `subsections`.
+    """
+
+    def __init__(self, mupetalk_df: pd.DataFrame, audio_source, speaker_ids: Dict[str, int] | None = None):
+        frame = (
+            with_chunk_ids(mupetalk_df.dropna(subset=["group_id"]))
+            .sort_values([*DIALOGUE_KEYS, "start_time"], kind="stable")
+            .reset_index(drop=True)
+        )
+        self.frame = frame
+        self.audio_source = audio_source
+        self.speaker_ids = speaker_ids or {code: i for i, code in enumerate(sorted(frame["speaker_code"].unique()))}
+
+        keys = frame[DIALOGUE_KEYS]
+        starts = np.flatnonzero((keys != keys.shift()).any(axis=1).to_numpy())
+        self._bounds = np.stack([starts, np.append(starts[1:], len(frame))], axis=1)
+        self.dialogues: List[Tuple[Any, int, int]] = [
+            (interview_id, int(group_id), int(chunk_id))
+            for interview_id, group_id, chunk_id in keys.iloc[starts].itertuples(index=False)
+        ]
+        self.durations = (
+            np.add.reduceat(frame["duration"].to_numpy(dtype=np.float64), starts) if len(starts) else np.zeros(0)
+        )
+
+    def __len__(self) -> int:
+        return len(self.dialogues)
+
+    def turns(self, idx: int) -> List[Dict[str, Any]]:
+        """Records of the turns of the `idx`-th dialogue, by start_time."""
+        start, stop = self._bounds[idx]
+        return self.frame.iloc[start:stop].to_dict(orient="records")
+
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        interview_id, group_id, chunk_id = self.dialogues[idx]
+        turns = self.turns(idx)
+        audio = self.audio_source.load_group(interview_id, group_id, turns, chunk_id)
+        lengths = np.array([len(a) for a in audio], dtype=np.int64)
+        stops = np.cumsum(lengths)
+        return {
+            "interview_id": interview_id,
+            "group_id": group_id,
+            "chunk_id": chunk_id,
+            "sample_rate": self.audio_source.sample_rate,
+            "audio": torch.from_numpy(np.concatenate(audio).astype(np.float32, copy=False)) if audio else torch.zeros(0),
+            "turn_bounds": torch.from_numpy(np.stack([stops - lengths, stops], axis=1)),
+            "speaker_ids": torch.tensor([self.speaker_ids[t["speaker_code"]] for t in turns], dtype=torch.long),
+            "speaker_codes": [t["speaker_code"] for t in turns],
+            "texts": [t["original_text"] for t in turns],
+            "subsections": [t.get("subsection") for t in turns],
+        }
+
+
+class MupeTalkIterableDataset(IterableDataset):
+    """
+    Streams the items of a `MupeTalkDataset`, each DataLoader worker taking
+    every `num_workers`-th dialogue. With `shuffle`, the order changes with
+    `set_epoch` but is the same in every worker.
+    """
+
+    def __init__(self, dataset: MupeTalkDataset, shuffle: bool = False, seed: int = 0):
+        self.dataset = dataset
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        order = np.arange(len(self.dataset))
+        if self.shuffle:
+            order = np.random.default_rng([self.seed, self.epoch]).permutation(order)
+        worker = get_worker_info()
+        if worker is not None:
+            order = order[worker.id::worker.num_workers]
+        for idx in order:
+            yield self.dataset[int(idx)]
+
+
+class DurationBucketSampler(Sampler[List[int]]):
+    """
+    Batches of dialogues with similar duration.
+
+    Dialogues are sorted by duration and cut greedily into batches whose
+    padded size (batch size * longest dialogue) stays within
+    `max_batch_seconds`; a dialogue longer than that gets a batch of its
+    own. Batches are fixed, and only their order is shuffled per epoch.
+    """
+
+    def __init__(
+        self,
+        durations: np.ndarray,
+        max_batch_seconds: float,
+        max_batch_size: int | None = None,
+        shuffle: bool = True,
+        seed: int = 0,
+    ):
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+
+        self.batches: List[List[int]] = []
+        batch: List[int] = []
+        for idx in np.argsort(durations, kind="stable"):
+            full = max_batch_size is not None and len(batch) >= max_batch_size
+            if batch and (full or (len(batch) + 1) * durations[idx] > max_batch_seconds):
+                self.batches.append(batch)
+                batch = []
+            batch.append(int(idx))
+        if batch:
+            self.batches.append(batch)
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def __len__(self) -> int:
+        return len(self.batches)
+
+    def __iter__(self) -> Iterator[List[int]]:
+        order = np.arange(len(self.batches))
+        if self.shuffle:
+            order = np.random.default_rng([self.seed, self.epoch]).permutation(order)
+        for b in order:
+            yield self.batches[b]
+
+
+def collate_dialogues(batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Right-pad the dialogue audio into a (batch, max_samples) tensor, with
+    `audio_lengths`; the other fields are gathered into lists.
+    """
+    lengths = torch.tensor([len(item["audio"]) for item in batch], dtype=torch.long)
+    audio = torch.zeros(len(batch), int(lengths.max()) if len(batch) else 0)
+    for row, item in enumerate(batch):
+        audio[row, :len(item["audio"])] = item["audio"]
+
+    collated: Dict[str, Any] = {"audio": audio, "audio_lengths": lengths}
+    for key in batch[0] if batch else []:
+        if key not in collated:
+            collated[key] = [item[key] for item in batch]
+    return collated
+
+
+class ThroughputReport(BaseModel):
+    batches: int
+    samples: int
+    seconds: float
+    padding_ratio: float
+
+    @property
+    def samples_per_second(self) -> float:
+        return self.samples / self.seconds if self.seconds > 0 else 0.0
+
+
+def measure_throughput(loader: Iterable[Dict[str, Any]], max_batches: int | None = None) -> ThroughputReport:
+    """Iterate a loader of `collate_dialogues` batches and time it."""
+    batches = samples = 0
+    padded = real = 0
+    start = time.perf_counter()
+    for batch in loader:
+        lengths = batch["audio_lengths"]
+        batches += 1
+        samples += len(lengths)
+        padded += len(lengths) * int(lengths.max()) if len(lengths) else 0
+        real += int(lengths.sum())
+        if max_batches is not None and batches >= max_batches:
+            break
+    return ThroughputReport(
+        batches=batches,
+        samples=samples,
+        seconds=time.perf_counter() - start,
+        padding_ratio=1.0 - real / padded if padded else 0.0,
+    )
@@ -0,0 +1,188 @@
+"""
+Split the MupeTalk build across machines by interview.
+
+Each key (an audio_id, or an interview_id for the sample exports) goes to
+one of N partitions by the crc32 of its string form, which unlike `hash`
+is the same in every process, machine and Python version. A partition
+writes its rows to `mupetalk_train.part-{k}-of-{N}.csv` and then, once
+that file is in place, a json manifest with its checksum, row count and
+the interviews it covered.
+
+`merge_partials` refuses to run until all N manifests are present, agree
+on the run settings and match their files; it then streams the
+partials, one interview at a time, into a merge by audio_id, which is
+the order a single-machine run writes.
+"""
+import heapq
+import json
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Tuple
+
+import pandas as pd
+
+from my_masters_degree.instrumentation import increment, timed
+from my_masters_degree.utils import atomic_write_bytes, atomic_write_chunks, file_sha256
+
+PARTIAL_STEM = "mupetalk_train.part-{partition:05d}-of-{num_partitions:05d}"
+MERGE_CHUNK_ROWS = 50_000
+
+
+def partition_of(key: Hashable, num_partitions: int) -> int:
+    return zlib.crc32(str(key).encode("utf-8")) % num_partitions
+
+
+def in_partition(keys: Iterable[Hashable], num_partitions: int, partition: int) -> List[Hashable]:
+    """The keys assigned to `partition`, in their original order."""
+    if not 0 <= partition < num_partitions:
+        raise ValueError(f"partition must be in [0, {num_partitions}), got {partition}")
+    return [key for key in keys if partition_of(key, num_partitions) == partition]
+
+
+def partial_stem(partition: int, num_partitions: int) -> str:
+    return PARTIAL_STEM.format(partition=partition, num_partitions=num_partitions)
+
+
+def write_partial_manifest(
+    output_dir: Path,
+    partition: int,
+    num_partitions: int,
+    statuses: Dict[int, str],
+    rows: int,
+    checksum: str,
+    run_info: Dict[str, Any] | None = None,
+) -> Path:
+    """
+    Record a partial CSV already written to `output_dir`, with its row
+    count and sha256, as finished. Returns the manifest path.
+    """
+    stem = partial_stem(partition, num_partitions)
+    manifest = {
+        "partition": partition,
+        "num_partitions": num_partitions,
+        "run": run_info or {},
+        "file": f"{stem}.csv",
+        "sha256": checksum,
+        "rows": rows,
+        "audio_ids": {str(audio_id): status for audio_id, status in sorted(statuses.items())},
+    }
+    manifest_path = output_dir / f"{stem}.json"
+    atomic_write_bytes(str(manifest_path), json.dumps(manifest, indent=2).encode("utf-8"))
+    increment("partitions.written")
+    return manifest_path
+
+
+def load_partial_manifests(output_dir: Path, num_partitions: int) -> List[Dict[str, Any]]:
+    """
+    Manifests of all partitions, checked against each other and their files.
+
+    Raises
+    ------
+    ValueError
+        If a partition is missing or was written for other settings, or a
+        partial file does not match its manifest.
+    """
+    manifests = []
+    missing = []
+    for partition in range(num_partitions):
+        path = output_dir / f"{partial_stem(partition, num_partitions)}.json"
+        if not path.exists():
+            missing.append(partition)
+            continue
+        manifests.append(json.loads(path.read_text(encoding="utf-8")))
+    if missing:
+        raise ValueError(f"{len(missing)} of {num_partitions} partitions are not finished: {missing}")
+
+    run = manifests[0]["run"]
+    for manifest in manifests:
+        partition = manifest["partition"]
+        if manifest["run"] != run:
+            raise ValueError(f"Partition {partition} was run with {manifest['run']}, not {run}")
+        csv_path = output_dir / manifest["file"]
+        if not csv_path.exists() or file_sha256(str(csv_path)) != manifest["sha256"]:
+            raise ValueError(f"{csv_path} is missing or does not match its manifest")
+        foreign = [a for a in manifest["audio_ids"] if partition_of(int(a), num_partitions) != partition]
+        if foreign:
+            raise ValueError(f"Partition {partition} holds audio_ids of other partitions: {foreign[:5]}")
+    return manifests
+
+
+def _iter_partial_interviews(path: Path, expected_rows: int, chunksize: int) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """
+    The rows of a partial, read `chunksize` at a time, as one frame per
+    interview in file order. Values are kept as the strings in the file so
+    they are written back byte for byte.
+
+    Raises
+    ------
+    ValueError
+        If the interviews are not in increasing audio_id order or the row
+        count differs from `expected_rows`.
+    """
+    rows = 0
+    previous = -1
+    carry = None
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize)
+    for chunk in reader:
+        if chunk.empty:
+            continue
+        rows += len(chunk)
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        # The last interview of a chunk may go on in the next one.
+        tail = (chunk["audio_id"] == chunk["audio_id"].iloc[-1]).to_numpy()
+        carry = chunk[tail]
+        for audio_id, frame in chunk[~tail].groupby("audio_id", sort=False):
+            if int(audio_id) <= previous:
+                raise ValueError(f"{path.name} is not in audio_id order at interview {audio_id}")
+            previous = int(audio_id)
+            yield previous, frame
+    if carry is not None:
+        audio_id = int(carry["audio_id"].iloc[0])
+        if audio_id <= previous:
+            raise ValueError(f"{path.name} is not in audio_id order at interview {audio_id}")
+        yield audio_id, carry
+    if rows != expected_rows:
+        raise ValueError(f"{path.name} has {rows} rows, its manifest {expected_rows}")
+
+
+@timed()
+def merge_partials(
+    output_dir: Path,
+    num_partitions: int,
+    output_path: Path,
+    chunksize: int = MERGE_CHUNK_ROWS,
+) -> Dict[str, Any]:
+    """
+    Validate the partitions in `output_dir` and write their rows, without
+    the `audio_id` column, to `output_path` in audio_id order.
+
+    Each partial is read `chunksize` rows at a time, so memory is bounded
+    by one chunk per partition rather than by the merged file. Nothing is
+    written to `output_path` unless every partial matches its manifest.
+
+    Returns a summary with the row count and the outcome of every
+    interview.
+    """
+    manifests = load_partial_manifests(output_dir, num_partitions)
+    statuses = {int(a): s for m in manifests for a, s in m["audio_ids"].items()}
+    filled = [m for m in manifests if m["rows"] > 0]
+    if not filled:
+        raise ValueError(f"No partition in {output_dir} has any rows")
+
+    streams = [
+        _iter_partial_interviews(output_dir / m["file"], m["rows"], chunksize) for m in filled
+    ]
+    rows = 0
+
+    def merged_csv() -> Iterator[bytes]:
+        nonlocal rows
+        header = True
+        for _, frame in heapq.merge(*streams, key=lambda item: item[0]):
+            rows += len(frame)
+            yield frame.drop(columns="audio_id").to_csv(index=False, header=header).encode("utf-8")
+            header = False
+
+    atomic_write_chunks(str(output_path), merged_csv())
+    increment("partitions.merged", num_partitions)
+    return {"rows": rows, "run": manifests[0]["run"], "audio_ids": dict(sorted(statuses.items()))}
@@ -1,10 +1,24 @@
 import ast
-from typing import List
+import io
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
 
+import numpy as np
 import pandas as pd
+import soundfile as sf
 import pandera.pandas as pa
 from pandera.typing import Series
 
+INTERVIEW_RE = r"(pc_ma_hv\d{3})"
+SILENCE_FRAME_S = 0.02
+SILENCE_DBFS = -50.0
+CLIP_LEVEL = 0.999
+AUDIO_STATS_COLUMNS = [
+    "file_path", "audio_duration_s", "rms_dbfs", "peak",
+    "clipped_ratio", "leading_silence_s", "trailing_silence_s",
+]
+
 
 def parse_list_str(v: str | List) -> List:
     if isinstance(v, list):
@@ -39,11 +53,194 @@ def load_and_validate_mupetalk(df: pd.DataFrame) -> pd.DataFrame:
     return MupeTalkSchema.validate(df)
 
 
-def get_statistics(mupetalk_df: pd.DataFrame):
-    pass
-    
+def _interview_ids(mupetalk_df: pd.DataFrame) -> pd.Series:
+    """`interview_id` column, or the MUPE code of each turn's first clip."""
+    if "interview_id" in mupetalk_df.columns:
+        return mupetalk_df["interview_id"]
+    return mupetalk_df["file_path"].str[0].str.extract(INTERVIEW_RE, expand=False)
+
+
+def _segment_audio_stats(item: Tuple[str, bytes]) -> dict:
+    """Level, clipping and edge-silence measures of one encoded segment."""
+    file_path, audio_bytes = item
+    data, sr = sf.read(io.BytesIO(audio_bytes), dtype="float32", always_2d=True)
+    data = data.mean(axis=1)
+
+    frame_len = max(int(sr * SILENCE_FRAME_S), 1)
+    n_frames = len(data) // frame_len
+    frames = data[:n_frames * frame_len].reshape(n_frames, frame_len)
+    frame_dbfs = 10 * np.log10(np.mean(np.square(frames), axis=1) + 1e-12)
+    voiced = np.flatnonzero(frame_dbfs > SILENCE_DBFS)
+
+    if voiced.size:
+        leading = voiced[0] * frame_len / sr
+        trailing = (len(data) - (voiced[-1] + 1) * frame_len) / sr
+    else:
+        leading, trailing = len(data) / sr, 0.0
+
+    rms = float(np.sqrt(np.mean(np.square(data)))) if data.size else 0.0
+    return {
+        "file_path": file_path,
+        "audio_duration_s": len(data) / sr,
+        "rms_dbfs": 20 * np.log10(rms + 1e-12),
+        "peak": float(np.max(np.abs(data))) if data.size else 0.0,
+        "clipped_ratio": float(np.mean(np.abs(data) >= CLIP_LEVEL)) if data.size else 0.0,
+        "leading_silence_s": leading,
+        "trailing_silence_s": trailing,
+    }
+
+
+def get_audio_statistics(audio_map: Dict[str, bytes], max_workers: int | None = None) -> pd.DataFrame:
+    """
+    Decode every segment of `audio_map` in a process pool and measure its
+    RMS level, peak, fraction of clipped samples and leading/trailing
+    silence (frames quieter than `SILENCE_DBFS`).
+    """
+    items = sorted(audio_map.items())
+    if max_workers == 1:
+        rows = list(map(_segment_audio_stats, items))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rows = list(executor.map(_segment_audio_stats, items, chunksize=64))
+    return pd.DataFrame(rows, columns=AUDIO_STATS_COLUMNS)
+
+
+def get_statistics(
+    mupetalk_df: pd.DataFrame,
+    audio_map: Dict[str, bytes] | None = None,
+    max_workers: int | None = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Compute the MupeTalk corpus statistics.
+
+    The validated frame is aggregated once by (interview_id, group_id,
+    speaker_code, subsection) into a compact table of partial sums; every
+    other table is rolled up from that compact table. When `audio_map` is
+    given, a per-segment audio pass runs as well (see
+    `get_audio_statistics`).
+
+    Parameters
+    ----------
+    mupetalk_df : pd.DataFrame
+        Frame returned by `load_and_validate_mupetalk`. Turns are grouped by
+        `interview_id` when present, otherwise by the MUPE code in their
+        first `file_path`.
+    audio_map : dict[str, bytes] | None
+        Encoded audio per clip path, as returned by
+        `sampling_mupetalks.extract_audio_from_parquets`.
+    max_workers : int | None
+        Process pool size of the audio pass.
+
+    Returns
+    -------
+    dict[str, pd.DataFrame]
+        - "compact": partial sums per (interview, group, speaker, subsection).
+        - "groups": turns, speech duration, span and speaker-change rates
+          per group.
+        - "speaker_subsection_hours": hours per speaker (rows) and
+          subsection (columns), with a TOTAL column.
+        - "summary": one row per corpus-level metric.
+        - "audio": per-segment audio measures, only with `audio_map`.
+    """
+    frame = mupetalk_df.assign(interview_id=_interview_ids(mupetalk_df)).sort_values(
+        ["interview_id", "group_id", "start_time"], kind="stable"
+    )
+    same_group = (
+        (frame["interview_id"] == frame["interview_id"].shift())
+        & (frame["group_id"] == frame["group_id"].shift())
+    )
+    frame["speaker_change"] = same_group & (frame["speaker_code"] != frame["speaker_code"].shift())
+
+    compact = (
+        frame.groupby(["interview_id", "group_id", "speaker_code", "subsection"], sort=True)
+        .agg(
+            turns=("duration", "size"),
+            duration_s=("duration", "sum"),
+            speaker_changes=("speaker_change", "sum"),
+            start_time=("start_time", "min"),
+            end_time=("end_time", "max"),
+        )
+        .reset_index()
+    )
+
+    groups = (
+        compact.groupby(["interview_id", "group_id"], sort=True)
+        .agg(
+            turns=("turns", "sum"),
+            speech_s=("duration_s", "sum"),
+            speaker_changes=("speaker_changes", "sum"),
+            n_speakers=("speaker_code", "nunique"),
+            n_subsections=("subsection", "nunique"),
+            start_time=("start_time", "min"),
+            end_time=("end_time", "max"),
+        )
+        .reset_index()
+    )
+    groups["span_s"] = groups["end_time"] - groups["start_time"]
+    groups["speaker_change_rate"] = groups["speaker_changes"] / (groups["turns"] - 1).clip(lower=1)
+    groups["speaker_changes_per_min"] = groups["speaker_changes"] / (groups["span_s"] / 60).where(groups["span_s"] > 0)
+
+    speaker_subsection_hours = compact.pivot_table(
+        index="speaker_code", columns="subsection", values="duration_s", aggfunc="sum", fill_value=0.0
+    ) / 3600
+    speaker_subsection_hours["TOTAL"] = speaker_subsection_hours.sum(axis=1)
+    speaker_subsection_hours = speaker_subsection_hours.sort_values("TOTAL", ascending=False)
+
+    summary = {
+        "interviews": compact["interview_id"].nunique(),
+        "groups": len(groups),
+        "speakers": compact["speaker_code"].nunique(),
+        "turns": int(groups["turns"].sum()),
+        "hours": groups["speech_s"].sum() / 3600,
+        "turns_per_group_mean": groups["turns"].mean(),
+        "turns_per_group_median": groups["turns"].median(),
+        "turns_per_group_max": groups["turns"].max(),
+        "group_duration_s_mean": groups["speech_s"].mean(),
+        "group_duration_s_median": groups["speech_s"].median(),
+        "group_duration_s_p90": groups["speech_s"].quantile(0.9),
+        "group_duration_s_max": groups["speech_s"].max(),
+        "speaker_change_rate_mean": groups["speaker_change_rate"].mean(),
+        "speaker_changes_per_min_mean": groups["speaker_changes_per_min"].mean(),
+    }
+
+    stats = {
+        "compact": compact,
+        "groups": groups,
+        "speaker_subsection_hours": speaker_subsection_hours,
+    }
+
+    if audio_map is not None:
+        audio = get_audio_statistics(audio_map, max_workers=max_workers)
+        summary.update({
+            "audio_segments": len(audio),
+            "audio_rms_dbfs_mean": audio["rms_dbfs"].mean(),
+            "audio_clipped_segments_ratio": (audio["clipped_ratio"] > 0).mean(),
+            "audio_leading_silence_s_mean": audio["leading_silence_s"].mean(),
+            "audio_trailing_silence_s_mean": audio["trailing_silence_s"].mean(),
+        })
+        stats["audio"] = audio
+
+    stats["summary"] = pd.DataFrame({"metric": list(summary), "value": list(summary.values())})
+    return stats
+
+
+def write_statistics(stats: Dict[str, pd.DataFrame], output_dir: Path) -> None:
+    """
+    Write the compact table as Parquet, every table as CSV, and the summary
+    and speaker/subsection hours as LaTeX tables for the thesis.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stats["compact"].to_parquet(output_dir / "compact.parquet", index=False)
+    for name, table in stats.items():
+        table.to_csv(output_dir / f"{name}.csv", index=name == "speaker_subsection_hours")
+
+    stats["summary"].to_latex(output_dir / "summary.tex", index=False, float_format="%.2f")
+    stats["speaker_subsection_hours"].to_latex(output_dir / "speaker_subsection_hours.tex", float_format="%.2f")
+
 
 if __name__ == "__main__":
     df = pd.read_csv("/home/antonio-moreira/Documents/my-masters-degree/notebooks/mupetalk_train.csv")
     validated_df = load_and_validate_mupetalk(df)
-    get_statistics(validated_df)
\ No newline at end of file
+    statistics = get_statistics(validated_df)
+    write_statistics(statistics, Path("/home/antonio-moreira/Documents/my-masters-degree/notebooks/mupetalk_statistics"))
+    print(statistics["summary"].to_string(index=False))
\ No newline at end of file
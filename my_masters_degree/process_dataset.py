@@ -1,4 +1,5 @@
 import os
+import time
 from enum import Enum
 from typing import List, cast
 
@@ -9,6 +10,8 @@ from google import genai
 from google.genai import types
 from pydantic import BaseModel, Field
 
+from my_masters_degree.instrumentation import increment, record_llm_call, timed
+
 
 class QuestionMetadata(BaseModel):
     id: int = Field(..., description="O ID numérico da pergunta (ex: 0, 2, 4)")
@@ -38,6 +41,7 @@ class ClassLabel(str, Enum):
     FINALIZACAO = "FINALIZAÇÃO"
 
 
+@timed()
 def aggregate_sample_dialogues(mupe_df: pd.DataFrame, audio_id: int) -> tuple[pd.DataFrame, list[int], str]:
     """
     Aggregate contiguous utterances for a given audio_id and detect missing file counters.
@@ -53,6 +57,7 @@ def aggregate_sample_dialogues(mupe_df: pd.DataFrame, audio_id: int) -> tuple[pd
 
     if sample.empty:
         raise ValueError(f"No rows found for audio_id={audio_id}")
+    increment("aggregate_sample_dialogues.rows", len(sample))
 
     join_code, interviewer_codes = get_interviewer_code(sample)
     
@@ -151,6 +156,7 @@ def get_interviewer_code(mupe_sample: pd.DataFrame) -> tuple[str, list[str]]:
     return join_code, list(interviewer_codes)
 
 
+@timed()
 def split_interview_questions(sample_df: pd.DataFrame, interviewer_code:str) -> tuple[InterviewSegmentation, pd.DataFrame] | tuple[None, None]:
     """
     Segment interviewer utterances into the official interview script structure using a Gemini model.
@@ -241,6 +247,7 @@ def split_interview_questions(sample_df: pd.DataFrame, interviewer_code:str) ->
     )
 
     try:
+        request_start = time.perf_counter()
         response = client.models.generate_content(
             model=model,
             contents=[
@@ -248,6 +255,7 @@ def split_interview_questions(sample_df: pd.DataFrame, interviewer_code:str) ->
             ],
             config=generate_content_config,
         )
+        record_llm_call("llm.split_interview_questions", time.perf_counter() - request_start, response.usage_metadata)
         
         assert isinstance((response_parsed := response.parsed), InterviewSegmentation)
         return response_parsed, questions_df
@@ -256,6 +264,7 @@ def split_interview_questions(sample_df: pd.DataFrame, interviewer_code:str) ->
         return None, None
     
 
+@timed()
 def classify_questions(
     questions_parsed: InterviewSegmentation,
     inter_questions: pd.DataFrame,
@@ -343,6 +352,7 @@ def get_missing_ids(mupe_sample: pd.DataFrame, n_conssecutives_ids: int = 1) ->
     return cast(pd.DataFrame, missing_ids_result.loc[consecutives_missing_ids_mask])
 
 
+@timed()
 def post_process_mupe_sample(mupe_sample: pd.DataFrame) -> pd.DataFrame:
     """Drop all rows whose subsection is ClassLabel.IDENTIFICACAO."""
     mupe_sample = mupe_sample.copy()
@@ -353,6 +363,7 @@ def post_process_mupe_sample(mupe_sample: pd.DataFrame) -> pd.DataFrame:
     return cast(pd.DataFrame, filtered)
 
 
+@timed()
 def get_group_mapping(mupe_sample: pd.DataFrame, min_len_group: int = 5) -> dict:
     file_id:int = mupe_sample['file_id'].iloc[0][-1] - 1
     
@@ -1,6 +1,10 @@
 import os
+import re
+import time
+import unicodedata
+from collections import Counter, defaultdict
 from pathlib import Path
-from typing import List, Literal, cast
+from typing import Callable, Dict, Iterable, List, Literal, Tuple, cast
 
 import pandas as pd
 from google import genai 
@@ -9,6 +13,8 @@ from pydantic import BaseModel, Field
 from IPython.display import display
 import rich
 
+from my_masters_degree.instrumentation import increment, record_llm_call, timed
+
 class GenderItem(BaseModel):
     name: str = Field(..., description="Nome completo")
     gender: Literal["Masculino", "Feminino", "Unknown"]
@@ -24,6 +30,21 @@ MUPE_METADATA_COLUMNS = [
     'gender', 'birth_state', 'interviewee_bio'
 ]
 
+# (name column, gender column) pairs of the reviewed metadata.
+GENDER_NAME_COLUMNS = [
+    ('interviewee_name', 'gender'),
+    ('interviewer1', 'interviewer1_gender'),
+    ('interviewer2', 'interviewer2_gender'),
+]
+NAME_PARTICLES = {'de', 'da', 'do', 'das', 'dos', 'e'}
+# Leading honorifics that settle the gender on their own (None: skipped).
+NAME_TITLES: Dict[str, Literal["Masculino", "Feminino"] | None] = {
+    'dona': 'Feminino', 'sra': 'Feminino', 'dra': 'Feminino', 'irma': 'Feminino', 'madre': 'Feminino',
+    'seu': 'Masculino', 'sr': 'Masculino', 'padre': 'Masculino', 'frei': 'Masculino',
+    'dr': None, 'prof': None, 'profa': 'Feminino',
+}
+PARENTHESES_RE = re.compile(r"\([^)]*\)")
+
 def preprocess_metadata_dataset(df:pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     df = cast(pd.DataFrame, df.loc[df['birth_country'] == 'Brasil'])
@@ -35,6 +56,137 @@ def preprocess_metadata_dataset(df:pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def normalize_name(name: str) -> List[str]:
+    """
+    Lowercase, accent-free tokens of a name, without nicknames in
+    parentheses, initials or punctuation.
+    """
+    name = PARENTHESES_RE.sub(" ", name)
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+    tokens = re.findall(r"[a-z]+", stripped)
+    return [t for t in tokens if len(t) > 1]
+
+
+def name_keys(name: str) -> Tuple[str | None, List[str]]:
+    """
+    Gender implied by a leading title, if any, and the lexicon keys of a
+    name from most to least specific: the compound first name
+    ("maria jose") and then the first name alone ("maria").
+    """
+    tokens = normalize_name(name)
+    title_gender = None
+    while tokens and tokens[0] in NAME_TITLES:
+        title_gender = title_gender or NAME_TITLES[tokens[0]]
+        tokens = tokens[1:]
+    if not tokens:
+        return title_gender, []
+
+    keys = [tokens[0]]
+    if len(tokens) > 2 and tokens[1] not in NAME_PARTICLES:
+        keys.insert(0, f"{tokens[0]} {tokens[1]}")
+    return title_gender, keys
+
+
+class NameGenderLexicon:
+    """
+    First-name -> gender counts built from already classified names.
+
+    A name resolves when one of its keys has been seen at least `min_count`
+    times with a single gender making up at least `min_share` of them;
+    otherwise it is left for the model.
+    """
+
+    def __init__(self, min_count: int = 1, min_share: float = 0.9):
+        self.min_count = min_count
+        self.min_share = min_share
+        self._counts: Dict[str, Counter] = defaultdict(Counter)
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, name: str, gender: str) -> None:
+        if gender not in ("Masculino", "Feminino") or not isinstance(name, str):
+            return
+        for key in name_keys(name)[1]:
+            self._counts[key][gender] += 1
+
+    def update(self, classification: GenderClassification) -> None:
+        """Learn from a previous classification, ignoring Unknown results."""
+        for item in classification.results:
+            self.add(item.name, item.gender)
+
+    @classmethod
+    def from_metadata(
+        cls,
+        df: pd.DataFrame,
+        columns: Iterable[Tuple[str, str]] = GENDER_NAME_COLUMNS,
+        **kwargs,
+    ) -> "NameGenderLexicon":
+        """Build the lexicon from the reviewed metadata (name, gender) columns present in `df`."""
+        lexicon = cls(**kwargs)
+        for name_column, gender_column in columns:
+            if name_column in df.columns and gender_column in df.columns:
+                for name, gender in zip(df[name_column], df[gender_column]):
+                    lexicon.add(name, gender)
+        return lexicon
+
+    def lookup(self, name: str) -> Literal["Masculino", "Feminino"] | None:
+        title_gender, keys = name_keys(name)
+        if title_gender is not None:
+            return title_gender
+        for key in keys:
+            counts = self._counts.get(key)
+            if not counts:
+                continue
+            gender, n = counts.most_common(1)[0]
+            total = sum(counts.values())
+            if total >= self.min_count and n / total >= self.min_share:
+                return gender
+            return None  # Seen but ambiguous: do not fall back to a less specific key.
+        return None
+
+
+def classify_genders(
+    names: List[str],
+    lexicon: NameGenderLexicon,
+    fallback: Callable[[List[str]], GenderClassification | None] | None = None,
+) -> GenderClassification:
+    """
+    Classify names with the lexicon, sending only unresolved names (once
+    each) to `fallback`, by default `get_gender_map`. Names the model does
+    not return, or all of them if it fails, are marked Unknown.
+
+    Results follow the order of `names`; missing or blank names (NaN cells
+    from the metadata sheet) are reported as an empty Unknown item.
+    """
+    fallback = fallback or get_gender_map
+    present = [n for n in dict.fromkeys(names) if isinstance(n, str) and n.strip()]
+    resolved: Dict[str, str] = {}
+    for name in present:
+        gender = lexicon.lookup(name)
+        if gender is not None:
+            resolved[name] = gender
+
+    unresolved = [n for n in present if n not in resolved]
+    increment("gender.lexicon_hits", len(resolved))
+    increment("gender.llm_names", len(unresolved))
+    if unresolved:
+        model_result = fallback(unresolved)
+        if model_result is not None:
+            by_name = {item.name.strip(): item.gender for item in model_result.results}
+            for name in unresolved:
+                if name.strip() in by_name:
+                    resolved[name] = by_name[name.strip()]
+
+    return GenderClassification(results=[
+        GenderItem(name=name, gender=resolved.get(name, "Unknown")) if name in resolved
+        else GenderItem(name=name if isinstance(name, str) else "", gender="Unknown")
+        for name in names
+    ])
+
+
+@timed()
 def get_gender_map(names: List[str]) -> GenderClassification | None:
     if not all(isinstance(n, str) and n.strip() for n in names):
         raise ValueError("All names must be non-empty strings")
@@ -61,6 +213,7 @@ def get_gender_map(names: List[str]) -> GenderClassification | None:
     )
 
     try:
+        request_start = time.perf_counter()
         response = client.models.generate_content(
             model="gemini-3-pro-preview",
             contents=[
@@ -68,6 +221,7 @@ def get_gender_map(names: List[str]) -> GenderClassification | None:
             ],
             config=config,
         )
+        record_llm_call("llm.get_gender_map", time.perf_counter() - request_start, response.usage_metadata)
 
         assert isinstance((response_parsed := response.parsed), GenderClassification)
 
@@ -79,9 +233,11 @@ def get_gender_map(names: List[str]) -> GenderClassification | None:
 
 if __name__ == "__main__":
     metadata_path = Path("/home/antonio-moreira/Documents/my-masters-degree/notebooks/TESTE_DEV_TRAIN_mupe_metadados_289.xlsx - df_full6.csv")
+    reviewed_path = Path("/home/antonio-moreira/Documents/my-masters-degree/notebooks/mupe_metadata_sp_gender_slice_reviewed.csv")
     metadata_raw = pd.read_csv(metadata_path)
     display(metadata_raw.head())
     metadata_processed = preprocess_metadata_dataset(metadata_raw)
     mupe_metadata_sp = metadata_processed[metadata_processed['birth_state'].str.contains('Paulo')].reset_index(drop=True)
-    names_mapped = get_gender_map(metadata_processed['interviewee_name'].tolist())
+    lexicon = NameGenderLexicon.from_metadata(pd.read_csv(reviewed_path))
+    names_mapped = classify_genders(metadata_processed['interviewee_name'].tolist(), lexicon)
     rich.print(rich.inspect(names_mapped))
\ No newline at end of file
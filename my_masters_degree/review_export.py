@@ -0,0 +1,128 @@
+"""
+Excel workbooks for annotator review, one per interview, with each group's
+rows filled in its own colour.
+
+Rows are streamed with openpyxl's write-only mode and colouring is done by
+one conditional-format rule per group on the `group_id` column, so no
+per-cell style is written. The palette is generated for any number of
+groups by stepping the hue by the golden ratio.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import PatternFill
+from openpyxl.utils import get_column_letter
+
+from my_masters_degree.instrumentation import increment, timed
+from my_masters_degree.utils import bounded_map, default_in_flight, hls_to_hex
+
+GOLDEN_RATIO_CONJUGATE = 0.618033988749895
+REVIEW_FILE_TEMPLATE = "mupe_train_sample_{}.xlsx"
+
+
+def group_palette(n: int, lightness: Tuple[float, float] = (80, 88), saturation: float = 65) -> List[str]:
+    """
+    `n` distinct light colours as hex strings. Hues follow the golden-ratio
+    sequence, and lightness alternates so that neighbouring groups differ
+    even when their hues come close. A colour already used (hues that round
+    to the same hex) is nudged along the hue circle, then in saturation once
+    the circle is exhausted.
+    """
+    palette: List[str] = []
+    used = set()
+    for i in range(n):
+        hue = (i * GOLDEN_RATIO_CONJUGATE % 1.0) * 360
+        sat = saturation
+        color = hls_to_hex(hue, lightness[i % 2], sat)
+        step = 0
+        while color in used:
+            step += 1
+            if step % 720 == 0:
+                sat = (sat + 7) % 100
+            hue = (hue + 0.5) % 360
+            color = hls_to_hex(hue, lightness[i % 2], sat)
+        used.add(color)
+        palette.append(color)
+    return palette
+
+
+def _cell_value(value: Any) -> Any:
+    """Values openpyxl can write: lists and enums as text, missing as empty."""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return str(list(value))
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def write_review_workbook(df: pd.DataFrame, path: Path, group_column: str = "group_id") -> Path:
+    """Stream `df` into a single-sheet workbook with one fill per group."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("review")
+    ws.freeze_panes = "A2"
+
+    columns = list(df.columns)
+    ws.append(columns)
+    for row in df.itertuples(index=False, name=None):
+        ws.append([_cell_value(v) for v in row])
+
+    if group_column in columns and len(df):
+        group_letter = get_column_letter(columns.index(group_column) + 1)
+        cell_range = f"A2:{get_column_letter(len(columns))}{len(df) + 1}"
+        groups = pd.unique(df[group_column].dropna())
+        for group, color in zip(groups, group_palette(len(groups))):
+            fill = PatternFill(start_color=color[1:], end_color=color[1:], fill_type="solid")
+            ws.conditional_formatting.add(
+                cell_range,
+                FormulaRule(formula=[f"${group_letter}2={_cell_value(group)}"], fill=fill),
+            )
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return path
+
+
+def _write_review_task(task: Tuple[pd.DataFrame, Path]) -> Path:
+    df, path = task
+    return write_review_workbook(df, path)
+
+
+@timed()
+def export_review_workbooks(
+    samples: Dict[Hashable, pd.DataFrame] | Iterable[Tuple[Hashable, pd.DataFrame]],
+    output_dir: Path,
+    max_workers: int | None = None,
+) -> List[Path]:
+    """
+    Write one review workbook per interview (`mupe_train_sample_{key}.xlsx`)
+    in a process pool. `samples` may be a generator of (key, frame) pairs,
+    which is consumed as workbooks are written, keeping only a few frames
+    queued for the pool. Returns the paths in the order of `samples`.
+    """
+    pairs = samples.items() if isinstance(samples, dict) else samples
+    rows = 0
+
+    def tasks():
+        nonlocal rows
+        for key, df in pairs:
+            rows += len(df)
+            yield df, output_dir / REVIEW_FILE_TEMPLATE.format(key)
+
+    if max_workers == 1:
+        paths = list(map(_write_review_task, tasks()))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            paths = list(bounded_map(executor, _write_review_task, tasks(), default_in_flight(max_workers)))
+    increment("review_export.workbooks", len(paths))
+    increment("review_export.rows", rows)
+    return paths
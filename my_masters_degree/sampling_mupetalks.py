@@ -1,46 +1,33 @@
+import argparse
+import glob
 import pandas as pd
 import os
 import io
 import json
 import ast
-from typing import List, Dict, Any, Tuple
+import re
+from typing import List, Dict, Any, Iterable, Tuple
 import soundfile as sf
 import numpy as np
+import pyarrow.parquet as pq
 
-def get_speaker_dialogues(csv_path: str, speaker_code: str, num_dialogues: int = 5) -> List[Dict[str, Any]]:
+from my_masters_degree.dialogue_index import DialogueIndex
+from my_masters_degree.instrumentation import increment, span, timed, write_report
+from my_masters_degree.partitioning import partition_of
+from my_masters_degree.utils import atomic_write_bytes, file_sha256
+
+def get_speaker_dialogues(csv_path: str, speaker_code: str, num_dialogues: int = 5, index: DialogueIndex | None = None) -> List[Dict[str, Any]]:
     """
     Reads the metadata CSV and extracts a specified number of dialogues (interviews)
     for a given speaker.
+
+    Pass a prebuilt `index` to query many speakers without re-reading the CSV.
     """
-    df = pd.read_csv(csv_path)
-    
-    # We want 5 distinct interviews for this speaker
-    speaker_interviews = df[df['speaker_code'] == speaker_code]['interview_id'].unique()
-    
-    if len(speaker_interviews) < num_dialogues:
-        raise ValueError(f"Speaker {speaker_code} participates in only {len(speaker_interviews)} interviews, but {num_dialogues} were requested.")
-    
-    selected_interview_ids = speaker_interviews[:num_dialogues]
-    
-    dialogues = []
-    for interview_id in selected_interview_ids:
-        interview_df = df[df['interview_id'] == interview_id].sort_values(['group_id', 'start_time'])
-        
-        # Group by group_id
-        groups = []
-        for group_id, group_df in interview_df.groupby('group_id'):
-            groups.append({
-                'group_id': int(group_id),
-                'turns': group_df.to_dict(orient='records')
-            })
-            
-        dialogues.append({
-            'interview_id': interview_id,
-            'groups': groups
-        })
-        
-    return dialogues
+    if index is None:
+        index = DialogueIndex.from_csv(csv_path)
+    return index.speaker_dialogues(speaker_code, num_dialogues)
 
+@timed()
 def extract_audio_from_parquets(file_paths: List[str], parquet_dir: str) -> Dict[str, bytes]:
     """
     Finds and extracts audio bytes for a list of file paths from parquet files.
@@ -48,16 +35,15 @@ def extract_audio_from_parquets(file_paths: List[str], parquet_dir: str) -> Dict
     audio_map = {}
     needed_paths = set(file_paths)
     
-    data_dir = os.path.join(parquet_dir, 'data')
-    parquet_files = [f for f in os.listdir(data_dir) if f.endswith('.parquet') and 'train' in f]
-    
-    for pf in sorted(parquet_files):
+    for full_path in parquet_shards(parquet_dir):
         if not needed_paths:
             break
-            
-        full_path = os.path.join(data_dir, pf)
+
         # Use a more efficient way if possible, but for 74 files it's okay for once
         df = pd.read_parquet(full_path, columns=['file_path', 'audio'])
+        increment("parquet.files_read")
+        increment("parquet.rows_read", len(df))
+        increment("parquet.bytes_read", os.path.getsize(full_path))
         
         mask = df['file_path'].isin(needed_paths)
         matches = df[mask]
@@ -70,6 +56,44 @@ def extract_audio_from_parquets(file_paths: List[str], parquet_dir: str) -> Dict
             
     return audio_map
 
+PARQUET_SHARD_PATTERN = "*train*.parquet"
+
+def parquet_shards(parquet_dir: str) -> List[str]:
+    """The CORAA-MUPE train shards under `parquet_dir/data`, in name order."""
+    return sorted(glob.glob(os.path.join(parquet_dir, "data", PARQUET_SHARD_PATTERN)))
+
+@timed()
+def locate_clips(file_paths: Iterable[str] | None, parquet_dir: str) -> Dict[str, Tuple[str, int, int]]:
+    """
+    (shard, row group, row) of each clip, scanning only the `file_path`
+    column of the shards. With `file_paths=None` every clip is located;
+    paths not in any shard are left out.
+    """
+    needed = None if file_paths is None else set(file_paths)
+    locations = {}
+    for shard in parquet_shards(parquet_dir):
+        parquet_file = pq.ParquetFile(shard)
+        for rg in range(parquet_file.num_row_groups):
+            paths = parquet_file.read_row_group(rg, columns=["file_path"])["file_path"].to_pylist()
+            for row, path in enumerate(paths):
+                if needed is None or path in needed:
+                    locations[path] = (shard, rg, row)
+    return locations
+
+def read_located_clips(locations: Dict[str, Tuple[str, int, int]]) -> Dict[str, bytes]:
+    """Audio bytes of located clips, reading each row group they fall in once."""
+    by_row_group: Dict[Tuple[str, int], List[Tuple[str, int]]] = {}
+    for path, (shard, rg, row) in locations.items():
+        by_row_group.setdefault((shard, rg), []).append((path, row))
+
+    audio_map = {}
+    for (shard, rg), rows in by_row_group.items():
+        audio = pq.ParquetFile(shard).read_row_group(rg, columns=["audio"]).column("audio")
+        increment("parquet.row_groups_read")
+        for path, row in rows:
+            audio_map[path] = audio[row].as_py()["bytes"]
+    return audio_map
+
 def join_audio_segments(audio_bytes_list: List[bytes]) -> Tuple[np.ndarray, int]:
     """
     Joins multiple audio byte segments into a single numpy array.
@@ -80,6 +104,8 @@ def join_audio_segments(audio_bytes_list: List[bytes]) -> Tuple[np.ndarray, int]
     
     for b in audio_bytes_list:
         data, sr = sf.read(io.BytesIO(b))
+        increment("audio.bytes_decoded", len(b))
+        increment("audio.samples_decoded", len(data))
         if samplerate is None:
             samplerate = sr
         elif samplerate != sr:
@@ -92,6 +118,142 @@ def join_audio_segments(audio_bytes_list: List[bytes]) -> Tuple[np.ndarray, int]
     combined = np.concatenate(all_data)
     return combined, samplerate
 
+CLIP_TIMES_RE = re.compile(r"_(?P<start>\d+(?:\.\d+)?)_(?P<end>\d+(?:\.\d+)?)\.wav$")
+VAD_FRAME_SECONDS = 0.02
+VAD_THRESHOLD_DB = -40.0
+VAD_MARGIN_SECONDS = 0.05
+MIN_PAUSE_SECONDS = 0.1
+MAX_PAUSE_SECONDS = 1.0
+STITCH_MODES = ("concat", "gaps")
+
+def clip_times(path: str) -> Tuple[float, float] | None:
+    """(start, end) in seconds encoded in a CORAA-MUPE clip name, e.g. `..._46.303_48.224.wav`."""
+    match = CLIP_TIMES_RE.search(path)
+    if match is None:
+        return None
+    return float(match["start"]), float(match["end"])
+
+def trim_silence(
+    segments: List[np.ndarray],
+    sr: int,
+    frame_seconds: float = VAD_FRAME_SECONDS,
+    threshold_db: float = VAD_THRESHOLD_DB,
+    margin_seconds: float = VAD_MARGIN_SECONDS,
+) -> np.ndarray:
+    """
+    [start, stop) sample range of the speech in each segment.
+
+    All segments are cut into frames in one zero-padded (frames, frame_len)
+    array, and a frame is voiced when its energy is within `threshold_db`
+    of the loudest frame of the whole group. Each range spans the first to
+    last voiced frame plus `margin_seconds`; silent segments get an empty
+    range.
+    """
+    frame_len = max(1, int(round(frame_seconds * sr)))
+    lengths = np.array([len(s) for s in segments], dtype=np.int64)
+    n_frames = -(-lengths // frame_len)
+    if n_frames.sum() == 0:
+        return np.zeros((len(segments), 2), dtype=np.int64)
+
+    frames = np.concatenate([
+        np.pad(s if s.ndim == 1 else s.mean(axis=1), (0, n * frame_len - len(s))) for s, n in zip(segments, n_frames)
+    ]).reshape(-1, frame_len)
+    energy_db = 10 * np.log10(np.mean(np.square(frames, dtype=np.float64), axis=1) + 1e-12)
+    voiced = energy_db >= energy_db.max() + threshold_db
+
+    owner = np.repeat(np.arange(len(segments)), n_frames)
+    first_frame = np.concatenate([[0], np.cumsum(n_frames)[:-1]])
+    voiced_owner = owner[voiced]
+    voiced_frame = np.flatnonzero(voiced) - first_frame[voiced_owner]
+
+    # n_frames is past any frame index of its segment, so it never wins the minimum.
+    first = n_frames.copy()
+    last = np.full(len(segments), -1, dtype=np.int64)
+    np.minimum.at(first, voiced_owner, voiced_frame)
+    np.maximum.at(last, voiced_owner, voiced_frame)
+
+    margin = int(round(margin_seconds * sr))
+    has_speech = last >= 0
+    starts = np.where(has_speech, np.maximum(first * frame_len - margin, 0), 0)
+    stops = np.where(has_speech, np.minimum((last + 1) * frame_len + margin, lengths), 0)
+    return np.stack([starts, stops], axis=1)
+
+
+def stitch_turns(
+    turns: List[Dict[str, Any]],
+    audio_map: Dict[str, bytes],
+    min_pause: float = MIN_PAUSE_SECONDS,
+    max_pause: float = MAX_PAUSE_SECONDS,
+    **vad_kwargs: Any,
+) -> Tuple[np.ndarray, int, List[Tuple[float, float]]]:
+    """
+    Join the clips of a group's turns with their edge silence trimmed and
+    the pauses of the original recording restored.
+
+    The pause before a clip is the timestamp gap to the previous clip (from
+    the clip names, or the turn's start/end_time for single-clip turns)
+    plus the silence trimmed on both sides, clamped to
+    [`min_pause`, `max_pause`]. Everything is written into one
+    preallocated buffer.
+
+    Returns (audio_data, samplerate, offsets), with offsets the
+    (start, end) time in seconds of each turn in the output.
+    """
+    clips, owners, times = [], [], []
+    samplerate = None
+    for t, turn in enumerate(turns):
+        paths = [p for p in parse_paths(turn['file_path']) if p in audio_map]
+        for p in paths:
+            data, sr = sf.read(io.BytesIO(audio_map[p]))
+            increment("audio.bytes_decoded", len(audio_map[p]))
+            increment("audio.samples_decoded", len(data))
+            if samplerate is None:
+                samplerate = sr
+            elif samplerate != sr:
+                raise ValueError(f"Sample rate mismatch: {samplerate} != {sr}")
+            span_times = clip_times(p)
+            if span_times is None and len(paths) == 1 and 'start_time' in turn and 'end_time' in turn:
+                span_times = (float(turn['start_time']), float(turn['end_time']))
+            clips.append(data)
+            owners.append(t)
+            times.append(span_times or (np.nan, np.nan))
+
+    if not clips:
+        return np.array([]), 0, [(0.0, 0.0)] * len(turns)
+
+    bounds = trim_silence(clips, samplerate, **vad_kwargs)
+    lengths = np.array([len(c) for c in clips])
+    times_arr = np.array(times, dtype=np.float64)
+
+    # Silence between consecutive clips: the gap between their timestamps
+    # (0 when unknown) plus what was trimmed from their facing edges.
+    gaps = np.nan_to_num(times_arr[1:, 0] - times_arr[:-1, 1], nan=0.0)
+    trimmed = ((lengths[:-1] - bounds[:-1, 1]) + bounds[1:, 0]) / samplerate
+    pauses = np.clip(np.maximum(gaps, 0.0) + trimmed, min_pause, max_pause)
+    pause_samples = np.concatenate([[0], np.round(pauses * samplerate).astype(np.int64)])
+
+    kept = bounds[:, 1] - bounds[:, 0]
+    # Silent clips add neither audio nor a pause of their own.
+    pause_samples[kept == 0] = 0
+    starts = np.cumsum(pause_samples + np.concatenate([[0], kept[:-1]]))
+    total = int(starts[-1] + kept[-1])
+
+    output = np.zeros((total,) + clips[0].shape[1:], dtype=clips[0].dtype)
+    for clip, (lo, hi), start in zip(clips, bounds, starts):
+        output[start:start + hi - lo] = clip[lo:hi]
+
+    offsets = []
+    owners_arr = np.array(owners)
+    for t in range(len(turns)):
+        mine = np.flatnonzero(owners_arr == t)
+        if len(mine) == 0:
+            previous_end = offsets[-1][1] if offsets else 0.0
+            offsets.append((previous_end, previous_end))
+            continue
+        offsets.append((starts[mine[0]] / samplerate, (starts[mine[-1]] + kept[mine[-1]]) / samplerate))
+    increment("audio.samples_trimmed", int(lengths.sum() - kept.sum()))
+    return output, samplerate, [(float(a), float(b)) for a, b in offsets]
+
 def parse_paths(fp: str) -> List[str]:
     # Replace PosixPath string representation to standard python list of strings
     if isinstance(fp, str):
@@ -99,81 +261,228 @@ def parse_paths(fp: str) -> List[str]:
         return ast.literal_eval(fp)
     return [fp]
 
+MANIFEST_NAME = "manifest.json"
+MANIFEST_SAVE_EVERY = 50
+
+
+def partition_manifest_name(partition: int, num_partitions: int) -> str:
+    return f"manifest.part-{partition:05d}-of-{num_partitions:05d}.json"
+
+def load_manifest(output_dir: str, name: str = MANIFEST_NAME) -> Dict[str, Any]:
+    path = os.path.join(output_dir, name)
+    if not os.path.exists(path):
+        return {"groups": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(output_dir: str, manifest: Dict[str, Any], name: str = MANIFEST_NAME) -> None:
+    atomic_write_bytes(
+        os.path.join(output_dir, name),
+        json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8"),
+    )
+
+def is_group_complete(output_dir: str, entry: Dict[str, Any]) -> bool:
+    """True if every file of a manifest entry exists with its recorded checksum."""
+    for rel_path, checksum in entry["files"].items():
+        path = os.path.join(output_dir, rel_path)
+        if not os.path.exists(path) or file_sha256(path) != checksum:
+            return False
+    return True
+
+def export_samples(
+    interviews: List[Dict[str, Any]],
+    parquet_dir: str,
+    output_dir: str,
+    resume: bool = False,
+    run_info: Dict[str, Any] | None = None,
+    stitch: str = "concat",
+    partition: Tuple[int, int] | None = None,
+) -> Dict[str, Any]:
+    """
+    Write one wav/json pair per group of each interview under
+    `output_dir/sample_{i}/sample_{i}_groups/`.
+
+    Every file is written atomically and recorded, with its sha256, in
+    `output_dir/manifest.json`, which is saved every `MANIFEST_SAVE_EVERY`
+    groups and at the end. Groups with none of their clips in the parquets
+    are recorded with status "missing_audio". With `resume`, groups whose
+    manifest entry still verifies are skipped and audio is only fetched
+    from the parquets for the remaining groups.
+
+    `stitch="concat"` joins the clips back to back; `stitch="gaps"` uses
+    `stitch_turns` and adds each turn's `audio_start`/`audio_end` (seconds
+    into the wav) to the json.
+
+    With `partition=(k, n)`, only the interviews whose interview_id hashes
+    to partition k of n are exported, and the manifest is written as
+    `manifest.part-{k}-of-{n}.json`; sample numbering stays global, so
+    partitions can share `output_dir`. See `merge_export_manifests`.
+
+    Raises
+    ------
+    ValueError
+        If resuming a manifest written for a different `run_info`, or for
+        an unknown `stitch` mode.
+    """
+    if stitch not in STITCH_MODES:
+        raise ValueError(f"Unknown stitch mode {stitch!r}; use one of {STITCH_MODES}")
+    os.makedirs(output_dir, exist_ok=True)
+    run_info = run_info or {}
+    manifest_name = MANIFEST_NAME if partition is None else partition_manifest_name(*partition)
+    manifest = load_manifest(output_dir, manifest_name) if resume else {"groups": {}}
+    if resume and manifest.get("run", run_info) != run_info:
+        raise ValueError(f"Manifest in {output_dir} was written for {manifest['run']}, not {run_info}")
+    manifest["run"] = run_info
+
+    pending = []
+    for i, interview in enumerate(interviews):
+        if partition is not None and partition_of(interview['interview_id'], partition[1]) != partition[0]:
+            continue
+        for group in interview['groups']:
+            key = f"sample_{i}/sample_{i}_id{group['group_id']}"
+            entry = manifest["groups"].get(key)
+            if entry is not None and is_group_complete(output_dir, entry):
+                increment("export.groups_skipped")
+                continue
+            manifest["groups"].pop(key, None)
+            pending.append((i, interview, group, key))
+
+    print(f"{len(pending)} groups to export, {len(manifest['groups'])} already done")
+    needed_files = sorted({
+        p for _, _, group, _ in pending for turn in group['turns'] for p in parse_paths(turn['file_path'])
+    })
+    if needed_files:
+        print(f"Searching for {len(needed_files)} unique audio files in parquets...")
+    audio_map = extract_audio_from_parquets(needed_files, parquet_dir) if needed_files else {}
+
+    if len(audio_map) < len(needed_files):
+        missing = set(needed_files) - set(audio_map.keys())
+        print(f"Warning: {len(missing)} files not found in parquets: {list(missing)[:5]}...")
+
+    for n, (i, interview, group, key) in enumerate(pending):
+        if n and n % MANIFEST_SAVE_EVERY == 0:
+            # A crash loses at most the groups done since this save; resume redoes them.
+            save_manifest(output_dir, manifest, manifest_name)
+        group_audio_bytes = [
+            audio_map[p] for turn in group['turns'] for p in parse_paths(turn['file_path']) if p in audio_map
+        ]
+        if not group_audio_bytes:
+            manifest["groups"][key] = {
+                "interview_id": interview['interview_id'],
+                "group_id": group['group_id'],
+                "status": "missing_audio",
+                "files": {},
+            }
+            increment("export.groups_missing_audio")
+            continue
+
+        turns = group['turns']
+        with span("decode"):
+            if stitch == "gaps":
+                audio_data, sr, offsets = stitch_turns(turns, audio_map)
+                turns = [dict(turn, audio_start=start, audio_end=end) for turn, (start, end) in zip(turns, offsets)]
+            else:
+                audio_data, sr = join_audio_segments(group_audio_bytes)
+
+        groups_dir = os.path.join(output_dir, f"sample_{i}", f"sample_{i}_groups")
+        os.makedirs(groups_dir, exist_ok=True)
+        stem = f"sample_{i}_id{group['group_id']}"
+
+        with span("write"):
+            wav_buffer = io.BytesIO()
+            sf.write(wav_buffer, audio_data, sr, format="WAV")
+            files = {}
+            for name, data in (
+                (f"{stem}.wav", wav_buffer.getvalue()),
+                (f"{stem}.json", json.dumps(turns, indent=2, ensure_ascii=False).encode("utf-8")),
+            ):
+                rel_path = os.path.join(f"sample_{i}", f"sample_{i}_groups", name)
+                files[rel_path] = atomic_write_bytes(os.path.join(output_dir, rel_path), data)
+
+        manifest["groups"][key] = {
+            "interview_id": interview['interview_id'],
+            "group_id": group['group_id'],
+            "status": "ok",
+            "files": files,
+        }
+        increment("export.groups_written")
+
+    save_manifest(output_dir, manifest, manifest_name)
+    return manifest
+
+def merge_export_manifests(output_dir: str, num_partitions: int) -> Dict[str, Any]:
+    """
+    Combine the manifests of a partitioned export into `manifest.json`,
+    with groups in sample order.
+
+    Raises
+    ------
+    ValueError
+        If a partition manifest is missing, was written for a different
+        run, or lists a group whose files do not verify.
+    """
+    manifests = []
+    for partition in range(num_partitions):
+        name = partition_manifest_name(partition, num_partitions)
+        if not os.path.exists(os.path.join(output_dir, name)):
+            raise ValueError(f"Partition {partition} of {num_partitions} has no manifest in {output_dir}")
+        manifests.append(load_manifest(output_dir, name))
+
+    run_info = manifests[0].get("run", {})
+    groups = {}
+    for partition, manifest in enumerate(manifests):
+        if manifest.get("run", {}) != run_info:
+            raise ValueError(f"Partition {partition} was run with {manifest.get('run')}, not {run_info}")
+        for key, entry in manifest["groups"].items():
+            if not is_group_complete(output_dir, entry):
+                raise ValueError(f"Group {key} of partition {partition} is incomplete")
+            groups[key] = entry
+
+    def sample_order(key: str) -> Tuple[int, int]:
+        sample, group = key.split("/")
+        return int(sample.removeprefix("sample_")), int(group.rsplit("_id", 1)[1])
+
+    merged = {"run": run_info, "groups": {key: groups[key] for key in sorted(groups, key=sample_order)}}
+    save_manifest(output_dir, merged)
+    return merged
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Export MupeTalk group samples of one speaker")
+    parser.add_argument("--resume", action="store_true", help="Skip groups already recorded in the output manifest")
+    parser.add_argument("--num-partitions", type=int, default=1, help="Split the interviews across this many independent runs")
+    parser.add_argument("--partition", type=int, default=0, help="Partition exported by this run, from 0 to num-partitions - 1")
+    parser.add_argument("--merge", action="store_true", help="Combine the manifests of a partitioned export")
+    parser.add_argument("--stitch", choices=STITCH_MODES, default="concat",
+                        help="Join clips back to back, or trim their silence and restore the recorded pauses")
+    args = parser.parse_args()
+
     csv_path = 'notebooks/mupetalk_train_v2.csv'
     parquet_dir = 'notebooks/datasets/CORAA-MUPE'
     output_dir = 'my_masters_degree/samples'
+    if args.merge:
+        manifest = merge_export_manifests(output_dir, args.num_partitions)
+        print(f"Merged {args.num_partitions} partitions, {len(manifest['groups'])} groups, in {output_dir}")
+        return
     # Using EBP007 since it has 4 interviews
     speaker_code = 'EBP007'
+    num_dialogues = 4
     
-    print(f"Extracting 4 interviews for speaker {speaker_code}...")
-    interviews = get_speaker_dialogues(csv_path, speaker_code, num_dialogues=4)
-    
-    all_needed_files = []
-    for interview in interviews:
-        for group in interview['groups']:
-            for turn in group['turns']:
-                paths = parse_paths(turn['file_path'])
-                all_needed_files.extend(paths)
-            
-    unique_files = list(set(all_needed_files))
-    print(f"Searching for {len(unique_files)} unique audio files in parquets...")
-    audio_map = extract_audio_from_parquets(unique_files, parquet_dir)
-    
-    if len(audio_map) < len(unique_files):
-        missing = set(unique_files) - set(audio_map.keys())
-        print(f"Warning: {len(missing)} files not found in parquets: {list(missing)[:5]}...")
-    
-    os.makedirs(output_dir, exist_ok=True)
-    
-    for i, interview in enumerate(interviews):
-        print(f"Processing interview {i+1}/{len(interviews)} (interview_id: {interview['interview_id']})...")
-        
-        sample_dir = os.path.join(output_dir, f"sample_{i}")
-        os.makedirs(sample_dir, exist_ok=True)
-        
-        groups_dir = os.path.join(sample_dir, f"sample_{i}_groups")
-        os.makedirs(groups_dir, exist_ok=True)
-        
-        interview_audio_bytes = []
-        interview_metadata = []
-        
-        for group in interview['groups']:
-            group_audio_bytes = []
-            group_metadata = group['turns']
-            interview_metadata.extend(group['turns'])
-            
-            for turn in group['turns']:
-                paths = parse_paths(turn['file_path'])
-                for p in paths:
-                    if p in audio_map:
-                        group_audio_bytes.append(audio_map[p])
-                        interview_audio_bytes.append(audio_map[p])
-            
-            # Save group
-            if group_audio_bytes:
-                audio_data, sr = join_audio_segments(group_audio_bytes)
-                group_id = group['group_id']
-                
-                audio_path = os.path.join(groups_dir, f"sample_{i}_id{group_id}.wav")
-                sf.write(audio_path, audio_data, sr)
-                
-                meta_path = os.path.join(groups_dir, f"sample_{i}_id{group_id}.json")
-                with open(meta_path, 'w', encoding='utf-8') as f:
-                    json.dump(group_metadata, f, indent=2, ensure_ascii=False)
-        
-        # Save interview
-        # if interview_audio_bytes:
-        #     audio_data, sr = join_audio_segments(interview_audio_bytes)
-            
-        #     audio_path = os.path.join(sample_dir, f"sample_{i}.wav")
-        #     sf.write(audio_path, audio_data, sr)
-            
-        #     meta_path = os.path.join(sample_dir, f"sample_{i}.json")
-        #     with open(meta_path, 'w', encoding='utf-8') as f:
-        #         json.dump(interview_metadata, f, indent=2, ensure_ascii=False)
-                
-        print(f"Saved interview sample {i} to {sample_dir}")
+    print(f"Extracting {num_dialogues} interviews for speaker {speaker_code}...")
+    with span("get_speaker_dialogues"):
+        interviews = get_speaker_dialogues(csv_path, speaker_code, num_dialogues=num_dialogues)
+
+    run_info = {"csv_path": csv_path, "speaker_code": speaker_code, "num_dialogues": num_dialogues, "stitch": args.stitch}
+    partition = (args.partition, args.num_partitions) if args.num_partitions > 1 else None
+    manifest = export_samples(
+        interviews, parquet_dir, output_dir,
+        resume=args.resume, run_info=run_info, stitch=args.stitch, partition=partition,
+    )
+    written = sum(entry.get("status", "ok") == "ok" for entry in manifest["groups"].values())
+    print(f"Saved {written} of {len(manifest['groups'])} groups to {output_dir}")
+
+    report_path = write_report(run_name="sampling_mupetalks")
+    if report_path is not None:
+        print(f"Profile report saved to {report_path}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,145 @@
+"""
+ASR quality filter for MupeTalk groups.
+
+Every segment is scored against a reference text (the aligned PDF
+transcript, or a second ASR hypothesis) with WER and CER. Scoring is done
+in chunks with `werpy.wers` in a process pool. Segments above the
+threshold are dropped, which splits their group in two; pieces shorter
+than `min_len_group` are dropped as in `get_group_mapping`.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from my_masters_degree.instrumentation import increment, timed
+from my_masters_degree.transcript_alignment import batch_wer, normalize_token
+
+CHUNK_SIZE = 5000
+SCORE_COLUMNS = ["wer", "cer"]
+
+
+def normalize_text(text: str) -> str:
+    """Words normalised as in the transcript alignment, joined by spaces."""
+    if not isinstance(text, str):
+        return ""
+    return " ".join(t for t in map(normalize_token, text.split()) if t)
+
+
+def _as_characters(text: str) -> str:
+    """Spell a normalised text out so that werpy counts characters."""
+    return " ".join(text.replace(" ", "|"))
+
+
+def _score_chunk(pairs: Tuple[List[str], List[str]]) -> np.ndarray:
+    """Worker: (n, 2) array of WER and CER for a chunk of text pairs."""
+    references = [normalize_text(r) for r in pairs[0]]
+    hypotheses = [normalize_text(h) for h in pairs[1]]
+    wer = batch_wer(references, hypotheses)
+    cer = batch_wer([_as_characters(r) for r in references], [_as_characters(h) for h in hypotheses])
+    return np.column_stack([wer, cer])
+
+
+@timed()
+def score_segments(
+    references: List[str],
+    hypotheses: List[str],
+    max_workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> np.ndarray:
+    """
+    WER and CER of each hypothesis against its reference.
+
+    Returns
+    -------
+    np.ndarray
+        Shape (n, 2), columns as in SCORE_COLUMNS.
+    """
+    chunks = [
+        (references[i:i + chunk_size], hypotheses[i:i + chunk_size])
+        for i in range(0, len(references), chunk_size)
+    ]
+    if not chunks:
+        return np.empty((0, 2))
+
+    if max_workers == 1:
+        results = list(map(_score_chunk, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_score_chunk, chunks))
+    increment("quality.segments_scored", len(references))
+    return np.vstack(results)
+
+
+def add_quality_scores(
+    df: pd.DataFrame,
+    reference_column: str,
+    hypothesis_column: str = "original_text",
+    max_workers: int | None = None,
+) -> pd.DataFrame:
+    """
+    Return a copy of `df` with `wer` and `cer` columns. Rows without a
+    reference are left unscored (NaN).
+    """
+    df = df.copy()
+    df[SCORE_COLUMNS] = np.nan
+    has_reference = df[reference_column].fillna("").astype(str).str.strip() != ""
+    scored = df.loc[has_reference]
+    df.loc[has_reference, SCORE_COLUMNS] = score_segments(
+        scored[reference_column].astype(str).tolist(),
+        scored[hypothesis_column].fillna("").astype(str).tolist(),
+        max_workers=max_workers,
+    )
+    return df
+
+
+@timed()
+def filter_groups(
+    df: pd.DataFrame,
+    max_wer: float = 0.3,
+    max_cer: float | None = None,
+    min_len_group: int = 5,
+) -> pd.DataFrame:
+    """
+    Drop segments above the thresholds and split their groups.
+
+    Within each (interview_id, group_id), the rows kept on either side of a
+    dropped segment become separate groups; groups shorter than
+    `min_len_group` are dropped and the remaining ones renumbered from 1 per
+    interview, in their original order. Unscored rows are kept.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        MupeTalk rows with `interview_id`, `group_id`, `start_time` and the
+        SCORE_COLUMNS added by `add_quality_scores`.
+    max_wer : float
+        Highest WER a segment may have.
+    max_cer : float | None
+        Highest CER a segment may have, not checked if None.
+    min_len_group : int
+        Minimum number of turns of a group after splitting.
+
+    Returns
+    -------
+    pd.DataFrame
+        The kept rows, with renumbered `group_id`.
+    """
+    df = df.sort_values(["interview_id", "group_id", "start_time"])
+    bad = (df["wer"] > max_wer).to_numpy()
+    if max_cer is not None:
+        bad |= (df["cer"] > max_cer).to_numpy()
+
+    # A new piece starts at each group start and after each dropped segment.
+    new_group = (df[["interview_id", "group_id"]] != df[["interview_id", "group_id"]].shift()).any(axis=1).to_numpy()
+    piece = np.cumsum(new_group | np.roll(bad, 1))
+
+    kept = df.loc[~bad].assign(_piece=piece[~bad])
+    sizes = kept.groupby("_piece")["_piece"].transform("size")
+    kept = kept.loc[sizes >= min_len_group]
+    kept["group_id"] = kept.groupby("interview_id")["_piece"].rank(method="dense").astype(int)
+
+    increment("quality.segments_dropped", int(bad.sum()))
+    increment("quality.groups_kept", int(kept["_piece"].nunique()))
+    return kept.drop(columns="_piece")
@@ -0,0 +1,167 @@
+"""
+Select MupeTalk groups by interview metadata.
+
+`SelectionIndex` joins the reviewed MUPE metadata (interviewee gender,
+birth state, interviewers) with the MupeTalk groups, one row per
+(interview_id, group_id), and keeps a boolean bitmap per value of each
+categorical column plus the sorted group durations. A query ANDs a few
+bitmaps and a duration range, without touching the underlying tables.
+
+    index = SelectionIndex.build(metadata_df, mupetalk_df)
+    groups = index.select(gender="Feminino", birth_state="São Paulo",
+                          subsection="TRABALHO/ COMÉRCIO",
+                          min_duration=30, max_duration=120)
+"""
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from my_masters_degree.dialogue_index import DialogueIndex
+
+GROUPS_FILE_NAME = "groups.parquet"
+SPEAKERS_FILE_NAME = "group_speakers.parquet"
+METADATA_COLUMNS = ["gender", "birth_state", "interviewer1", "interviewer1_gender", "interviewer2", "interviewer2_gender"]
+INDEXED_COLUMNS = ["interview_id", "subsection", *METADATA_COLUMNS]
+
+
+def _as_list(value: Any | Iterable[Any]) -> List[Any]:
+    if isinstance(value, (str, int, np.integer)) or not isinstance(value, Iterable):
+        return [value]
+    return list(value)
+
+
+class SelectionIndex:
+    """
+    Bitmap indexes over the MupeTalk groups.
+
+    `groups` holds one row per group with its duration, number of turns,
+    dominant subsection (the one with the most speech) and the interview
+    metadata; `group_speakers` lists the speaker codes taking part in each
+    group.
+    """
+
+    def __init__(self, groups: pd.DataFrame, group_speakers: pd.DataFrame):
+        self.groups = groups.reset_index(drop=True)
+        self.group_speakers = group_speakers
+        n = len(self.groups)
+
+        self._bitmaps: Dict[str, Dict[Any, np.ndarray]] = {}
+        for column in INDEXED_COLUMNS:
+            if column not in self.groups.columns:
+                continue
+            codes, uniques = pd.factorize(self.groups[column])
+            self._bitmaps[column] = {value: codes == i for i, value in enumerate(uniques)}
+
+        speaker_bitmaps: Dict[Any, np.ndarray] = {}
+        for speaker, positions in group_speakers.groupby("speaker_code")["group_pos"]:
+            bitmap = np.zeros(n, dtype=bool)
+            bitmap[positions.to_numpy()] = True
+            speaker_bitmaps[speaker] = bitmap
+        self._bitmaps["speaker_code"] = speaker_bitmaps
+
+        durations = self.groups["duration"].to_numpy(dtype=np.float64)
+        self._duration_order = np.argsort(durations, kind="stable")
+        self._sorted_durations = durations[self._duration_order]
+
+    @classmethod
+    def build(cls, metadata_df: pd.DataFrame, mupetalk_df: pd.DataFrame) -> "SelectionIndex":
+        """
+        Join the metadata (matched through ``mupe_code.lower()`` ==
+        ``interview_id``) with the groups of a MupeTalk table.
+        """
+        turns = mupetalk_df.dropna(subset=["group_id"]).astype({"group_id": int})
+        keys = ["interview_id", "group_id"]
+
+        groups = turns.groupby(keys, sort=True).agg(duration=("duration", "sum"), turns=("duration", "size"))
+        subsection_speech = turns.groupby([*keys, "subsection"])["duration"].sum().reset_index()
+        dominant = (
+            subsection_speech.sort_values("duration", ascending=False, kind="stable")
+            .drop_duplicates(keys)
+            .set_index(keys)["subsection"]
+        )
+        groups = groups.join(dominant).reset_index()
+
+        metadata = metadata_df.assign(interview_id=metadata_df["mupe_code"].str.lower())
+        metadata = metadata[["interview_id", *[c for c in METADATA_COLUMNS if c in metadata.columns]]]
+        groups = groups.merge(metadata.drop_duplicates("interview_id"), on="interview_id", how="left")
+
+        positions = pd.Series(np.arange(len(groups)), index=pd.MultiIndex.from_frame(groups[keys]))
+        group_speakers = turns[[*keys, "speaker_code"]].drop_duplicates()
+        group_speakers = pd.DataFrame({
+            "group_pos": positions.loc[pd.MultiIndex.from_frame(group_speakers[keys])].to_numpy(),
+            "speaker_code": group_speakers["speaker_code"].to_numpy(),
+        })
+        return cls(groups, group_speakers)
+
+    def save(self, index_dir: str | Path) -> None:
+        """Write the joined group table; bitmaps are rebuilt on `load`."""
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        self.groups.to_parquet(index_dir / GROUPS_FILE_NAME, index=False)
+        self.group_speakers.to_parquet(index_dir / SPEAKERS_FILE_NAME, index=False)
+
+    @classmethod
+    def load(cls, index_dir: str | Path) -> "SelectionIndex":
+        index_dir = Path(index_dir)
+        return cls(pd.read_parquet(index_dir / GROUPS_FILE_NAME), pd.read_parquet(index_dir / SPEAKERS_FILE_NAME))
+
+    def values(self, column: str) -> List[Any]:
+        """Values that can be queried for an indexed column."""
+        return list(self._bitmaps[column])
+
+    def mask(
+        self,
+        min_duration: float | None = None,
+        max_duration: float | None = None,
+        **predicates: Any,
+    ) -> np.ndarray:
+        """
+        Boolean mask over `groups`. Each keyword names an indexed column
+        (or `speaker_code`) and takes a value or a list of values, OR-ed
+        together; predicates are AND-ed. Durations are inclusive bounds in
+        seconds.
+
+        Raises
+        ------
+        KeyError
+            If a keyword is not an indexed column.
+        """
+        mask = np.ones(len(self.groups), dtype=bool)
+        for column, value in predicates.items():
+            if value is None:
+                continue
+            if column not in self._bitmaps:
+                raise KeyError(f"{column} is not indexed; use one of {sorted(self._bitmaps)}")
+            bitmaps = self._bitmaps[column]
+            selected = np.zeros(len(self.groups), dtype=bool)
+            for v in _as_list(value):
+                if v in bitmaps:
+                    selected |= bitmaps[v]
+            mask &= selected
+
+        if min_duration is not None or max_duration is not None:
+            lo = 0 if min_duration is None else np.searchsorted(self._sorted_durations, min_duration, side="left")
+            hi = len(self._sorted_durations) if max_duration is None else np.searchsorted(self._sorted_durations, max_duration, side="right")
+            in_range = np.zeros(len(self.groups), dtype=bool)
+            in_range[self._duration_order[lo:hi]] = True
+            mask &= in_range
+        return mask
+
+    def select(self, **query: Any) -> pd.DataFrame:
+        """Groups matching `mask(**query)`, in (interview_id, group_id) order."""
+        return self.groups.loc[self.mask(**query)]
+
+    @staticmethod
+    def to_dialogues(selection: pd.DataFrame, index: DialogueIndex) -> List[Dict[str, Any]]:
+        """
+        Selected groups in the `get_speaker_dialogues` layout, ready for
+        `sampling_mupetalks.export_samples`.
+        """
+        dialogues: Dict[Hashable, List[Dict[str, Any]]] = {}
+        for interview_id, group_id in selection[["interview_id", "group_id"]].itertuples(index=False):
+            dialogues.setdefault(interview_id, []).append(
+                {'group_id': int(group_id), 'turns': index.group_records(interview_id, int(group_id))}
+            )
+        return [{'interview_id': interview_id, 'groups': groups} for interview_id, groups in dialogues.items()]
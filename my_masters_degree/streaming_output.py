@@ -0,0 +1,157 @@
+"""
+Write the MupeTalk table one interview at a time.
+
+`InterviewCsvWriter` appends each finished interview to the output CSV as
+soon as it is done, so the writer holds no more than the interview being
+appended and a crash only loses the interviews still in progress. After every append the file is fsynced and
+a sidecar manifest (`<output>.manifest.json`) records the byte length of
+the file, the columns and the outcome of each interview so far. Closing the
+writer marks the manifest complete and adds the file's sha256.
+
+The manifest is what makes partial output usable: `read_partial` reads only
+the bytes it covers, ignoring a torn final write, and a writer opened with
+`resume=True` truncates the file to the same point and reports the
+interviews already written in `done`.
+"""
+import io
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import pandas as pd
+
+from my_masters_degree.instrumentation import increment
+from my_masters_degree.utils import atomic_write_bytes, file_sha256
+
+
+def manifest_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.manifest.json")
+
+
+def load_stream_manifest(path: Path) -> Dict[str, Any] | None:
+    """The manifest of a streamed output, or None if it was never started."""
+    sidecar = manifest_path(path)
+    if not sidecar.exists():
+        return None
+    return json.loads(sidecar.read_text(encoding="utf-8"))
+
+
+class InterviewCsvWriter:
+    """
+    Append-only CSV writer with one chunk per interview.
+
+    The columns are fixed by `columns` or by the first interview written;
+    later interviews are reordered to match, missing columns are left
+    empty and unknown ones raise ValueError. Resuming an output started
+    with a different `run_info`, or already complete, raises ValueError.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        columns: Sequence[str] | None = None,
+        resume: bool = False,
+        run_info: Dict[str, Any] | None = None,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        run_info = run_info or {}
+        manifest = load_stream_manifest(self.path) if resume else None
+        if manifest is not None and manifest["complete"]:
+            raise ValueError(f"{self.path} is already complete; remove it to write it again")
+        if manifest is not None and manifest["run"] != run_info:
+            raise ValueError(f"{self.path} was started with {manifest['run']}, not {run_info}")
+
+        if manifest is None:
+            self.manifest: Dict[str, Any] = {
+                "run": run_info,
+                "columns": list(columns) if columns is not None else None,
+                "bytes": 0,
+                "rows": 0,
+                "interviews": {},
+                "complete": False,
+            }
+            self._file = open(self.path, "wb")
+            # Replace any manifest of a previous run, which describes the bytes just truncated.
+            self._save_manifest()
+        else:
+            self.manifest = manifest
+            self._file = open(self.path, "r+b")
+            self._file.truncate(manifest["bytes"])
+            self._file.seek(manifest["bytes"])
+
+    @property
+    def done(self) -> Dict[int, str]:
+        """Status of each interview already recorded."""
+        return {int(audio_id): entry["status"] for audio_id, entry in self.manifest["interviews"].items()}
+
+    def write(self, audio_id: int, frame: pd.DataFrame) -> None:
+        """Append the rows of a processed interview."""
+        columns: List[str] | None = self.manifest["columns"]
+        if columns is None:
+            columns = self.manifest["columns"] = list(frame.columns)
+        unknown = [c for c in frame.columns if c not in columns]
+        if unknown:
+            raise ValueError(f"Interview {audio_id} has columns {unknown} not in the output schema {columns}")
+
+        data = frame.reindex(columns=columns).to_csv(index=False, header=self.manifest["bytes"] == 0)
+        self._file.write(data.encode("utf-8"))
+        self._commit(audio_id, "ok", len(frame))
+        increment("stream_output.rows", len(frame))
+
+    def record(self, audio_id: int, status: str) -> None:
+        """Record an interview that produced no rows (skipped or failed)."""
+        self._commit(audio_id, status, 0)
+
+    def _commit(self, audio_id: int, status: str, rows: int) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.manifest["bytes"] = self._file.tell()
+        self.manifest["rows"] += rows
+        self.manifest["interviews"][str(audio_id)] = {"status": status, "rows": rows}
+        self._save_manifest()
+        increment(f"stream_output.interviews_{status}")
+
+    def _save_manifest(self) -> None:
+        atomic_write_bytes(str(manifest_path(self.path)), json.dumps(self.manifest, indent=2).encode("utf-8"))
+
+    def close(self) -> Dict[str, Any]:
+        """Mark the output complete and return its manifest."""
+        if not self._file.closed:
+            self._file.close()
+            self.manifest["complete"] = True
+            self.manifest["sha256"] = file_sha256(str(self.path))
+            self._save_manifest()
+        return self.manifest
+
+    def __enter__(self) -> "InterviewCsvWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave the manifest incomplete, covering the interviews written so far.
+            self._file.close()
+
+
+def read_partial(path: Path) -> pd.DataFrame:
+    """
+    Rows of the interviews recorded in the manifest of `path`, whether or
+    not the writer finished.
+
+    Raises
+    ------
+    FileNotFoundError
+        If `path` has no manifest.
+    """
+    path = Path(path)
+    manifest = load_stream_manifest(path)
+    if manifest is None:
+        raise FileNotFoundError(f"{manifest_path(path)} does not exist")
+    if manifest["bytes"] == 0:
+        return pd.DataFrame(columns=manifest["columns"] or [])
+    with open(path, "rb") as f:
+        data = f.read(manifest["bytes"])
+    return pd.read_csv(io.BytesIO(data))
@@ -0,0 +1,258 @@
+"""
+Deterministic generator of MUPE-shaped synthetic data.
+
+Produces, at a configurable scale, the three inputs the pipeline reads:
+
+- ``train.csv`` with CORAA-MUPE columns and
+  ``pc_ma_hvNNN_<file_id>_<start>_<end>.wav`` clip paths, multi-speaker
+  interviews (one or two interviewers) and occasional missing file ids;
+- ``data/train-XXXXX-of-XXXXX.parquet`` shards with the encoded WAV bytes
+  of every clip in the ``audio`` struct column;
+- ``interview_segmentations/interview_segmentation_<audio_id>.json`` files
+  in the `InterviewSegmentation` layout;
+
+plus a ``mupetalk_train.csv`` in the layout written by `main.py`.
+
+Scale 1 matches the size of the current MupeTalk build (26 interviews of
+~1000 clips each). Interview ``i`` is drawn from its own seed, so a larger
+scale always contains the smaller one as a prefix.
+"""
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import soundfile as sf
+from pydantic import BaseModel, Field
+
+BASE_INTERVIEWS = 26
+
+WORDS = (
+    "a casa minha mãe pai escola trabalho cidade quando eu ele ela nós "
+    "era tinha fazia depois antes muito pouco sempre nunca bairro rua "
+    "família irmão irmã amigo professor fábrica loja comércio anos tempo"
+).split()
+
+# (section title, subsection) pairs in interview order; every title and
+# subtitle is a valid `ClassLabel`.
+SCRIPT = [
+    ("INTRODUÇÃO", "IDENTIFICAÇÃO"),
+    ("INTRODUÇÃO", "FAMÍLIA"),
+    ("INTRODUÇÃO", "INFÂNCIA"),
+    ("INTRODUÇÃO", "ESCOLA"),
+    ("INTRODUÇÃO", "JUVENTUDE"),
+    ("DESENVOLVIMENTO", "TRABALHO/ COMÉRCIO"),
+    ("FINALIZAÇÃO", "FINALIZAÇÃO"),
+]
+
+
+class SyntheticCorpusConfig(BaseModel):
+    scale: float = Field(1.0, description="Multiple of BASE_INTERVIEWS to generate")
+    seed: int = 0
+    segments_per_interview: Tuple[int, int] = (700, 1300)
+    num_interviewers: int = Field(40, description="Size of the interviewer pool")
+    second_interviewer_rate: float = 0.2
+    missing_segment_rate: float = 0.02
+    rows_per_shard: int = 5000
+    with_audio: bool = True
+    clip_seconds: float = Field(0.05, description="Length of every synthetic clip")
+    sample_rate: int = 16000
+
+    @property
+    def num_interviews(self) -> int:
+        return max(1, round(BASE_INTERVIEWS * self.scale))
+
+
+class SyntheticCorpusPaths(BaseModel):
+    root: Path
+    train_csv: Path
+    mupetalk_csv: Path
+    parquet_dir: Path
+    segmentations_dir: Path
+
+
+def _sentence(rng: np.random.Generator, question: bool) -> str:
+    words = rng.choice(WORDS, size=int(rng.integers(3, 15)))
+    text = " ".join(words).capitalize()
+    return text + ("?" if question else ".")
+
+
+def generate_interview(config: SyntheticCorpusConfig, interview_idx: int) -> Dict[str, Any]:
+    """
+    Generate the clips, MupeTalk turns and segmentation of one interview.
+
+    Interviews alternate interviewer questions (1-2 clips) and interviewee
+    answers (2-8 clips), so the interviewee is always the most frequent
+    speaker, as `get_interviewer_code` assumes. Only non-leading clips of a
+    turn are dropped as missing, so turn boundaries survive aggregation.
+    """
+    rng = np.random.default_rng([config.seed, interview_idx])
+
+    audio_id = 1000 + interview_idx
+    code = f"{interview_idx % 1000:03d}"
+    audio_name = f"pc_ma_hv{code}"
+    interviewee = f"MA_HV{code}_{audio_id}"
+    n_interviewers = 2 if rng.random() < config.second_interviewer_rate else 1
+    interviewers = [
+        f"IV{int(i):03d}" for i in rng.choice(config.num_interviewers, size=n_interviewers, replace=False)
+    ]
+
+    target_segments = int(rng.integers(*config.segments_per_interview))
+    rows: List[Dict[str, Any]] = []
+    turns: List[Dict[str, Any]] = []
+    file_id = 0
+    clock = float(rng.uniform(1, 10))
+
+    while file_id < target_segments:
+        is_question = len(turns) % 2 == 0
+        speaker = interviewers[int(rng.integers(n_interviewers))] if is_question else interviewee
+        n_clips = int(rng.integers(1, 3)) if is_question else int(rng.integers(2, 9))
+
+        turn_rows = []
+        for clip_idx in range(n_clips):
+            duration = round(float(rng.uniform(0.5, 8.0)), 3)
+            start, end = round(clock, 3), round(clock + duration, 3)
+            clock = end + float(rng.uniform(0.0, 0.4))
+            missing = clip_idx > 0 and rng.random() < config.missing_segment_rate
+            if not missing:
+                text = _sentence(rng, question=is_question)
+                turn_rows.append({
+                    "audio_id": audio_id,
+                    "audio_name": audio_name,
+                    "file_path": f"train/{audio_name}_{audio_id}/{audio_name}_{file_id}_{start}_{end}.wav",
+                    "speaker_type": "P/1" if is_question else "R",
+                    "speaker_code": speaker,
+                    "speaker_gender": "F" if rng.random() < 0.5 else "M",
+                    "start_time": start,
+                    "end_time": end,
+                    "duration": duration,
+                    "normalized_text": text.lower().rstrip(".?"),
+                    "original_text": text,
+                    "file_id": file_id,
+                })
+            file_id += 1
+
+        rows.extend(turn_rows)
+        turns.append({
+            "file_path": [r["file_path"] for r in turn_rows],
+            "file_id": [r["file_id"] for r in turn_rows],
+            "speaker_code": speaker,
+            "start_time": turn_rows[0]["start_time"],
+            "end_time": turn_rows[-1]["end_time"],
+            "duration": round(sum(r["duration"] for r in turn_rows), 3),
+            "original_text": " ".join(r["original_text"] for r in turn_rows),
+            "is_question": is_question,
+        })
+
+    # Questions are split evenly, in order, across the script subsections.
+    question_turns = [i for i, t in enumerate(turns) if t["is_question"]]
+    script_pos = np.minimum(
+        np.arange(len(question_turns)) * len(SCRIPT) // max(len(question_turns), 1), len(SCRIPT) - 1
+    )
+    question_script = dict(zip(question_turns, script_pos))
+    segments: List[Dict[str, Any]] = []
+    subsection = SCRIPT[0][1]
+    for turn_idx, turn in enumerate(turns):
+        if turn["is_question"]:
+            title, subsection = SCRIPT[question_script[turn_idx]]
+            if not segments or segments[-1]["title"] != title:
+                segments.append({"title": title, "subsections": []})
+            subsections = segments[-1]["subsections"]
+            if not subsections or subsections[-1]["subtitle"] != subsection:
+                subsections.append({"subtitle": subsection, "items": []})
+            start = turn["start_time"]
+            subsections[-1]["items"].append(
+                {"id": turn_idx, "timestamp": f"{int(start // 60):02d}:{int(start % 60):02d}"}
+            )
+        turn["subsection"] = subsection
+
+    return {
+        "audio_id": audio_id,
+        "rows": rows,
+        "turns": turns,
+        "segmentation": {"segments": segments},
+    }
+
+
+def _group_turns(turns: List[Dict[str, Any]], rng: np.random.Generator, interview_id: str) -> List[Dict[str, Any]]:
+    """Cut identification-free turns into MupeTalk groups of 5-30 turns."""
+    kept = [t for t in turns if t["subsection"] != "IDENTIFICAÇÃO"]
+    records = []
+    pos, group_id = 0, 1
+    while pos < len(kept):
+        size = int(rng.integers(5, 31))
+        for turn in kept[pos:pos + size]:
+            records.append({
+                "file_path": str(turn["file_path"]),
+                "file_id": str(turn["file_id"]),
+                "speaker_code": turn["speaker_code"],
+                "start_time": turn["start_time"],
+                "end_time": turn["end_time"],
+                "duration": turn["duration"],
+                "original_text": turn["original_text"],
+                "subsection": turn["subsection"],
+                "group_id": group_id,
+                "interview_id": interview_id,
+            })
+        pos += size
+        group_id += 1
+    return records
+
+
+def _clip_bytes(rng: np.random.Generator, config: SyntheticCorpusConfig) -> bytes:
+    n = int(config.clip_seconds * config.sample_rate)
+    t = np.arange(n) / config.sample_rate
+    data = 0.3 * np.sin(2 * np.pi * rng.uniform(100, 400) * t) + rng.normal(0, 0.01, n)
+    buf = io.BytesIO()
+    sf.write(buf, data, config.sample_rate, format="WAV", subtype="PCM_16")
+    return buf.getvalue()
+
+
+def generate_corpus(output_dir: str | Path, config: SyntheticCorpusConfig | None = None) -> SyntheticCorpusPaths:
+    """
+    Write a synthetic MUPE-shaped corpus under `output_dir`.
+
+    Returns the paths of the generated artefacts.
+    """
+    config = config or SyntheticCorpusConfig()
+    root = Path(output_dir)
+    paths = SyntheticCorpusPaths(
+        root=root,
+        train_csv=root / "train.csv",
+        mupetalk_csv=root / "mupetalk_train.csv",
+        parquet_dir=root / "CORAA-MUPE",
+        segmentations_dir=root / "interview_segmentations",
+    )
+    paths.segmentations_dir.mkdir(parents=True, exist_ok=True)
+    (paths.parquet_dir / "data").mkdir(parents=True, exist_ok=True)
+
+    train_rows: List[Dict[str, Any]] = []
+    mupetalk_rows: List[Dict[str, Any]] = []
+    for interview_idx in range(config.num_interviews):
+        interview = generate_interview(config, interview_idx)
+        train_rows.extend(interview["rows"])
+        rng = np.random.default_rng([config.seed, interview_idx, 1])
+        interview_id = interview["rows"][0]["audio_name"] + f"_{interview['audio_id']}"
+        mupetalk_rows.extend(_group_turns(interview["turns"], rng, interview_id))
+        seg_path = paths.segmentations_dir / f"interview_segmentation_{interview['audio_id']}.json"
+        seg_path.write_text(json.dumps(interview["segmentation"], indent=2, ensure_ascii=False), encoding="utf-8")
+
+    train_df = pd.DataFrame(train_rows).drop(columns=["file_id"])
+    train_df.to_csv(paths.train_csv, index=False)
+    pd.DataFrame(mupetalk_rows).to_csv(paths.mupetalk_csv, index=False)
+
+    if config.with_audio:
+        file_paths = train_df["file_path"].tolist()
+        n_shards = max(1, -(-len(file_paths) // config.rows_per_shard))
+        rng = np.random.default_rng([config.seed, 2**32 - 1])
+        for shard in range(n_shards):
+            shard_paths = file_paths[shard * config.rows_per_shard:(shard + 1) * config.rows_per_shard]
+            audio = [{"bytes": _clip_bytes(rng, config), "path": p} for p in shard_paths]
+            table = pa.table({"file_path": shard_paths, "audio": audio})
+            pq.write_table(table, paths.parquet_dir / "data" / f"train-{shard:05d}-of-{n_shards:05d}.parquet")
+
+    return paths
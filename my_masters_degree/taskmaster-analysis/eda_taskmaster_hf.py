@@ -1,108 +1,188 @@
-import os
+import argparse
+import json
+import time
+import urllib.request
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
 import matplotlib.pyplot as plt
 import seaborn as sns
-from datasets import load_dataset
-from pathlib import Path
-import json
 
 # Paths
 RESULTS_DIR = Path("./my_masters_degree/taskmaster-analysis/results")
 DATA_DIR = Path("./my_masters_degree/taskmaster-analysis/data")
-RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+LOCAL_REPO_DIR = Path("./notebooks/datasets/Taskmaster/TM-1-2019")
+ARROW_CACHE = DATA_DIR / "taskmaster1.arrow"
+
+# URLs to raw JSON files
+DATA_URLS = {
+    "self_dialogs": "https://raw.githubusercontent.com/google-research-datasets/Taskmaster/master/TM-1-2019/self-dialogs.json",
+    "woz_dialogs": "https://raw.githubusercontent.com/google-research-datasets/Taskmaster/master/TM-1-2019/woz-dialogs.json",
+}
+
+UTTERANCE_TYPE = pa.struct([
+    ("index", pa.int64()),
+    ("speaker", pa.string()),
+    ("text", pa.string()),
+])
+DIALOGUE_SCHEMA = pa.schema([
+    ("split", pa.string()),
+    ("conversation_id", pa.string()),
+    ("instruction_id", pa.string()),
+    ("utterances", pa.list_(UTTERANCE_TYPE)),
+])
+
+
+def fetch_raw_json(split: str, offline: bool = False) -> Path:
+    """
+    Path of a split's raw JSON, looking in DATA_DIR, then in the local clone
+    of the official repo, and only then downloading it into DATA_DIR.
+    """
+    file_name = Path(DATA_URLS[split]).name
+    for candidate in (DATA_DIR / file_name, LOCAL_REPO_DIR / file_name):
+        if candidate.exists():
+            return candidate
+
+    if offline:
+        raise FileNotFoundError(f"{file_name} is not cached in {DATA_DIR} or {LOCAL_REPO_DIR}")
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    print(f"Downloading {file_name}...")
+    urllib.request.urlretrieve(DATA_URLS[split], DATA_DIR / file_name)
+    return DATA_DIR / file_name
+
+
+def build_arrow_cache(offline: bool = False) -> pa.Table:
+    """Convert the raw JSON splits into one Arrow table and cache it as IPC."""
+    columns = {name: [] for name in DIALOGUE_SCHEMA.names}
+    for split in DATA_URLS:
+        with open(fetch_raw_json(split, offline=offline), encoding="utf-8") as f:
+            dialogues = json.load(f)
+        for dialogue in dialogues:
+            columns["split"].append(split)
+            columns["conversation_id"].append(dialogue.get("conversation_id"))
+            columns["instruction_id"].append(dialogue.get("instruction_id"))
+            utterances = dialogue.get("utterances")
+            columns["utterances"].append(
+                None if utterances is None else [
+                    {"index": u.get("index"), "speaker": u.get("speaker"), "text": u.get("text")}
+                    for u in utterances
+                ]
+            )
+
+    table = pa.Table.from_pydict(columns, schema=DIALOGUE_SCHEMA)
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    with ipc.new_file(ARROW_CACHE, table.schema) as writer:
+        writer.write_table(table)
+    return table
+
+
+def load_taskmaster_table(offline: bool = False, refresh: bool = False) -> pa.Table:
+    """Memory-map the Arrow cache, building it from the raw JSON if needed."""
+    if refresh or not ARROW_CACHE.exists():
+        print("Building Arrow cache from raw JSON...")
+        return build_arrow_cache(offline=offline)
+    with pa.memory_map(str(ARROW_CACHE)) as source:
+        return ipc.open_file(source).read_all()
+
+
+def mupetalk_dialogues_table(mupetalk_df: pd.DataFrame) -> pa.Table:
+    """
+    MupeTalk groups as a Taskmaster-like table: one row per
+    (interview_id, group_id) with its speaker codes as an `utterances` list.
+    """
+    table = pa.Table.from_pandas(
+        mupetalk_df.sort_values(["interview_id", "group_id", "start_time"])[["interview_id", "group_id", "speaker_code"]],
+        preserve_index=False,
+    )
+    grouped = table.group_by(["interview_id", "group_id"], use_threads=False).aggregate([("speaker_code", "list")])
+    return grouped.rename_columns(["interview_id", "group_id", "utterances"])
+
+
+def dialogue_stats(table: pa.Table, list_column: str = "utterances", speaker_field: str = "speaker") -> tuple[np.ndarray, pd.Series]:
+    """
+    Turns per dialogue and speaker distribution with Arrow list kernels.
+
+    `list_column` may hold structs (the speaker is read from
+    `speaker_field`) or plain speaker values. Null lists count as zero
+    turns; null or empty speakers are reported as 'unknown'.
+    """
+    utterances = table[list_column]
+    num_turns = pc.fill_null(pc.list_value_length(utterances), 0).to_numpy()
+
+    flat = pc.list_flatten(utterances)
+    if pa.types.is_struct(flat.type):
+        flat = pc.struct_field(flat, speaker_field)
+    speakers = pc.cast(flat, pa.string())
+    speakers = pc.fill_null(speakers, "")
+    speakers = pc.if_else(pc.equal(speakers, ""), pa.scalar("unknown"), speakers)
+
+    counts = pc.value_counts(speakers)
+    speaker_counts = pd.Series(
+        counts.field("counts").to_numpy(),
+        index=counts.field("values").to_pylist(),
+    ).sort_values(ascending=False)
+    return num_turns, speaker_counts
+
+
+def format_stats(title: str, num_turns: np.ndarray, speaker_counts: pd.Series) -> str:
+    lines = [
+        title,
+        "=" * len(title),
+        f"Total Dialogues: {len(num_turns)}",
+        f"Mean Turns per Dialogue: {num_turns.mean():.2f}",
+        f"Median Turns per Dialogue: {np.median(num_turns):.2f}",
+        "",
+        "Speaker Distribution:",
+        speaker_counts.to_string(),
+        "",
+    ]
+    return "\n".join(lines)
+
 
 def main():
-    print("Loading Taskmaster-1 data from URLs...")
-    
-    # URLs to raw JSON files
-    data_files = {
-        "self_dialogs": "https://raw.githubusercontent.com/google-research-datasets/Taskmaster/master/TM-1-2019/self-dialogs.json",
-        "woz_dialogs": "https://raw.githubusercontent.com/google-research-datasets/Taskmaster/master/TM-1-2019/woz-dialogs.json"
-    }
+    parser = argparse.ArgumentParser(description="Taskmaster-1 (2019) EDA")
+    parser.add_argument("--offline", action="store_true", help="Never download; fail if the raw JSON is not cached")
+    parser.add_argument("--refresh", action="store_true", help="Rebuild the Arrow cache from the raw JSON")
+    parser.add_argument("--mupetalk", type=Path, help="MupeTalk CSV to report alongside Taskmaster-1")
+    args = parser.parse_args()
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
 
     try:
-        # Load datasets directly from URLs
-        dataset = load_dataset("json", data_files=data_files)
+        table = load_taskmaster_table(offline=args.offline, refresh=args.refresh)
     except Exception as e:
         print(f"Error loading dataset: {e}")
         return
 
-    # Combine splits
-    all_data = []
-    for split in dataset.keys():
-        print(f"Processing split: {split}")
-        df_split = dataset[split].to_pandas()
-        all_data.append(df_split)
-    
-    if not all_data:
+    if table.num_rows == 0:
         print("No data found.")
         return
-        
-    df = pd.concat(all_data, ignore_index=True)
-    
-    # Statistics
-    total_dialogues = len(df)
-    
-    # The dataset has an 'utterances' column which is a list of dicts/structs
-    # Each dict has 'speaker' and 'text'
-    def count_turns(utterances):
-        if utterances is not None:
-            # Handle numpy arrays if loaded that way
-            if hasattr(utterances, 'tolist'):
-                utterances = utterances.tolist()
-            return len(utterances)
-        return 0
-
-    df['num_turns'] = df['utterances'].apply(count_turns)
-    
-    mean_turns = df['num_turns'].mean()
-    median_turns = df['num_turns'].median()
-    
-    # Speaker distribution
-    all_speakers = []
-    
-    # For safety, iterate carefully
-    for utterances in df['utterances']:
-        if utterances is not None:
-            # If it's a numpy array of objects (from datasets), convert to list
-            if hasattr(utterances, 'tolist'):
-                utterances = utterances.tolist()
-            
-            for u in utterances:
-                # u might be a dict or a Row object
-                if isinstance(u, dict):
-                     speaker = u.get('speaker', 'unknown')
-                else:
-                     # If it's a Row/Struct from pyarrow/datasets
-                     speaker = getattr(u, 'speaker', 'unknown') if hasattr(u, 'speaker') else u.get('speaker', 'unknown')
-                
-                if speaker:
-                    all_speakers.append(speaker)
-                else:
-                    all_speakers.append('unknown')
-    
-    speaker_counts = pd.Series(all_speakers).value_counts()
-    
+
+    num_turns, speaker_counts = dialogue_stats(table)
+
     # Save stats
+    stats_text = format_stats("Taskmaster-1 (2019) EDA Results", num_turns, speaker_counts)
+    if args.mupetalk is not None:
+        mupetalk_table = mupetalk_dialogues_table(pd.read_csv(args.mupetalk))
+        mupe_turns, mupe_speakers = dialogue_stats(mupetalk_table)
+        stats_text += "\n" + format_stats("MupeTalk EDA Results (groups as dialogues)", mupe_turns, mupe_speakers.head(10))
+
     stats_file = RESULTS_DIR / "stats.txt"
-    with open(stats_file, "w") as f:
-        f.write("Taskmaster-1 (2019) EDA Results\n")
-        f.write("==============================\n")
-        f.write(f"Total Dialogues: {total_dialogues}\n")
-        f.write(f"Mean Turns per Dialogue: {mean_turns:.2f}\n")
-        f.write(f"Median Turns per Dialogue: {median_turns:.2f}\n")
-        f.write("\nSpeaker Distribution:\n")
-        f.write(speaker_counts.to_string())
-        f.write("\n")
-
-    print(f"Stats saved to {stats_file}")
+    stats_file.write_text(stats_text)
+    print(f"Stats saved to {stats_file} in {time.perf_counter() - start:.2f}s")
 
     # Visualizations
     sns.set_theme(style="whitegrid")
-    
+
     # 1. Distribution of turns
     plt.figure(figsize=(10, 6))
-    sns.histplot(df['num_turns'], bins=30, kde=True, color='skyblue')
+    sns.histplot(num_turns, bins=30, kde=True, color='skyblue')
     plt.title("Distribution of Turns per Dialogue (Taskmaster-1)")
     plt.xlabel("Number of Turns")
     plt.ylabel("Frequency")
@@ -116,7 +196,7 @@ def main():
         top_speakers = speaker_counts.head(10)
     else:
         top_speakers = speaker_counts
-        
+
     top_speakers.plot(kind='bar', color='skyblue')
     plt.title("Speaker Distribution (Taskmaster-1)")
     plt.xlabel("Speaker Role")
@@ -125,7 +205,7 @@ def main():
     plt.tight_layout()
     plt.savefig(RESULTS_DIR / "distribuicao_speakers.png")
     plt.close()
-    
+
     print(f"Visualizations saved to {RESULTS_DIR}")
 
 if __name__ == "__main__":
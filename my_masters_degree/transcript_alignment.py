@@ -0,0 +1,334 @@
+"""
+Align the human P/R transcripts extracted from the interview PDFs with the
+ASR `original_text` of the MUPE segments.
+
+Both sides are tokenised into one word stream each. Word n-grams that occur
+exactly once on both sides are used as anchors; the longest monotone chain
+of anchors is kept and only the stretches between consecutive anchors are
+aligned with a banded edit-distance DP. The cost is therefore roughly linear
+in the interview length instead of quadratic as with difflib.
+
+Each segment then gets the transcript words aligned to it as corrected text,
+the PDF blocks they come from, and its WER against that text. Gaps between
+anchors too large for the DP are paired along the diagonal instead, and the
+segments they touch are flagged with `diagonal_fallback`.
+"""
+import bisect
+import re
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import werpy
+
+from my_masters_degree.instrumentation import increment
+
+TOKEN_RE = re.compile(r"\S+")
+NGRAM = 4
+BAND = 16
+# Above this many DP cells a gap is aligned diagonally instead.
+MAX_DP_CELLS = 2_000_000
+
+Alignment = List[Tuple[int | None, int | None]]
+
+
+def normalize_token(token: str) -> str:
+    """Casefold, strip accents and drop every non-alphanumeric character."""
+    decomposed = unicodedata.normalize("NFKD", token)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return "".join(c for c in stripped.casefold() if c.isalnum())
+
+
+def tokenize(texts: List[str]) -> Tuple[List[str], List[str], np.ndarray]:
+    """
+    Split texts into words, keeping the raw word (with punctuation), its
+    normalised form and the position of the text it came from. Words that
+    normalise to nothing (dashes, ellipses...) are dropped.
+    """
+    raw, norm, owner = [], [], []
+    for pos, text in enumerate(texts):
+        for match in TOKEN_RE.finditer(text if isinstance(text, str) else ""):
+            token = normalize_token(match.group())
+            if token:
+                raw.append(match.group())
+                norm.append(token)
+                owner.append(pos)
+    return raw, norm, np.asarray(owner, dtype=np.int64)
+
+
+def _encode(ref_norm: List[str], hyp_norm: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    vocab: Dict[str, int] = {}
+    ref = np.fromiter((vocab.setdefault(t, len(vocab)) for t in ref_norm), dtype=np.int64, count=len(ref_norm))
+    hyp = np.fromiter((vocab.setdefault(t, len(vocab)) for t in hyp_norm), dtype=np.int64, count=len(hyp_norm))
+    return ref, hyp
+
+
+def _unique_ngrams(codes: np.ndarray, n: int) -> Dict[bytes, int]:
+    """Start position of every n-gram occurring exactly once in `codes`."""
+    if len(codes) < n:
+        return {}
+    windows = np.lib.stride_tricks.sliding_window_view(codes, n)
+    keys = [w.tobytes() for w in windows]
+    counts = Counter(keys)
+    return {k: i for i, k in enumerate(keys) if counts[k] == 1}
+
+
+def find_anchors(ref: np.ndarray, hyp: np.ndarray, n: int = NGRAM) -> List[Tuple[int, int]]:
+    """
+    Matched (ref, hyp) word positions implied by the longest monotone chain
+    of n-grams unique on both sides.
+    """
+    ref_ngrams = _unique_ngrams(ref, n)
+    hyp_ngrams = _unique_ngrams(hyp, n)
+    pairs = sorted((i, hyp_ngrams[k]) for k, i in ref_ngrams.items() if k in hyp_ngrams)
+    if not pairs:
+        return []
+
+    # Longest increasing subsequence on the hyp positions (patience sorting).
+    tails: List[int] = []
+    tail_idx: List[int] = []
+    prev = [-1] * len(pairs)
+    for idx, (_, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(idx)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = idx
+        prev[idx] = tail_idx[pos - 1] if pos else -1
+
+    chain = []
+    idx = tail_idx[-1]
+    while idx != -1:
+        chain.append(pairs[idx])
+        idx = prev[idx]
+    chain.reverse()
+
+    # Expand each anchor into its n word matches, keeping them strictly monotone.
+    matches: List[Tuple[int, int]] = []
+    for i, j in chain:
+        for k in range(n):
+            if not matches or (i + k > matches[-1][0] and j + k > matches[-1][1]):
+                matches.append((i + k, j + k))
+    return matches
+
+
+def needs_fallback(n: int, m: int, band: int = BAND) -> bool:
+    """True if aligning n ref and m hyp words would exceed MAX_DP_CELLS."""
+    width = band + abs(n - m)
+    return n > 0 and m > 0 and (n + 1) * (2 * width + 1) > MAX_DP_CELLS
+
+
+def _diagonal_alignment(ref_start: int, n: int, hyp_start: int, m: int) -> Alignment:
+    """Cheap fallback: pair words along the diagonal, then pad."""
+    k = min(n, m)
+    ops: Alignment = [(ref_start + t, hyp_start + t) for t in range(k)]
+    ops += [(ref_start + t, None) for t in range(k, n)]
+    ops += [(None, hyp_start + t) for t in range(k, m)]
+    return ops
+
+
+def banded_alignment(ref: np.ndarray, hyp: np.ndarray, ref_start: int = 0, hyp_start: int = 0, band: int = BAND) -> Alignment:
+    """
+    Edit-distance alignment of two short word sequences, restricted to a
+    band around the diagonal from (0, 0) to (n, m).
+
+    Returns (ref position | None, hyp position | None) operations, offset by
+    `ref_start` / `hyp_start`.
+    """
+    n, m = len(ref), len(hyp)
+    if n == 0 or m == 0 or needs_fallback(n, m, band):
+        return _diagonal_alignment(ref_start, n, hyp_start, m)
+
+    width = band + abs(n - m)
+    span = 2 * width + 1
+    lows = np.array([round(i * m / n) - width for i in range(n + 1)])
+    inf = np.iinfo(np.int64).max // 2
+    cost = np.full((n + 1, span), inf, dtype=np.int64)
+    back = np.zeros((n + 1, span), dtype=np.int8)  # 0 diag, 1 up (ref only), 2 left (hyp only)
+
+    for i in range(n + 1):
+        low = lows[i]
+        for b in range(span):
+            j = low + b
+            if j < 0 or j > m:
+                continue
+            if i == 0 and j == 0:
+                cost[0, b] = 0
+                continue
+            best, move = inf, 0
+            if i > 0:
+                bp = j - lows[i - 1]
+                if 0 <= bp - 1 < span and j > 0:
+                    c = cost[i - 1, bp - 1] + (ref[i - 1] != hyp[j - 1])
+                    if c < best:
+                        best, move = c, 0
+                if 0 <= bp < span:
+                    c = cost[i - 1, bp] + 1
+                    if c < best:
+                        best, move = c, 1
+            if j > 0 and b > 0:
+                c = cost[i, b - 1] + 1
+                if c < best:
+                    best, move = c, 2
+            cost[i, b] = best
+            back[i, b] = move
+
+    ops: Alignment = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        move = back[i, j - lows[i]]
+        if move == 0:
+            ops.append((ref_start + i - 1, hyp_start + j - 1))
+            i, j = i - 1, j - 1
+        elif move == 1:
+            ops.append((ref_start + i - 1, None))
+            i -= 1
+        else:
+            ops.append((None, hyp_start + j - 1))
+            j -= 1
+    ops.reverse()
+    return ops
+
+
+def align_words(
+    ref: np.ndarray, hyp: np.ndarray, ngram: int = NGRAM, band: int = BAND
+) -> Tuple[Alignment, List[Tuple[int, int]]]:
+    """
+    Anchor-then-DP alignment of two full word streams.
+
+    Returns the alignment and the [start, stop) hyp ranges of the gaps that
+    were paired diagonally because they exceed MAX_DP_CELLS.
+    """
+    ops: Alignment = []
+    fallbacks: List[Tuple[int, int]] = []
+    prev_i, prev_j = 0, 0
+    for i, j in find_anchors(ref, hyp, ngram) + [(len(ref), len(hyp))]:
+        if needs_fallback(i - prev_i, j - prev_j, band):
+            fallbacks.append((prev_j, j))
+        ops += banded_alignment(ref[prev_i:i], hyp[prev_j:j], prev_i, prev_j, band)
+        if i < len(ref):
+            ops.append((i, j))
+        prev_i, prev_j = i + 1, j + 1
+    increment("alignment.diagonal_fallbacks", len(fallbacks))
+    return ops, fallbacks
+
+
+def align_transcript(
+    pdf_blocks: pd.DataFrame,
+    utterances: pd.DataFrame,
+    text_column: str = "original_text",
+    ngram: int = NGRAM,
+    band: int = BAND,
+) -> pd.DataFrame:
+    """
+    Map the PDF question/answer blocks of one interview onto its MUPE
+    utterances.
+
+    Parameters
+    ----------
+    pdf_blocks : pd.DataFrame
+        Blocks in transcript order, with `identifier`/`text` columns (as
+        written by `extract_interview_pdfs`) or `Identifier`/`Text` (as
+        returned by `parse_interview_pdf`).
+    utterances : pd.DataFrame
+        Segments of the same interview in chronological order.
+    text_column : str
+        Column of `utterances` holding the ASR text.
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed like `utterances`, with `corrected_text` (transcript words
+        aligned to the segment), `pdf_identifiers` (blocks they come from),
+        `wer` of the ASR text against the corrected text and
+        `diagonal_fallback` (some of its words were paired diagonally, so
+        its alignment is unreliable).
+    """
+    blocks = pdf_blocks.rename(columns={"Identifier": "identifier", "Text": "text"})
+    ref_raw, ref_norm, ref_block = tokenize(blocks["text"].tolist())
+    _, hyp_norm, hyp_seg = tokenize(utterances[text_column].tolist())
+    ref, hyp = _encode(ref_norm, hyp_norm)
+
+    n_segments = len(utterances)
+    seg_ref: List[List[int]] = [[] for _ in range(n_segments)]
+    current = 0
+    ops, fallbacks = align_words(ref, hyp, ngram, band)
+    diagonal = np.zeros(n_segments, dtype=bool)
+    for start, stop in fallbacks:
+        diagonal[np.unique(hyp_seg[start:stop])] = True
+    for i, j in ops:
+        if j is not None:
+            current = int(hyp_seg[j])
+        if i is not None and n_segments:
+            seg_ref[current].append(i)
+
+    identifiers = blocks["identifier"].tolist()
+    corrected = [" ".join(ref_raw[i] for i in idxs) for idxs in seg_ref]
+    references = [" ".join(ref_norm[i] for i in idxs) for idxs in seg_ref]
+    hypotheses = [[] for _ in range(n_segments)]
+    for token, seg in zip(hyp_norm, hyp_seg):
+        hypotheses[seg].append(token)
+
+    return pd.DataFrame({
+        "corrected_text": corrected,
+        "pdf_identifiers": [sorted({identifiers[ref_block[i]] for i in idxs}, key=identifiers.index) for idxs in seg_ref],
+        "wer": batch_wer(references, [" ".join(h) for h in hypotheses]),
+        "diagonal_fallback": diagonal,
+    }, index=utterances.index)
+
+
+def batch_wer(references: List[str], hypotheses: List[str]) -> np.ndarray:
+    """
+    Per-pair WER with werpy. An empty reference scores 0 against an empty
+    hypothesis and 1 otherwise.
+    """
+    scores = np.array([0.0 if not h.strip() else 1.0 for h in hypotheses])
+    mask = np.array([bool(r.strip()) for r in references], dtype=bool)
+    if mask.any():
+        refs = [r for r, keep in zip(references, mask) if keep]
+        hyps = [h for h, keep in zip(hypotheses, mask) if keep]
+        scores[mask] = np.atleast_1d(np.asarray(werpy.wers(refs, hyps), dtype=float))
+    return scores
+
+
+def _align_interview(args: Tuple[pd.DataFrame, pd.DataFrame, str]) -> pd.DataFrame:
+    pdf_blocks, utterances, text_column = args
+    return align_transcript(pdf_blocks, utterances, text_column)
+
+
+def align_corpus(
+    transcripts: pd.DataFrame,
+    mupe_df: pd.DataFrame,
+    text_column: str = "original_text",
+    max_workers: int | None = None,
+) -> pd.DataFrame:
+    """
+    Align every interview that has a PDF transcript, one interview per task
+    in a process pool.
+
+    `transcripts` is the table written by `extract_interview_pdfs`; it is
+    matched to `mupe_df` (CORAA-MUPE rows) through ``audio_name.upper()``
+    == ``mupe_code``. Returns the alignment columns indexed like `mupe_df`,
+    for the rows of aligned interviews only.
+    """
+    mupe_codes = mupe_df["audio_name"].str.upper()
+    tasks = []
+    for mupe_code, pdf_blocks in transcripts.sort_values(["mupe_code", "position"]).groupby("mupe_code"):
+        utterances = mupe_df.loc[mupe_codes == mupe_code].sort_values("start_time")
+        if not utterances.empty:
+            tasks.append((pdf_blocks, utterances, text_column))
+
+    if not tasks:
+        return pd.DataFrame(columns=["corrected_text", "pdf_identifiers", "wer", "diagonal_fallback"])
+
+    if max_workers == 1:
+        results = list(map(_align_interview, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_align_interview, tasks))
+    return pd.concat(results)
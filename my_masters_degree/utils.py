@@ -1,10 +1,18 @@
+import hashlib
+import os
+import tempfile
 import textwrap
-from typing import Tuple
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, Iterable, Iterator, Tuple, TypeVar
 
 import colorsys
 import numpy as np
 from scipy.stats import mode
 
+T = TypeVar("T")
+R = TypeVar("R")
+
 def hls_to_hex(h: float, l: float, s: float, *, from_adobe_or_css: bool = False) -> str:
     """Convert HLS to hex."""
     if from_adobe_or_css:
@@ -39,6 +47,77 @@ def fix_missalignment_hls(hls_matrix: np.ndarray) -> np.ndarray:
     hls_matrix[:-1, 0] += diff_arr_fixed
     return hls_matrix
 
+
+def atomic_write_bytes(path: str, data: bytes) -> str:
+    """
+    Write `data` to a temporary file next to `path` and rename it into place,
+    so `path` is either absent, the old file, or the complete new one.
+    Returns the sha256 of `data`.
+    """
+    return atomic_write_chunks(path, [data])
+
+
+def atomic_write_chunks(path: str, chunks: Iterable[bytes]) -> str:
+    """
+    `atomic_write_bytes` for data produced piece by piece. If `chunks`
+    raises, the temporary file is removed and `path` is left untouched.
+    Returns the sha256 of the bytes written.
+    """
+    directory = os.path.dirname(path) or "."
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for data in chunks:
+                f.write(data)
+                digest.update(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest.hexdigest()
+
+
+def bounded_map(
+    executor: Executor,
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_in_flight: int,
+) -> Iterator[R]:
+    """
+    `executor.map` that submits at most `max_in_flight` tasks ahead of the
+    result being yielded, and reads `items` lazily, so a slow task holds
+    back at most that many finished results instead of the whole input.
+    Results follow the order of `items`.
+    """
+    pending: deque = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def default_in_flight(max_workers: int | None) -> int:
+    """Tasks to keep submitted for a pool of `max_workers` (None: one per CPU)."""
+    return 2 * (max_workers or os.cpu_count() or 1)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
 if __name__ == "__main__":
     samples_hex = ["#42B356", "#42B3A2", "#42B37C", "#59B342", "#429EB3"]
     samples_hls = [(130, 46, 48), (170, 46, 48), (150, 46, 48), (107, 46, 48), (191, 46, 48)]
@@ -0,0 +1,89 @@
+import pandas as pd
+from my_masters_degree.anonymisation import NameScanner, anonymise, find_names, metadata_patterns, name_variants, split_at_gaps
+from my_masters_degree.main import anonymise_interview, chunk_interview, find_segmentations, iter_process_interviews
+from my_masters_degree.synthetic_corpus import SyntheticCorpusConfig, generate_corpus
+
+
+def test_name_variants():
+    assert name_variants('Ademiro Alves (Sacolinha)') == {'ademiro alves', 'ademiro', 'alves', 'sacolinha'}
+    assert name_variants('Dona Rosali Maria Nunes') >= {'rosali', 'rosali maria', 'nunes', 'rosali nunes'}
+    assert name_variants('Unknown') == set()
+    # One name left after the title, or none but particles: no "ab ab" and no IndexError.
+    assert name_variants('Dr. Abel') == {'abel'}
+    assert name_variants('Sr. Da Silva') == {'silva', 'da silva'}
+    assert name_variants('De Da') == set()
+
+
+def test_drop_splits_chunks_at_removed_turns():
+    df = pd.DataFrame({
+        'interview_id': ['a'] * 6 + ['b'] * 2,
+        'group_id': [1, 1, 1, 1, 2, 2, 1, 1],
+        'chunk_id': [1, 1, 2, 2, 1, 1, 1, 1],
+        'original_text': ['x'] * 8,
+    })
+    keep = pd.Series([True, False, True, True, False, True, True, True]).to_numpy()
+    split = split_at_gaps(df, keep)
+    assert split.index.tolist() == [0, 2, 3, 5, 6, 7]
+    assert split['chunk_id'].tolist() == [1, 2, 2, 1, 1, 1]
+
+
+def test_scan_matches_whole_words_without_accents():
+    metadata = pd.DataFrame({
+        'mupe_code': ['PC_MA_HV001', 'PC_MA_HV002'],
+        'interviewee_name': ['José Antônio da Silva', 'Ana Lúcia Prado'],
+        'interviewer1': ['Márcia Ruiz', 'Márcia Ruiz'],
+        'interviewer2': ['Unknown', 'Unknown'],
+    })
+    df = pd.DataFrame({
+        'interview_id': ['pc_ma_hv001', 'pc_ma_hv001', 'pc_ma_hv001', 'pc_ma_hv002'],
+        'original_text': [
+            'Meu nome é Jose Antonio da Silva, mas todo mundo me chama de Zé.',
+            'A Ana trabalhava na fábrica, a Mariana também.',
+            'Obrigado, MÁRCIA.',
+            'Eu sou a Ana Lúcia, filha do seu Antônio.',
+        ],
+    })
+    scanner = NameScanner(metadata_patterns(metadata))
+    found = find_names(df, scanner)
+    first = found[found['row'] == 0]
+    assert 'Jose Antonio da Silva' in first['match'].tolist()
+    text = df['original_text'][0]
+    assert all(text[s:e] == m for s, e, m in first[['start', 'end', 'match']].itertuples(index=False))
+
+    # "Ana" belongs to interview 2 only, and "Mariana" is not a whole-word match.
+    assert 1 not in found['row'].tolist()
+    assert 1 in find_names(df, scanner, scope='corpus')['row'].tolist()
+    assert found.loc[found['row'] == 2, 'match'].tolist() == ['MÁRCIA']
+    assert set(found.loc[found['row'] == 3, 'match']) == {'Ana', 'Ana Lúcia'}
+
+    flagged = anonymise(df, scanner)
+    assert [bool(names) for names in flagged['names_found']] == [True, False, True, True]
+    assert anonymise(df, scanner, action='drop')['original_text'].tolist() == [df['original_text'][1]]
+
+
+def test_anonymise_chunked_interview(tmp_path):
+    paths = generate_corpus(tmp_path, SyntheticCorpusConfig(scale=0.2, segments_per_interview=(80, 120), with_audio=False))
+    train_df = pd.read_csv(paths.train_csv)
+    segmentations = find_segmentations(paths.segmentations_dir)
+    results = iter_process_interviews(train_df, segmentations, set(segmentations), max_workers=1)
+    samples = next(s for s in (chunk_interview(r) for r in results if r.status == 'ok') if len(s))
+    assert 'interview_id' not in samples.columns
+
+    # "Escola" is a participant of another interview only.
+    metadata = pd.DataFrame({
+        'mupe_code': ['PC_MA_HV900', 'PC_MA_HV901'],
+        'interviewee_name': ['Joana Fábrica', 'Maria Escola'],
+    })
+    scanner = NameScanner(metadata_patterns(metadata))
+    flagged = anonymise_interview(samples, scanner, 'pc_ma_hv900')
+    assert list(flagged.columns) == [*samples.columns, 'names_found']
+    has_name = samples['original_text'].str.contains(r'\bfábrica\b', case=False)
+    assert has_name.any()
+    assert (flagged['names_found'].str.len() > 0).tolist() == has_name.tolist()
+
+    dropped = anonymise_interview(samples, scanner, 'pc_ma_hv900', action='drop')
+    assert len(dropped) == (~has_name).sum()
+    # No chunk spans a dropped turn: its rows were consecutive before the drop.
+    positions = pd.Series(range(len(samples)), index=samples.index)[dropped.index]
+    for _, rows in positions.groupby([dropped['group_id'], dropped['chunk_id']]):
+        assert (rows.diff().dropna() == 1).all()
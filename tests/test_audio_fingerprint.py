@@ -0,0 +1,61 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import soundfile as sf
+from my_masters_degree.audio_fingerprint import find_duplicates, find_overlaps
+
+SR = 16000
+
+
+def _clip(seed, seconds=3.0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SR * seconds)) / SR
+    tones = rng.uniform(200, 3500, size=(40, 1))
+    onsets = rng.uniform(0, seconds, size=(40, 1))
+    envelope = np.exp(-((t - onsets) ** 2) / 0.02)
+    return (0.02 * (np.sin(2 * np.pi * tones * t) * envelope).sum(axis=0) + 0.002 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def _wav(data):
+    buf = io.BytesIO()
+    sf.write(buf, data, SR, format='WAV', subtype='PCM_16')
+    return buf.getvalue()
+
+
+def test_find_duplicates(tmp_path):
+    clips = {f'train/{k}.wav': _clip(k) for k in range(6)}
+    rng = np.random.default_rng(99)
+    shards = [
+        {p: _wav(clips[p]) for p in list(clips)[:3]},
+        {p: _wav(clips[p]) for p in list(clips)[3:]},
+    ]
+    shards[1]['train/copy_of_0.wav'] = shards[0]['train/0.wav']
+    noisy = clips['train/1.wav'][SR // 4:] + 0.003 * rng.standard_normal(len(clips['train/1.wav']) - SR // 4).astype(np.float32)
+    shards[1]['train/reupload_of_1.wav'] = _wav(noisy)
+
+    os.makedirs(tmp_path / 'data')
+    for k, shard in enumerate(shards):
+        rows = [{'file_path': p, 'audio': {'bytes': b, 'path': p}} for p, b in shard.items()]
+        pd.DataFrame(rows).to_parquet(tmp_path / 'data' / f'train-{k:05d}.parquet')
+
+    report = find_duplicates(str(tmp_path), max_workers=1)
+    assert report.exact == [['train/0.wav', 'train/copy_of_0.wav']]
+    assert report.near == [['train/0.wav', 'train/copy_of_0.wav'], ['train/1.wav', 'train/reupload_of_1.wav']]
+
+
+def test_find_overlaps():
+    df = pd.DataFrame({
+        'audio_id': [1, 1, 1, 2],
+        'start_time': [0.0, 10.0, 9.0, 5.0],
+        'end_time': [9.5, 12.0, 11.0, 6.0],
+    })
+    overlaps = find_overlaps(df, tolerance=0.1)
+    assert overlaps['start_time'].tolist() == [9.0, 10.0]
+    assert overlaps['overlap'].tolist() == [0.5, 1.0]
+
+
+def test_find_duplicates_without_clips(tmp_path):
+    report = find_duplicates(str(tmp_path), max_workers=1)
+    assert report.exact == [] and report.near == []
@@ -0,0 +1,109 @@
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import soundfile as sf
+from my_masters_degree.dailytalk_export import (
+    DailyTalkSpec,
+    export_dailytalk,
+    normalise_loudness,
+    resample_audio,
+)
+
+
+def _wav_bytes(data, sr):
+    buf = io.BytesIO()
+    sf.write(buf, data, sr, format='WAV', subtype='PCM_16')
+    return buf.getvalue()
+
+
+def test_resample_audio_length():
+    data = np.random.default_rng(0).uniform(-0.5, 0.5, 16000).astype(np.float32)
+    out = resample_audio(data, 16000, 22050)
+    assert len(out) == 22050
+    assert out.dtype == np.float32
+
+
+def test_normalise_loudness_respects_peak():
+    data = np.full(1000, 0.01, dtype=np.float32)
+    out = normalise_loudness(data, target_dbfs=-20.0, peak_dbfs=-1.0)
+    assert np.isclose(np.sqrt(np.mean(out ** 2)), 10 ** (-20 / 20), atol=1e-4)
+
+    loud = np.zeros(1000, dtype=np.float32)
+    loud[0] = 0.9
+    out = normalise_loudness(loud, target_dbfs=0.0, peak_dbfs=-1.0)
+    assert np.max(np.abs(out)) <= 10 ** (-1 / 20) + 1e-6
+
+
+def _write_shard(root, audio_map):
+    os.makedirs(root / 'data')
+    rows = [{'file_path': p, 'audio': {'bytes': b, 'path': p}} for p, b in audio_map.items()]
+    pd.DataFrame(rows).to_parquet(root / 'data' / 'train-00000-of-00001.parquet')
+
+
+def test_export_dailytalk_mixed_sample_rates(tmp_path):
+    tone = np.sin(np.linspace(0, 100, 8000)).astype(np.float32) * 0.3
+    audio_map = {
+        'train/a_1.wav': _wav_bytes(tone, 16000),
+        'train/a_2.wav': _wav_bytes(tone, 8000),
+        'train/a_3.wav': _wav_bytes(np.stack([tone, tone], axis=1), 16000),
+    }
+    parquet_dir = tmp_path / 'parquet'
+    _write_shard(parquet_dir, audio_map)
+    # Group 2 has a clip missing from the shards and is skipped.
+    df = pd.DataFrame({
+        'file_path': ["['train/a_1.wav']", "['train/a_2.wav', 'train/a_3.wav']", "['train/a_1.wav', 'train/gone.wav']"],
+        'speaker_code': ['SPK1', 'SPK2', 'SPK1'],
+        'start_time': [0.0, 1.0, 2.0],
+        'original_text': ['Olá.', 'Tudo bem?', 'Até logo.'],
+        'subsection': ['FAMÍLIA', 'FAMÍLIA', 'FAMÍLIA'],
+        'group_id': [1, 1, 2],
+        'interview_id': ['I1', 'I1', 'I1'],
+    })
+
+    output_dir = tmp_path / 'export'
+    report = export_dailytalk(df, str(parquet_dir), str(output_dir), DailyTalkSpec(), max_workers=1)
+    assert report.num_dialogues == 1
+    assert report.num_turns == 2
+    assert report.skipped_dialogues == 1 and report.missing_clips == 1
+    # 0.5 s + (1 s + 0.5 s) of source audio
+    assert np.isclose(report.audio_seconds, 2.0, atol=0.01)
+
+    assert os.listdir(output_dir / 'data') == ['0']
+    info = sf.info(os.path.join(output_dir, 'data', '0', '1_1_d0.wav'))
+    assert info.samplerate == 22050
+    assert info.channels == 1
+    assert info.subtype == 'PCM_16'
+
+    with open(os.path.join(output_dir, 'metadata.json'), encoding='utf-8') as f:
+        metadata = json.load(f)
+    assert metadata['0']['1']['text'] == 'Tudo bem?'
+    assert metadata['0']['source'] == {'interview_id': 'I1', 'group_id': 1, 'chunk_id': 1}
+
+
+def test_export_dailytalk_splits_long_groups_into_chunks(tmp_path):
+    from my_masters_degree.dialogue_chunker import chunk_groups
+
+    tone = np.sin(np.linspace(0, 100, 8000)).astype(np.float32) * 0.3
+    paths = [f'train/b_{k}.wav' for k in range(6)]
+    parquet_dir = tmp_path / 'parquet'
+    _write_shard(parquet_dir, {p: _wav_bytes(tone, 16000) for p in paths})
+    df = pd.DataFrame({
+        'file_path': [f"['{p}']" for p in paths],
+        'speaker_code': ['SPK1', 'SPK2'] * 3,
+        'start_time': [float(k) for k in range(6)],
+        'duration': [0.5] * 6,
+        'original_text': [f'T{k}' for k in range(6)],
+        'group_id': [1] * 6,
+        'interview_id': ['I1'] * 6,
+    })
+
+    chunked = chunk_groups(df, max_turns=2)
+    report = export_dailytalk(chunked, str(parquet_dir), str(tmp_path / 'export'), max_workers=1)
+    assert report.num_dialogues == 3 and report.num_turns == 6
+    with open(tmp_path / 'export' / 'metadata.json', encoding='utf-8') as f:
+        metadata = json.load(f)
+    assert [metadata[d]['source']['chunk_id'] for d in ('0', '1', '2')] == [1, 2, 3]
+    assert [metadata['2'][t]['text'] for t in ('0', '1')] == ['T4', 'T5']
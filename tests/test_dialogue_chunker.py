@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from my_masters_degree.dialogue_chunker import chunk_groups
+
+
+def _sequential_chunks(durations, speakers, max_duration, max_turns):
+    chunk_ids, chunk, p = [], 0, 0
+    while p < len(durations):
+        stop, total = p, 0.0
+        while stop < len(durations) and stop - p < max_turns and total + durations[stop] <= max_duration:
+            total += durations[stop]
+            stop += 1
+        stop = max(stop, p + 1)
+        if stop < len(durations):
+            changes = [j for j in range(p + 1, stop + 1) if speakers[j] != speakers[j - 1]]
+            if changes:
+                stop = changes[-1]
+        chunk += 1
+        chunk_ids += [chunk] * (stop - p)
+        p = stop
+    return chunk_ids
+
+
+def test_matches_sequential_greedy():
+    rng = np.random.default_rng(0)
+    rows = []
+    for interview in range(3):
+        for group in range(1, 6):
+            n = int(rng.integers(1, 60))
+            speakers = np.where(rng.random(n) < 0.7, np.arange(n) % 2, 0)
+            for k in range(n):
+                rows.append((f'I{interview}', group, float(k), float(rng.uniform(0.5, 25.0)), f'S{speakers[k]}'))
+    df = pd.DataFrame(rows, columns=['interview_id', 'group_id', 'start_time', 'duration', 'speaker_code'])
+
+    chunked = chunk_groups(df.sample(frac=1, random_state=1), max_duration=60.0, max_turns=8)
+
+    for _, group in chunked.groupby(['interview_id', 'group_id']):
+        expected = _sequential_chunks(group['duration'].tolist(), group['speaker_code'].tolist(), 60.0, 8)
+        assert group['chunk_id'].tolist() == expected
+        sizes = group.groupby('chunk_id')['duration'].agg(['sum', 'size'])
+        assert ((sizes['sum'] <= 60.0) | (sizes['size'] == 1)).all()
+        assert (sizes['size'] <= 8).all()
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from my_masters_degree.dialogue_index import DialogueIndex
+
+
+@pytest.fixture
+def mupetalk_df():
+    return pd.DataFrame({
+        'file_path': ["['train/1.wav']", "['train/2.wav']", "['train/3.wav']", "['train/4.wav']", "['train/5.wav']", "['train/6.wav']"],
+        'speaker_code': ['SPK1', 'INT1', 'SPK1', 'SPK2', 'INT1', 'SPK1'],
+        'group_id': [2, 1, 1, 1, 1, None],
+        'start_time': [20, 5, 0, 0, 5, 40],
+        'original_text': ['T1', 'T2', 'T3', 'T4', 'T5', 'T6'],
+        'interview_id': ['I2', 'I2', 'I2', 'I1', 'I1', 'I3'],
+    })
+
+
+def test_groups_are_sorted_and_contiguous(mupetalk_df):
+    index = DialogueIndex.from_frame(mupetalk_df)
+    assert index.interviews('SPK1') == ['I2', 'I3']
+    assert index.groups('I2') == [1, 2]
+    assert index.groups('I3') == []
+
+    turns = index.group_records('I2', 1)
+    assert [t['original_text'] for t in turns] == ['T3', 'T2']
+
+
+def test_speaker_dialogues_layout(mupetalk_df):
+    index = DialogueIndex.from_frame(mupetalk_df)
+    dialogues = index.speaker_dialogues('INT1', num_dialogues=2)
+    assert [d['interview_id'] for d in dialogues] == ['I2', 'I1']
+    assert [g['group_id'] for g in dialogues[0]['groups']] == [1, 2]
+
+    with pytest.raises(ValueError):
+        index.speaker_dialogues('SPK2', num_dialogues=2)
+
+
+def test_save_and_load_roundtrip(mupetalk_df, tmp_path):
+    index = DialogueIndex.from_frame(mupetalk_df)
+    index.save(tmp_path / 'index')
+    loaded = DialogueIndex.load(tmp_path / 'index')
+    assert loaded.speaker_dialogues('SPK1', 2) == index.speaker_dialogues('SPK1', 2)
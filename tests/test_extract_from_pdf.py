@@ -0,0 +1,30 @@
+from pathlib import Path
+
+from my_masters_degree.extract_from_pdf import get_mupe_code, parse_interview_lines
+
+
+def test_parse_interview_lines_skips_noise_and_title():
+    lines = [
+        '1/29/26, 8:18 PM Museu da Pessoa',
+        'Maria Show',
+        'autoria: Museu da Pessoa personagem: Maria',
+        'P - Qual é o seu nome?',
+        'R - Maria. Nasci em',
+        'São Paulo.',
+        'https://museudapessoa.org/historia-de-vida/maria/?download_integra_text_pdf 1/2',
+        '1/29/26, 8:18 PM Museu da Pessoa',
+        'Maria Show',
+        '2/2',
+        'P - Obrigada.',
+    ]
+    assert list(parse_interview_lines(lines)) == [
+        ('p1', 'Qual é o seu nome?'),
+        ('r1', 'Maria. Nasci em São Paulo.'),
+        ('p2', 'Obrigada.'),
+    ]
+
+
+def test_get_mupe_code():
+    assert get_mupe_code(Path('pc_ma_hv064_durval.pdf')) == 'PC_MA_HV064'
+    assert get_mupe_code(Path('HV241.pdf')) == 'PC_MA_HV241'
+    assert get_mupe_code(Path('mupe-adilson.pdf')) == 'mupe-adilson'
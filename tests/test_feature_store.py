@@ -0,0 +1,63 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import soundfile as sf
+from my_masters_degree.feature_store import FeatureConfig, FeatureStore, compute_features, extract_features
+
+SR = 16000
+
+
+def _write_shards(root, clips, per_shard=3):
+    os.makedirs(root / 'data', exist_ok=True)
+    items = list(clips.items())
+    for k in range(0, len(items), per_shard):
+        rows = []
+        for path, data in items[k:k + per_shard]:
+            buf = io.BytesIO()
+            sf.write(buf, data, SR, format='WAV', subtype='PCM_16')
+            rows.append({'file_path': path, 'audio': {'bytes': buf.getvalue(), 'path': path}})
+        pd.DataFrame(rows).to_parquet(root / 'data' / f'train-{k:05d}.parquet')
+
+
+def _tone(freq, seconds):
+    t = np.arange(int(SR * seconds)) / SR
+    return (0.3 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def test_compute_features_batch_matches_single():
+    config = FeatureConfig(sample_rate=SR, pitch=True, energy=True)
+    short, long = _tone(200, 0.5), _tone(150, 1.2)
+    batched = compute_features([short, long], config)
+    assert [f.shape for f in batched] == [(len(short) // 256 + 1, 82), (len(long) // 256 + 1, 82)]
+    np.testing.assert_allclose(batched[0], compute_features([short], config)[0], atol=1e-3)
+    f0 = batched[1][5:-5, 80]
+    assert np.all(np.abs(f0 - 150) < 5)
+
+
+def test_extract_features_is_incremental(tmp_path):
+    clips = {f'train/{k}.wav': _tone(120 + 20 * k, 0.3 + 0.1 * k) for k in range(5)}
+    _write_shards(tmp_path / 'parquet', clips)
+    config = FeatureConfig(sample_rate=SR, pitch=True)
+    parquet_dir = str(tmp_path / 'parquet')
+
+    store, report = extract_features(parquet_dir, tmp_path / 'store', config, file_paths=list(clips)[:3], max_workers=1)
+    assert (report.computed, report.cached) == (3, 0)
+    first = store.get('train/0.wav')['mel'].copy()
+
+    store, report = extract_features(parquet_dir, tmp_path / 'store', config, file_paths=[*clips, 'train/x.wav'], max_workers=2)
+    assert (report.computed, report.cached, report.missing) == (2, 3, 1)
+    np.testing.assert_array_equal(store.get('train/0.wav')['mel'], first)
+    expected = compute_features([clips['train/4.wav']], config)[0]
+    np.testing.assert_allclose(store.get('train/4.wav')['f0'], expected[:, 80], atol=1e-4)
+
+    # Bytes appended after the last index update are discarded on reopen.
+    with open(store.root / 'features.f32', 'ab') as f:
+        f.write(b'\0' * 100)
+    reopened = FeatureStore(tmp_path / 'store', config)
+    assert len(reopened) == 5
+    np.testing.assert_array_equal(reopened.get('train/0.wav')['mel'], first)
+
+    _, report = extract_features(parquet_dir, tmp_path / 'store', FeatureConfig(sample_rate=SR, n_mels=40), max_workers=1)
+    assert (report.computed, report.cached) == (5, 0)
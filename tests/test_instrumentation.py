@@ -0,0 +1,44 @@
+import json
+
+import pytest
+from my_masters_degree import instrumentation
+
+
+@pytest.fixture
+def profiling():
+    instrumentation.enable()
+    instrumentation.reset()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_by_default_records_nothing():
+    instrumentation.disable()
+    instrumentation.reset()
+    with instrumentation.span("outer"):
+        instrumentation.increment("rows", 10)
+    report = instrumentation.report()
+    assert report["spans"] == {}
+    assert report["counters"] == {}
+    assert instrumentation.write_report() is None
+
+
+def test_nested_spans_and_counters(profiling, tmp_path):
+    @instrumentation.timed("inner")
+    def work():
+        instrumentation.increment("rows", 5)
+
+    with instrumentation.span("outer"):
+        work()
+        work()
+
+    report = instrumentation.report()
+    assert report["spans"]["outer;inner"]["count"] == 2
+    assert report["spans"]["outer"]["count"] == 1
+    assert report["counters"]["rows"] == 10
+
+    json_path = instrumentation.write_report(tmp_path, run_name="test")
+    assert json.loads(json_path.read_text())["counters"]["rows"] == 10
+    folded = json_path.with_suffix(".folded").read_text().splitlines()
+    assert [line.split(" ")[0] for line in folded] == ["outer", "outer;inner"]
@@ -0,0 +1,77 @@
+import pandas as pd
+from my_masters_degree.main import find_segmentations, process_interview, process_interviews
+from my_masters_degree.synthetic_corpus import SyntheticCorpusConfig, generate_corpus
+
+SMALL = SyntheticCorpusConfig(scale=0.2, segments_per_interview=(80, 120), with_audio=False)
+
+
+def test_parallel_processing_matches_serial_and_reports_failures(tmp_path):
+    paths = generate_corpus(tmp_path, SMALL)
+    train_df = pd.read_csv(paths.train_csv)
+    segmentations = find_segmentations(paths.segmentations_dir)
+    audio_ids = sorted(segmentations)
+    broken, excluded = audio_ids[1], audio_ids[-1]
+
+    segmentations[broken].write_text('{"segments": "broken"}', encoding='utf-8')
+    allowed = set(audio_ids) - {excluded}
+
+    serial = process_interviews(train_df, segmentations, allowed, max_workers=1)
+    parallel = process_interviews(train_df, segmentations, allowed, max_workers=2)
+
+    assert [r.audio_id for r in parallel] == audio_ids
+    assert [r.status for r in parallel] == [r.status for r in serial]
+    by_id = {r.audio_id: r for r in parallel}
+    assert by_id[broken].status == 'failed' and 'ValidationError' in by_id[broken].reason
+    assert by_id[excluded].status == 'skipped'
+
+    ok = [r for r in parallel if r.status == 'ok']
+    assert ok
+    for s, p in zip(serial, parallel):
+        if s.status == 'ok':
+            pd.testing.assert_frame_equal(s.sample, p.sample)
+
+    direct = process_interview(train_df, ok[0].audio_id, segmentations[ok[0].audio_id])
+    pd.testing.assert_frame_equal(direct, ok[0].sample)
+
+
+def test_store_backed_processing_matches_csv(tmp_path):
+    from my_masters_degree.main import get_well_behaved_samples
+    from my_masters_degree.mupe_store import build_store, is_store_complete
+
+    paths = generate_corpus(tmp_path, SMALL)
+    train_df = pd.read_csv(paths.train_csv)
+    store_dir = tmp_path / 'store'
+    assert not is_store_complete(store_dir)
+    build_store({'train': paths.train_csv}, store_dir)
+    assert is_store_complete(store_dir)
+    segmentations = find_segmentations(paths.segmentations_dir)
+    audio_ids = sorted(segmentations)
+
+    from_csv = get_well_behaved_samples(train_df, audio_ids)
+    from_store = get_well_behaved_samples(None, audio_ids, store_dir=store_dir)
+    pd.testing.assert_frame_equal(from_csv.reset_index(drop=True), from_store.reset_index(drop=True))
+
+    csv_results = process_interviews(train_df, segmentations, set(audio_ids), max_workers=1)
+    store_results = process_interviews(None, segmentations, set(audio_ids), max_workers=2, store_dir=store_dir)
+    assert [r.status for r in store_results] == [r.status for r in csv_results]
+    for c, s in zip(csv_results, store_results):
+        if c.status == 'ok':
+            pd.testing.assert_frame_equal(c.sample, s.sample, check_dtype=False)
+
+
+def test_bounded_map_submits_lazily_and_keeps_order():
+    from concurrent.futures import ThreadPoolExecutor
+    from my_masters_degree.utils import bounded_map
+
+    pulled = []
+
+    def items():
+        for i in range(10):
+            pulled.append(i)
+            yield i
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = bounded_map(executor, lambda x: x * x, items(), max_in_flight=3)
+        assert next(results) == 0
+        assert len(pulled) == 3
+        assert list(results) == [x * x for x in range(1, 10)]
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from torch.utils.data import DataLoader
+from my_masters_degree.mupetalk_dataset import (
+    DurationBucketSampler,
+    MupeTalkDataset,
+    MupeTalkIterableDataset,
+    ParquetAudioSource,
+    collate_dialogues,
+    measure_throughput,
+)
+from my_masters_degree.dialogue_chunker import chunk_groups
+from my_masters_degree.synthetic_corpus import SyntheticCorpusConfig, generate_corpus
+
+SMALL = SyntheticCorpusConfig(scale=0.1, segments_per_interview=(150, 200), rows_per_shard=100)
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    paths = generate_corpus(tmp_path_factory.mktemp('corpus'), SMALL)
+    mupetalk_df = pd.read_csv(paths.mupetalk_csv)
+    return MupeTalkDataset(mupetalk_df, ParquetAudioSource(str(paths.parquet_dir), sample_rate=SMALL.sample_rate))
+
+
+def test_item_layout(dataset):
+    item = dataset[0]
+    n_turns = len(item['texts'])
+    assert item['turn_bounds'].shape == (n_turns, 2)
+    assert int(item['turn_bounds'][-1, 1]) == len(item['audio'])
+    assert len(item['speaker_ids']) == len(item['subsections']) == n_turns
+
+
+def test_bucket_sampler_limits_padded_size():
+    durations = np.array([1.0, 9.0, 2.0, 8.0, 1.5, 30.0])
+    sampler = DurationBucketSampler(durations, max_batch_seconds=20.0, seed=3)
+    batches = list(sampler)
+    assert sorted(i for b in batches for i in b) == list(range(6))
+    for b in batches:
+        assert len(b) == 1 or len(b) * durations[b].max() <= 20.0
+    assert [5] in batches
+
+
+def test_loader_with_workers(dataset):
+    sampler = DurationBucketSampler(dataset.durations, max_batch_seconds=120.0)
+    loader = DataLoader(dataset, batch_sampler=sampler, collate_fn=collate_dialogues, num_workers=2)
+    report = measure_throughput(loader)
+    assert report.samples == len(dataset)
+    assert 0.0 <= report.padding_ratio < 1.0
+
+    streamed = DataLoader(MupeTalkIterableDataset(dataset), batch_size=None, num_workers=2)
+    assert sorted((item['interview_id'], item['group_id'], item['chunk_id']) for item in streamed) == sorted(dataset.dialogues)
+
+
+def test_parquet_source_rejects_missing_clips(dataset):
+    interview_id, group_id, _ = dataset.dialogues[0]
+    turns = dataset.turns(0)
+    turns[0] = dict(turns[0], file_path="['train/missing.wav']")
+    with pytest.raises(KeyError, match='missing.wav'):
+        dataset.audio_source.load_group(interview_id, group_id, turns)
+
+
+def test_long_groups_are_split_into_chunk_items(dataset):
+    chunked = chunk_groups(dataset.frame.drop(columns='chunk_id'), max_turns=2)
+    assert chunked['chunk_id'].max() > 1
+    split = MupeTalkDataset(chunked, dataset.audio_source)
+    assert len(split) == len(chunked.drop_duplicates(['interview_id', 'group_id', 'chunk_id'])) > len(dataset)
+    assert all(len(split.turns(i)) <= 2 for i in range(len(split)))
+    assert split.durations.sum() == pytest.approx(dataset.durations.sum())
+    item = split[1]
+    assert (item['interview_id'], item['group_id'], item['chunk_id']) == split.dialogues[1]
@@ -0,0 +1,75 @@
+import json
+import pandas as pd
+import pytest
+from my_masters_degree.main import find_segmentations, iter_process_interviews, write_interviews
+from my_masters_degree.partitioning import in_partition, merge_partials, partial_stem, partition_of, write_partial_manifest
+from my_masters_degree.streaming_output import InterviewCsvWriter
+from my_masters_degree.synthetic_corpus import SyntheticCorpusConfig, generate_corpus
+
+SMALL = SyntheticCorpusConfig(scale=0.2, segments_per_interview=(80, 120), with_audio=False)
+
+
+def test_partition_of_is_stable_and_covers_every_key():
+    keys = list(range(1000, 1100))
+    parts = [in_partition(keys, 4, k) for k in range(4)]
+    assert sorted(sum(parts, [])) == keys
+    assert all(parts)
+    # crc32(b"1234") == 0x9BE3E0A3
+    assert partition_of(1234, 7) == 0x9BE3E0A3 % 7
+    with pytest.raises(ValueError):
+        in_partition(keys, 4, 4)
+
+
+def test_merged_partitions_match_single_run(tmp_path):
+    paths = generate_corpus(tmp_path, SMALL)
+    train_df = pd.read_csv(paths.train_csv)
+    segmentations = find_segmentations(paths.segmentations_dir)
+    allowed = set(segmentations)
+
+    expected_path = tmp_path / 'single.csv'
+    with InterviewCsvWriter(expected_path) as writer:
+        write_interviews(iter_process_interviews(train_df, segmentations, allowed, max_workers=1), writer,
+                         review_dir=tmp_path / 'review', review_workers=2)
+    single_rows = writer.manifest['rows']
+    ok = sorted(a for a, status in writer.done.items() if status == 'ok')
+    assert sorted(p.name for p in (tmp_path / 'review').glob('*.xlsx')) == sorted(f'mupe_train_sample_{a}.xlsx' for a in ok)
+
+    partials_dir = tmp_path / 'partials'
+    run_info = {'max_chunk_seconds': 60.0}
+    num_partitions = 3
+    merged_path = tmp_path / 'merged.csv'
+    for k in range(num_partitions):
+        with pytest.raises(ValueError, match='not finished'):
+            merge_partials(partials_dir, num_partitions, merged_path)
+        ids = set(in_partition(segmentations, num_partitions, k))
+        results = iter_process_interviews(train_df, {a: p for a, p in segmentations.items() if a in ids}, allowed, max_workers=1)
+        partial_path = partials_dir / f'{partial_stem(k, num_partitions)}.csv'
+        with InterviewCsvWriter(partial_path, run_info=run_info) as writer:
+            write_interviews(results, writer, keep_audio_id=True)
+        write_partial_manifest(partials_dir, k, num_partitions, writer.done,
+                               rows=writer.manifest['rows'], checksum=writer.manifest['sha256'], run_info=run_info)
+
+    summary = merge_partials(partials_dir, num_partitions, merged_path)
+    assert summary['rows'] == single_rows
+    assert sorted(summary['audio_ids']) == sorted(segmentations)
+    assert merged_path.read_bytes() == expected_path.read_bytes()
+    # Interviews split across read chunks come out whole.
+    assert merge_partials(partials_dir, num_partitions, merged_path, chunksize=7)['rows'] == single_rows
+    assert merged_path.read_bytes() == expected_path.read_bytes()
+
+    manifest_paths = [partials_dir / f'{partial_stem(k, num_partitions)}.json' for k in range(num_partitions)]
+    manifest_path = next(p for p in manifest_paths if json.loads(p.read_text())['rows'])
+    manifest = json.loads(manifest_path.read_text())
+    manifest['rows'] += 1
+    manifest_path.write_text(json.dumps(manifest))
+    merged_path.unlink()
+    with pytest.raises(ValueError, match='its manifest'):
+        merge_partials(partials_dir, num_partitions, merged_path, chunksize=7)
+    assert not merged_path.exists()
+    manifest['rows'] -= 1
+    manifest_path.write_text(json.dumps(manifest))
+
+    partial = partials_dir / 'mupetalk_train.part-00001-of-00003.csv'
+    partial.write_text(partial.read_text()[:-10])
+    with pytest.raises(ValueError, match='does not match'):
+        merge_partials(partials_dir, num_partitions, merged_path)
@@ -0,0 +1,57 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+import soundfile as sf
+from my_masters_degree.postprocess_dataset import get_statistics, load_and_validate_mupetalk
+
+
+@pytest.fixture
+def validated_df():
+    df = pd.DataFrame({
+        'file_path': ["['train/a_1.wav']", "['train/a_2.wav', 'train/a_3.wav']", "['train/a_4.wav']", "['train/a_5.wav']", "['train/b_1.wav']"],
+        'file_id': ['[1]', '[2, 3]', '[4]', '[5]', '[1]'],
+        'speaker_code': ['INT', 'SPK', 'SPK', 'INT', 'INT'],
+        'start_time': [0.0, 10.0, 40.0, 70.0, 0.0],
+        'end_time': [10.0, 40.0, 70.0, 80.0, 60.0],
+        'duration': [10.0, 30.0, 30.0, 10.0, 60.0],
+        'original_text': ['P1', 'R1', 'R2', 'P2', 'P3'],
+        'subsection': ['FAMÍLIA', 'FAMÍLIA', 'ESCOLA', 'ESCOLA', 'ESCOLA'],
+        'group_id': [1, 1, 1, 1, 1],
+        'interview_id': ['I1', 'I1', 'I1', 'I1', 'I2'],
+    })
+    return load_and_validate_mupetalk(df)
+
+
+def test_group_and_speaker_statistics(validated_df):
+    stats = get_statistics(validated_df)
+
+    groups = stats['groups'].set_index('interview_id')
+    assert groups.loc['I1', 'turns'] == 4
+    assert groups.loc['I1', 'speech_s'] == 80.0
+    assert groups.loc['I1', 'speaker_changes'] == 2
+    assert groups.loc['I1', 'speaker_change_rate'] == pytest.approx(2 / 3)
+    assert groups.loc['I2', 'speaker_changes'] == 0
+
+    hours = stats['speaker_subsection_hours']
+    assert hours.loc['SPK', 'ESCOLA'] == pytest.approx(30 / 3600)
+    assert hours.loc['INT', 'TOTAL'] == pytest.approx(80 / 3600)
+
+    summary = stats['summary'].set_index('metric')['value']
+    assert summary['groups'] == 2
+    assert summary['hours'] == pytest.approx(140 / 3600)
+
+
+def test_audio_statistics(validated_df):
+    sr = 16000
+    data = np.zeros(sr, dtype=np.float32)
+    data[sr // 4:sr // 2] = 1.0
+    buf = io.BytesIO()
+    sf.write(buf, data, sr, format='WAV', subtype='PCM_16')
+
+    stats = get_statistics(validated_df, audio_map={'train/a_1.wav': buf.getvalue()}, max_workers=1)
+    audio = stats['audio'].iloc[0]
+    assert audio['leading_silence_s'] == pytest.approx(0.25, abs=0.02)
+    assert audio['trailing_silence_s'] == pytest.approx(0.5, abs=0.02)
+    assert audio['clipped_ratio'] == pytest.approx(0.25, abs=0.01)
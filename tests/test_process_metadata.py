@@ -0,0 +1,53 @@
+import pandas as pd
+from my_masters_degree.process_metadata import (
+    GenderClassification,
+    GenderItem,
+    NameGenderLexicon,
+    classify_genders,
+    name_keys,
+)
+
+
+def test_name_keys():
+    assert name_keys('Waldemar Antonio G. Saroka (Tuka)') == (None, ['waldemar antonio', 'waldemar'])
+    assert name_keys('Vera da Silva') == (None, ['vera'])
+    assert name_keys('Dona Cida') == ('Feminino', ['cida'])
+
+
+def test_lexicon_first_with_fallback_for_unknown_names():
+    metadata = pd.DataFrame({
+        'interviewee_name': ['Maria José da Silva', 'José Carlos Souza', 'Sônia London', 'Ariel Lima', 'Ariel Souza'],
+        'gender': ['Feminino', 'Masculino', 'Feminino', 'Masculino', 'Feminino'],
+    })
+    lexicon = NameGenderLexicon.from_metadata(metadata)
+    sent = []
+
+    def fallback(names):
+        sent.append(names)
+        return GenderClassification(results=[GenderItem(name='Ariel Costa', gender='Feminino')])
+
+    result = classify_genders(
+        ['MARIA JOSE Pereira', 'Jose Maria Santos', 'Sonia Ruiz', 'Ariel Costa', 'Kauê Silva', 'Sonia Ruiz'],
+        lexicon,
+        fallback=fallback,
+    )
+    assert sent == [['Ariel Costa', 'Kauê Silva']]
+    assert [item.gender for item in result.results] == [
+        'Feminino', 'Masculino', 'Feminino', 'Feminino', 'Unknown', 'Feminino',
+    ]
+
+
+def test_missing_names_are_unknown_and_never_looked_up():
+    metadata = pd.DataFrame({'interviewee_name': ['Maria Silva'], 'gender': ['Feminino']})
+    lexicon = NameGenderLexicon.from_metadata(metadata)
+    sent = []
+
+    def fallback(names):
+        sent.append(names)
+        return None
+
+    result = classify_genders(['Maria Souza', float('nan'), '  ', None], lexicon, fallback=fallback)
+    assert sent == []
+    assert [(item.name, item.gender) for item in result.results] == [
+        ('Maria Souza', 'Feminino'), ('', 'Unknown'), ('  ', 'Unknown'), ('', 'Unknown'),
+    ]
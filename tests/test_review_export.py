@@ -0,0 +1,33 @@
+import pandas as pd
+from openpyxl import load_workbook
+from my_masters_degree.process_dataset import ClassLabel
+from my_masters_degree.review_export import export_review_workbooks, group_palette
+
+
+def test_palette_is_distinct_for_many_groups():
+    palette = group_palette(200)
+    assert len(set(palette)) == 200
+
+
+def test_export_review_workbooks(tmp_path):
+    df = pd.DataFrame({
+        'file_id': [[1, 2], [3], [4], [6]],
+        'speaker_code': ['A', 'B', 'A', 'B'],
+        'subsection': [ClassLabel.FAMILIA] * 4,
+        'group_id': pd.array([1, 1, 2, None], dtype='Int8'),
+    })
+    paths = export_review_workbooks({10: df, 11: df.iloc[:2]}, tmp_path, max_workers=1)
+    assert [p.name for p in paths] == ['mupe_train_sample_10.xlsx', 'mupe_train_sample_11.xlsx']
+
+    ws = load_workbook(paths[0])['review']
+    assert [c.value for c in ws[2]] == ['[1, 2]', 'A', 'FAMÍLIA', 1]
+    assert ws['D5'].value is None
+    rules = [rule for cf in ws.conditional_formatting for rule in cf.rules]
+    assert [rule.formula for rule in rules] == [['$D2=1'], ['$D2=2']]
+
+
+def test_review_workbooks_from_a_generator_in_a_pool(tmp_path):
+    df = pd.DataFrame({'speaker_code': ['A', 'B'], 'group_id': pd.array([1, 1], dtype='Int8')})
+    paths = export_review_workbooks(((key, df) for key in range(5)), tmp_path, max_workers=2)
+    assert [p.name for p in paths] == [f'mupe_train_sample_{key}.xlsx' for key in range(5)]
+    assert all(p.exists() for p in paths)
@@ -53,3 +53,104 @@ def test_join_audio_segments():
     assert out_sr == sr
     assert np.allclose(combined[:sr], 0, atol=1e-4)
     assert np.allclose(combined[sr:], 0.5, atol=1e-4)
+
+def _write_parquet_dir(root, paths, sr=16000):
+    rows = []
+    for k, p in enumerate(paths):
+        buf = io.BytesIO()
+        sf.write(buf, np.full(sr // 10, 0.1 * (k + 1)), sr, format='WAV', subtype='PCM_16')
+        rows.append({'file_path': p, 'audio': {'bytes': buf.getvalue(), 'path': p}})
+    os.makedirs(os.path.join(root, 'data'))
+    pd.DataFrame(rows).to_parquet(os.path.join(root, 'data', 'train-00000.parquet'))
+
+def test_export_samples_resumes(tmp_path, monkeypatch):
+    from my_masters_degree import sampling_mupetalks
+
+    interviews = [{'interview_id': 'I1', 'groups': [
+        {'group_id': g, 'turns': [{'file_path': f"['train/{g}.wav']", 'original_text': f'T{g}'}]} for g in (1, 2)
+    ]}]
+    parquet_dir = str(tmp_path / 'parquet')
+    _write_parquet_dir(parquet_dir, ['train/1.wav', 'train/2.wav'])
+    output_dir = str(tmp_path / 'out')
+
+    manifest = sampling_mupetalks.export_samples(interviews, parquet_dir, output_dir, run_info={'speaker_code': 'SPK1'})
+    assert len(manifest['groups']) == 2
+    wav_2 = tmp_path / 'out' / 'sample_0' / 'sample_0_groups' / 'sample_0_id2.wav'
+    original = wav_2.read_bytes()
+    wav_2.write_bytes(original[:100])
+
+    requested = []
+    extract = sampling_mupetalks.extract_audio_from_parquets
+    monkeypatch.setattr(sampling_mupetalks, 'extract_audio_from_parquets', lambda paths, d: requested.extend(paths) or extract(paths, d))
+    sampling_mupetalks.export_samples(interviews, parquet_dir, output_dir, resume=True, run_info={'speaker_code': 'SPK1'})
+    assert requested == ['train/2.wav']
+    assert wav_2.read_bytes() == original
+    assert not [f for f in os.listdir(wav_2.parent) if f.endswith('.tmp')]
+
+    with pytest.raises(ValueError):
+        sampling_mupetalks.export_samples(interviews, parquet_dir, output_dir, resume=True, run_info={'speaker_code': 'SPK2'})
+
+def test_export_samples_records_missing_audio(tmp_path, monkeypatch):
+    from my_masters_degree import sampling_mupetalks
+
+    interviews = [{'interview_id': 'I1', 'groups': [
+        {'group_id': g, 'turns': [{'file_path': f"['train/{g}.wav']"}]} for g in (1, 2)
+    ]}]
+    parquet_dir = str(tmp_path / 'parquet')
+    _write_parquet_dir(parquet_dir, ['train/1.wav'])
+    output_dir = str(tmp_path / 'out')
+
+    manifest = sampling_mupetalks.export_samples(interviews, parquet_dir, output_dir)
+    assert manifest['groups']['sample_0/sample_0_id2']['status'] == 'missing_audio'
+    assert sampling_mupetalks.load_manifest(output_dir) == manifest
+
+    requested = []
+    monkeypatch.setattr(sampling_mupetalks, 'extract_audio_from_parquets', lambda paths, d: requested.extend(paths) or {})
+    sampling_mupetalks.export_samples(interviews, parquet_dir, output_dir, resume=True)
+    assert requested == []
+
+def test_stitch_turns_restores_pauses():
+    from my_masters_degree.sampling_mupetalks import stitch_turns
+
+    sr = 16000
+    def clip(lead, speech, trail):
+        data = np.concatenate([np.zeros(int(lead * sr)), np.full(int(speech * sr), 0.5), np.zeros(int(trail * sr))])
+        buf = io.BytesIO()
+        sf.write(buf, data, sr, format='WAV', subtype='PCM_16')
+        return buf.getvalue()
+
+    audio_map = {
+        'train/a/a_1_10.0_11.0.wav': clip(0.2, 0.6, 0.2),
+        'train/a/a_2_11.3_12.0.wav': clip(0.1, 0.5, 0.1),
+        'train/a/a_3_20.0_21.0.wav': clip(0.0, 1.0, 0.0),
+    }
+    turns = [
+        {'file_path': "['train/a/a_1_10.0_11.0.wav', 'train/a/a_2_11.3_12.0.wav']"},
+        {'file_path': "['train/a/a_3_20.0_21.0.wav']"},
+    ]
+    audio, out_sr, offsets = stitch_turns(turns, audio_map, max_pause=1.0, margin_seconds=0.0)
+
+    assert out_sr == sr
+    # 0.6s speech, 0.2 + 0.3 + 0.1 = 0.6s pause, 0.5s speech, 9s gap clamped to 1s, 1s speech.
+    assert len(audio) == int(3.7 * sr)
+    assert np.allclose(offsets, [(0.0, 1.7), (2.7, 3.7)])
+    assert np.allclose(audio[int(0.61 * sr):int(1.19 * sr)], 0, atol=1e-4)
+    assert np.allclose(audio[int(2.71 * sr):], 0.5, atol=1e-3)
+
+def test_partitioned_export_merges_into_one_manifest(tmp_path):
+    from my_masters_degree import sampling_mupetalks
+
+    interviews = [
+        {'interview_id': f'I{k}', 'groups': [{'group_id': 1, 'turns': [{'file_path': f"['train/{k}.wav']"}]}]}
+        for k in range(6)
+    ]
+    parquet_dir = str(tmp_path / 'parquet')
+    _write_parquet_dir(parquet_dir, [f'train/{k}.wav' for k in range(6)])
+    single = sampling_mupetalks.export_samples(interviews, parquet_dir, str(tmp_path / 'single'))
+
+    output_dir = str(tmp_path / 'parts')
+    for k in range(2):
+        sampling_mupetalks.export_samples(interviews, parquet_dir, output_dir, partition=(k, 2))
+    merged = sampling_mupetalks.merge_export_manifests(output_dir, 2)
+    assert merged == single
+    assert sampling_mupetalks.load_manifest(output_dir) == single
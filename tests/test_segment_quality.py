@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+from my_masters_degree.segment_quality import add_quality_scores, filter_groups, score_segments
+
+
+def test_score_segments():
+    scores = score_segments(['Meu nome é Rosa', 'sim', 'olá'], ['meu nome e rosa', 'sim senhor', ''], max_workers=1, chunk_size=2)
+    assert scores[:, 0] == pytest.approx([0.0, 1.0, 1.0])
+    assert scores[1, 1] == pytest.approx(7 / 3)
+
+
+def test_bad_segments_split_groups():
+    n = 12
+    df = pd.DataFrame({
+        'interview_id': ['I1'] * 10 + ['I2'] * 2,
+        'group_id': [1] * 10 + [1] * 2,
+        'start_time': np.arange(n, dtype=float),
+        'original_text': ['ok'] * n,
+        'reference': ['ok'] * n,
+    })
+    df.loc[5, 'original_text'] = 'errado'
+    df.loc[11, 'reference'] = None
+
+    scored = add_quality_scores(df, 'reference', max_workers=1)
+    assert np.isnan(scored.loc[11, 'wer'])
+
+    filtered = filter_groups(scored, max_wer=0.5, min_len_group=2)
+    assert filtered.loc[filtered['interview_id'] == 'I1', 'group_id'].tolist() == [1] * 5 + [2] * 4
+    assert filtered.loc[filtered['interview_id'] == 'I2', 'group_id'].tolist() == [1, 1]
+
+    assert 5 not in filter_groups(scored, max_wer=0.5, min_len_group=5).index
+    assert len(filter_groups(scored, max_wer=0.5, min_len_group=5)) == 5
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+from my_masters_degree.dialogue_index import DialogueIndex
+from my_masters_degree.selection import SelectionIndex
+
+
+@pytest.fixture
+def frames():
+    metadata = pd.DataFrame({
+        'mupe_code': ['PC_MA_HV001', 'PC_MA_HV002'],
+        'gender': ['Feminino', 'Masculino'],
+        'birth_state': ['São Paulo', 'Bahia'],
+    })
+    mupetalk = pd.DataFrame({
+        'interview_id': ['pc_ma_hv001'] * 4 + ['pc_ma_hv002'] * 2,
+        'group_id': [1, 1, 2, 2, 1, 1],
+        'speaker_code': ['INT', 'A', 'INT', 'A', 'INT2', 'B'],
+        'start_time': [0.0, 10.0, 100.0, 110.0, 0.0, 10.0],
+        'duration': [10.0, 30.0, 5.0, 200.0, 20.0, 40.0],
+        'subsection': ['ESCOLA', 'TRABALHO/ COMÉRCIO', 'ESCOLA', 'FAMÍLIA', 'ESCOLA', 'TRABALHO/ COMÉRCIO'],
+        'original_text': ['p', 'r', 'p', 'r', 'p', 'r'],
+        'file_path': ["['a']"] * 6,
+    })
+    return metadata, mupetalk
+
+
+def test_select_groups(frames, tmp_path):
+    metadata, mupetalk = frames
+    index = SelectionIndex.build(metadata, mupetalk)
+    index.save(tmp_path)
+    index = SelectionIndex.load(tmp_path)
+
+    selected = index.select(subsection='TRABALHO/ COMÉRCIO', min_duration=30, max_duration=120)
+    assert list(selected[['interview_id', 'group_id']].itertuples(index=False, name=None)) == [
+        ('pc_ma_hv001', 1), ('pc_ma_hv002', 1),
+    ]
+    assert len(index.select(gender='Feminino', birth_state=['São Paulo', 'Bahia'], speaker_code='A')) == 2
+    assert index.select(gender='Feminino', min_duration=300).empty
+    with pytest.raises(KeyError):
+        index.select(title='x')
+
+    dialogues = SelectionIndex.to_dialogues(selected, DialogueIndex.from_frame(mupetalk))
+    assert [d['interview_id'] for d in dialogues] == ['pc_ma_hv001', 'pc_ma_hv002']
+    assert [t['speaker_code'] for t in dialogues[0]['groups'][0]['turns']] == ['INT', 'A']
@@ -0,0 +1,63 @@
+import io
+
+import pandas as pd
+import pytest
+from my_masters_degree.main import chunk_interview, find_segmentations, iter_process_interviews
+from my_masters_degree.streaming_output import InterviewCsvWriter, load_stream_manifest, read_partial
+from my_masters_degree.synthetic_corpus import SyntheticCorpusConfig, generate_corpus
+
+SMALL = SyntheticCorpusConfig(scale=0.2, segments_per_interview=(80, 120), with_audio=False)
+
+
+def test_streamed_output_survives_interruption(tmp_path):
+    paths = generate_corpus(tmp_path, SMALL)
+    train_df = pd.read_csv(paths.train_csv)
+    segmentations = find_segmentations(paths.segmentations_dir)
+    results = list(iter_process_interviews(train_df, segmentations, set(segmentations), max_workers=2))
+    assert [r.audio_id for r in results] == sorted(segmentations)
+    ok = [r for r in results if r.status == 'ok']
+    assert len(ok) >= 3
+    expected = pd.read_csv(io.StringIO(pd.concat(chunk_interview(r) for r in ok).to_csv(index=False)))
+
+    output = tmp_path / 'mupetalk_train.csv'
+    with pytest.raises(RuntimeError):
+        with InterviewCsvWriter(output, run_info={'turns': 16}) as writer:
+            for result in results[:2]:
+                if result.status == 'ok':
+                    writer.write(result.audio_id, chunk_interview(result))
+                else:
+                    writer.record(result.audio_id, result.status)
+            raise RuntimeError('worker crashed')
+
+    # A torn write after the last recorded interview is ignored.
+    with open(output, 'ab') as f:
+        f.write(b'half,a,row')
+    written = [r.audio_id for r in results[:2] if r.status == 'ok']
+    partial = read_partial(output)
+    pd.testing.assert_frame_equal(partial, expected[expected['audio_id'].isin(written)].reset_index(drop=True), check_dtype=False)
+    assert not load_stream_manifest(output)['complete']
+
+    with pytest.raises(ValueError):
+        InterviewCsvWriter(output, resume=True, run_info={'turns': 8})
+    with InterviewCsvWriter(output, resume=True, run_info={'turns': 16}) as writer:
+        assert set(writer.done) == {r.audio_id for r in results[:2]}
+        for result in results:
+            if result.audio_id in writer.done:
+                continue
+            if result.status == 'ok':
+                writer.write(result.audio_id, chunk_interview(result))
+            else:
+                writer.record(result.audio_id, result.status)
+
+    manifest = load_stream_manifest(output)
+    assert manifest['complete'] and manifest['rows'] == len(expected)
+    pd.testing.assert_frame_equal(pd.read_csv(output), read_partial(output))
+    pd.testing.assert_frame_equal(pd.read_csv(output), expected, check_dtype=False)
+
+    # Starting over invalidates the old manifest before any interview is written.
+    with pytest.raises(RuntimeError):
+        with InterviewCsvWriter(output, run_info={'turns': 16}):
+            raise RuntimeError('crashed before the first interview')
+    manifest = load_stream_manifest(output)
+    assert not manifest['complete'] and manifest['bytes'] == 0 and manifest['interviews'] == {}
+    assert read_partial(output).empty
@@ -0,0 +1,31 @@
+import pandas as pd
+from my_masters_degree.process_dataset import InterviewSegmentation, aggregate_sample_dialogues
+from my_masters_degree.sampling_mupetalks import extract_audio_from_parquets
+from my_masters_degree.synthetic_corpus import SyntheticCorpusConfig, generate_corpus, generate_interview
+
+SMALL = SyntheticCorpusConfig(scale=0.1, segments_per_interview=(80, 120), rows_per_shard=100)
+
+
+def test_generation_is_deterministic_and_prefix_stable():
+    a = generate_interview(SMALL, 1)
+    b = generate_interview(SMALL.model_copy(update={'scale': 10.0}), 1)
+    assert a == b
+    assert generate_interview(SMALL, 2)['rows'] != a['rows']
+
+
+def test_corpus_runs_through_the_pipeline(tmp_path):
+    paths = generate_corpus(tmp_path, SMALL)
+    train_df = pd.read_csv(paths.train_csv)
+    assert train_df['audio_id'].nunique() == SMALL.num_interviews
+
+    audio_id = int(train_df['audio_id'].iloc[0])
+    aggregated, _, interviewer_code = aggregate_sample_dialogues(train_df, audio_id)
+    segmentation = InterviewSegmentation.model_validate_json(
+        (paths.segmentations_dir / f'interview_segmentation_{audio_id}.json').read_text(encoding='utf-8')
+    )
+    question_ids = {item.id for seg in segmentation.segments for sub in seg.subsections for item in sub.items}
+    assert question_ids == set(aggregated.index[aggregated['speaker_code'] == interviewer_code])
+
+    file_paths = train_df['file_path'].tolist()
+    audio_map = extract_audio_from_parquets(file_paths, str(paths.parquet_dir))
+    assert len(audio_map) == len(file_paths)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from my_masters_degree import transcript_alignment
+from my_masters_degree.transcript_alignment import align_transcript, banded_alignment, normalize_token
+
+
+def test_normalize_token():
+    assert normalize_token("Mãe,") == "mae"
+    assert normalize_token("–") == ""
+
+
+def test_banded_alignment_matches_edit_distance():
+    ref = np.array([1, 2, 3, 4, 5])
+    hyp = np.array([1, 3, 4, 9, 5, 6])
+    ops = banded_alignment(ref, hyp, band=2)
+    errors = sum(i is None or j is None or ref[i] != hyp[j] for i, j in ops)
+    assert errors == 3
+    assert [i for i, _ in ops if i is not None] == list(range(5))
+    assert [j for _, j in ops if j is not None] == list(range(6))
+
+
+def test_align_transcript_splits_blocks_across_segments():
+    blocks = pd.DataFrame({
+        'identifier': ['p1', 'r1', 'p2', 'r2'],
+        'text': [
+            'Qual é o seu nome completo?',
+            'Meu nome é Adilson Pereira Lobo, nasci em São Paulo.',
+            'E o nome dos seus pais?',
+            'Meu pai Alberto e minha mãe Rosa.',
+        ],
+    })
+    utterances = pd.DataFrame({'original_text': [
+        'qual é o seu nome completo',
+        'meu nome é adilson pereira lobo',
+        'nasci em sao paulo e o nome dos',
+        'seus país',
+        'meu pai roberto e a minha mãe rosa',
+    ]}, index=[10, 11, 12, 13, 14])
+
+    aligned = align_transcript(blocks, utterances)
+
+    assert list(aligned.index) == [10, 11, 12, 13, 14]
+    assert aligned.loc[12, 'corrected_text'] == 'nasci em São Paulo. E o nome dos'
+    assert aligned.loc[12, 'pdf_identifiers'] == ['r1', 'p2']
+    assert aligned.loc[13, 'corrected_text'] == 'seus pais?'
+    assert aligned.loc[14, 'corrected_text'] == 'Meu pai Alberto e minha mãe Rosa.'
+    assert aligned.loc[10, 'wer'] == 0.0
+    assert aligned.loc[14, 'wer'] == pytest.approx(2 / 7)
+    assert not aligned['diagonal_fallback'].any()
+
+
+def test_align_transcript_flags_diagonal_fallback(monkeypatch):
+    blocks = pd.DataFrame({'identifier': ['r1'], 'text': ['um dois três quatro cinco seis sete oito']})
+    utterances = pd.DataFrame({'original_text': ['um dois três', 'quatro cinco', 'seis sete oito']})
+    monkeypatch.setattr(transcript_alignment, 'MAX_DP_CELLS', 10)
+    aligned = align_transcript(blocks, utterances, ngram=20)
+    assert aligned['diagonal_fallback'].tolist() == [True, True, True]